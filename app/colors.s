@@ -41,14 +41,19 @@ frame_loop:
     slli x4, x4, 8
     // 76800 correct.
 
-pixel_loop:
     // Combine RGB (x1) with Alpha (0xFF000000)
     lui x5, 0xFF000
     add x6, x1, x5
-    sw x6, 0(x3)
+
+    // Unrolled: UNROLL stores per branch (76800 is a multiple of UNROLL)
+    .eqv UNROLL 8
+pixel_loop:
+    .rept UNROLL, i
+    sw x6, \i*4(x3)
+    .endr
     
-    addi x3, x3, 4
-    addi x2, x2, 1
+    addi x3, x3, UNROLL*4
+    addi x2, x2, UNROLL
     blt x2, x4, pixel_loop
     
     // --- Screen Painted (76800 Writes Done) ---
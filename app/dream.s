@@ -10,6 +10,17 @@
 .eqv SCREEN_W,    320
 .eqv SCREEN_H,    240
 
+// Triangle Wave Function: T(v) = (v & 1FF) > 255 ? 511 - (v&1FF) : (v&1FF)
+// In place on v; clobbers x22.
+.macro triangle v
+    andi \v, \v, 0x1FF       // mod 512
+    addi x22, x0, 256
+    blt  \v, x22, tri_done\@
+    addi x22, x0, 511
+    sub  \v, x22, \v
+tri_done\@:
+.endm
+
 .text
 .globl _start
 
@@ -52,49 +63,30 @@ y_loop:
 
 x_loop:
     // --- SMOOTH PLASMA ALGORITHM (No XOR) ---
-    // Triangle Wave Function: T(v) = (v & 1FF) > 255 ? 511 - (v&1FF) : (v&1FF)
-    
+    // Unrolled: two 2x2 blocks (x, x+2) per iteration; 160 blocks per row.
+    .rept 2, k
+
     // R = Triangle(x + t)
     add x4, x12, x11
-    andi x4, x4, 0x1FF       // mod 512
-    addi x22, x0, 256
-    blt  x4, x22, calc_r_done
-    addi x22, x0, 511
-    sub  x4, x22, x4
-calc_r_done:
+    triangle x4
     slli x4, x4, 16          // R Pos
 
     // G = Triangle(y + t*2)
     slli x22, x11, 1         // t*2
     add x5, x13, x22
-    andi x5, x5, 0x1FF
-    addi x22, x0, 256
-    blt  x5, x22, calc_g_done
-    addi x22, x0, 511
-    sub  x5, x22, x5
-calc_g_done:
+    triangle x5
     slli x5, x5, 8           // G Pos
 
     // B = Triangle(x + y - t)
     add x6, x12, x13
     sub x6, x6, x11
-    andi x6, x6, 0x1FF
-    addi x22, x0, 256
-    blt  x6, x22, calc_b_done
-    addi x22, x0, 511
-    sub  x6, x22, x6
-calc_b_done:
+    triangle x6
     // B is in low bits, no shift needed
     
     // A = Triangle(x - y + t) -> Breathing
     sub x7, x12, x13
     add x7, x7, x11
-    andi x7, x7, 0x1FF
-    addi x22, x0, 256
-    blt  x7, x22, calc_a_done
-    addi x22, x0, 511
-    sub  x7, x22, x7
-calc_a_done:
+    triangle x7
     // Compress A to 128..255 range? 
     // Currently 0..255. Let's make it 128 + (v>>1)
     srli x7, x7, 1
@@ -107,17 +99,18 @@ calc_a_done:
     or x8, x8, x7            // A | R | G | B
 
     // Store to 2x2 Block
-    sw x8, 0(x25)            // Top Left
-    sw x8, 4(x25)            // Top Right
-    sw x8, 0(x26)            // Bot Left
-    sw x8, 4(x26)            // Bot Right
-    
-    // Increment Ptrs (2 pixels = 8 bytes)
-    addi x25, x25, 8
-    addi x26, x26, 8
+    sw x8, \k*8(x25)         // Top Left
+    sw x8, \k*8+4(x25)       // Top Right
+    sw x8, \k*8(x26)         // Bot Left
+    sw x8, \k*8+4(x26)       // Bot Right
     
     // Increment X (2 steps)
     addi x12, x12, 2
+    .endr
+    
+    // Increment Ptrs (2 blocks = 16 bytes)
+    addi x25, x25, 16
+    addi x26, x26, 16
     blt  x12, x29, x_loop
 
     // Next Y Row (2 steps)
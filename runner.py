@@ -5,6 +5,10 @@ import subprocess
 import argparse
 import shutil
 import re
+import io
+import hashlib
+import contextlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # --- Configuration ---
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -13,6 +17,23 @@ SRC_DIR = os.path.join(PROJECT_ROOT, "src")
 TOOLS_DIR = os.path.join(PROJECT_ROOT, "tools")
 APP_DIR = os.path.join(PROJECT_ROOT, "app")
 TEST_LOG = os.path.join(BUILD_DIR, "test_results.log")
+LOG_DIR = os.path.join(PROJECT_ROOT, "logs")
+ASM_CACHE_DIR = os.path.join(BUILD_DIR, "asm_cache")
+OBJ_CACHE_DIR = os.path.join(BUILD_DIR, "obj_cache")
+PERF_LOG_NAME = "perf_counters.txt"  # Written by Performance_Monitor into +OUTDIR (default: logs/)
+SIM_EXIT_HANG = 3                    # sim_headless exit code when its watchdog stops a hung program
+SIM_EXIT_TIMEOUT = 4                 # sim_headless exit code when +MAX_CYCLES ends a run before EBREAK
+
+# Build mode -> (make target, simulator binary in BUILD_DIR)
+# 'headless' is the untraced fast build used for regression and benchmarking;
+# 'headless_trace' is only needed for VCD output (run --trace).
+BUILD_MODES = {
+    "headless": ("headless_fast", "sim_headless_fast"),
+    "headless_trace": ("headless_trace", "sim_headless_trace"),
+    "gui": ("gui", "sim_gui"),
+    "coverage": ("coverage", "sim_cov"),
+    "pylib": ("pylib", "librv32i_sim.so"),
+}
 
 # --- Helper Functions ---
 def log(msg):
@@ -36,6 +57,150 @@ def run_cmd(cmd, cwd=PROJECT_ROOT, silent=False):
             log_error(f"Command failed: {cmd}")
         sys.exit(e.returncode)
 
+def _assembler_module():
+    """Import tools/assembler.py once so programs assemble in-process."""
+    if TOOLS_DIR not in sys.path:
+        sys.path.insert(0, TOOLS_DIR)
+    import assembler
+    return assembler
+
+_assembler_version = None
+
+def assembler_version():
+    """Content hash of tools/assembler.py - any assembler change invalidates the cache."""
+    global _assembler_version
+    if _assembler_version is None:
+        with open(_assembler_module().__file__, 'rb') as f:
+            _assembler_version = hashlib.sha256(f.read()).hexdigest()
+    return _assembler_version
+
+def assemble_cached(asm_path, schedule=False, profile=None):
+    """
+    Assemble a .s file through the content-addressed cache in build/asm_cache/.
+    The key is sha256(assembler version + options + program source), so unchanged
+    programs are never re-assembled. Returns the path of the cached hex file.
+    Raises RuntimeError (with the assembler's messages) if assembly fails.
+    schedule=True runs the load-use scheduling pass and profile (a branch
+    profile JSON) the block layout pass; both are reported on a fresh build.
+    """
+    with open(asm_path, 'rb') as f:
+        source = f.read()
+    options = b"schedule;" if schedule else b""
+    if profile:
+        with open(profile, 'rb') as f:
+            options += b"profile=" + hashlib.sha256(f.read()).hexdigest().encode() + b";"
+    key = hashlib.sha256(assembler_version().encode() + options + source).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(asm_path))[0]
+    hex_path = os.path.join(ASM_CACHE_DIR, f"{stem}_{key}.hex")
+    if os.path.exists(hex_path):
+        return hex_path
+    
+    messages = _build_cached(hex_path, lambda tmp_path, tmp_data_path, tmp_map_path: _assembler_module().assemble(
+        asm_path, tmp_path, tmp_data_path, schedule=schedule, profile=profile, map_file=tmp_map_path))
+    for line in messages.splitlines():
+        if line.startswith(("Scheduled:", "Branch layout")):
+            log(f"{os.path.basename(asm_path)}: {line}")
+    return hex_path
+
+def link_cached(paths, schedule=False):
+    """
+    Link several .s/.rvo files (the first one holds the entry point) with
+    tools/linker.py. Each source is assembled once per content hash into
+    build/obj_cache/, and the linked program is cached in build/asm_cache/
+    by the keys of its inputs. Returns the path of the cached hex file.
+    Raises RuntimeError (with the assembler/linker messages) on failure.
+    """
+    _assembler_module()   # tools/ on sys.path
+    import linker
+    stem = os.path.splitext(os.path.basename(paths[0]))[0]
+    hex_path = os.path.join(ASM_CACHE_DIR, f"{stem}_linked_{linker.link_key(paths, schedule)}.hex")
+    if os.path.exists(hex_path):
+        return hex_path
+    
+    _build_cached(hex_path, lambda tmp_path, tmp_data_path, tmp_map_path: linker.link_files(
+        paths, tmp_path, OBJ_CACHE_DIR, tmp_data_path, schedule=schedule, map_file=tmp_map_path))
+    return hex_path
+
+def _build_cached(hex_path, build):
+    """
+    Run build(tmp hex path, tmp data path, tmp map path) and move its outputs
+    (and the binary images written next to them) into the cache. Returns the
+    captured messages; raises RuntimeError on failure.
+    """
+    asm = _assembler_module()
+    os.makedirs(ASM_CACHE_DIR, exist_ok=True)
+    tmp_path = f"{hex_path}.{os.getpid()}.tmp"
+    data_path = data_image(hex_path, must_exist=False)
+    tmp_data_path = f"{data_path}.{os.getpid()}.tmp"
+    map_path = asm.map_path(hex_path)
+    tmp_map_path = f"{map_path}.{os.getpid()}.tmp"
+    # (temporary, final) pairs; the sidecars go first: an existing hex means a complete cache entry
+    outputs = [(asm.binary_path(tmp_data_path), asm.binary_path(data_path)), (tmp_data_path, data_path),
+               (tmp_map_path, map_path), (asm.binary_path(tmp_path), asm.binary_path(hex_path)),
+               (tmp_path, hex_path)]
+    messages = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(messages):
+            build(tmp_path, tmp_data_path, tmp_map_path)
+    except Exception as e:
+        for path, _ in outputs:
+            if os.path.exists(path):
+                os.remove(path)
+        raise RuntimeError(messages.getvalue().strip() or str(e)) from e
+    for path, final in outputs:
+        if os.path.exists(path):
+            os.replace(path, final)
+    return messages.getvalue()
+
+def data_image(hex_path, must_exist=True):
+    """The .data image next to a program (prog.hex -> prog.data.hex), or None."""
+    path = _assembler_module().data_image_path(hex_path)
+    if must_exist and not os.path.exists(path):
+        return None
+    return path
+
+def sim_image(path):
+    """
+    The image the simulator should load for a hex image: its binary
+    (prog.bin, mmap'd by the harness) when the assembler wrote one and it is
+    not older than the hex, else the hex file itself.
+    """
+    binary = _assembler_module().binary_path(path)
+    if os.path.exists(binary) and os.path.getmtime(binary) >= os.path.getmtime(path):
+        return binary
+    return path
+
+def data_flag(hex_path):
+    """+DATAFILE plusarg for a program with a .data image ('' otherwise)."""
+    path = data_image(hex_path)
+    return f"+DATAFILE={sim_image(path)}" if path else ""
+
+def sim_flags(hex_path):
+    """+TESTFILE (and +DATAFILE) plusargs that load a program."""
+    return f"+TESTFILE={sim_image(hex_path)} {data_flag(hex_path)}".strip()
+
+def source_map(hex_path):
+    """Program map next to a hex file (written by the assembler/linker), or None."""
+    _assembler_module()   # tools/ on sys.path
+    from riscv_disasm import SourceMap
+    try:
+        return SourceMap.for_program(hex_path)
+    except (OSError, ValueError, KeyError) as e:
+        log(f"Ignoring unreadable program map: {e}")
+        return None
+
+def retire_hotspots(retire_path, prog_map=None, top=10):
+    """Most expensive PCs of a retire trace for the --perf report ([] if unavailable)."""
+    if not retire_path or not os.path.exists(retire_path):
+        return []
+    _assembler_module()   # tools/ on sys.path
+    try:
+        from retire_trace import RetireTrace
+        return RetireTrace(retire_path, prog_map).hotspots(top)
+    except Exception as e:
+        log(f"Hot spots unavailable: {e}")
+        return []
+
 def check_env():
     """Verify essential tools are available."""
     print("\n" + "="*60)
@@ -92,18 +257,56 @@ def cmd_clean(args):
     
     log_success("Cleaned project workspace.")
 
+# Inputs that determine a simulator build: RTL, C++ harness and the Makefile (flags)
+BUILD_INPUT_GLOBS = ["src/**/*.v", "sim/*.cpp", "sim/common/*.h", "Makefile"]
+
+def build_hash(mode):
+    """Hash of everything a build variant depends on (sources, harness, flags)."""
+    import glob
+    h = hashlib.sha256(mode.encode())
+    for pattern in BUILD_INPUT_GLOBS:
+        for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, pattern), recursive=True)):
+            h.update(os.path.relpath(path, PROJECT_ROOT).encode())
+            with open(path, 'rb') as f:
+                h.update(f.read())
+    return h.hexdigest()[:12]
+
+def variant_dir(mode):
+    """Build directory for a mode: build/<target>-<hash>/ (obj_dir + binary)."""
+    return os.path.join(BUILD_DIR, f"{BUILD_MODES[mode][0]}-{build_hash(mode)}")
+
+def sim_binary(mode):
+    """
+    Path to the up-to-date simulator for a mode, building it first if needed.
+    A changed RTL/harness/flag hash points to a new variant directory, so an
+    outdated binary is never picked up.
+    """
+    sim_bin = os.path.join(variant_dir(mode), BUILD_MODES[mode][1])
+    if not os.path.exists(sim_bin):
+        log(f"Simulator binary ({BUILD_MODES[mode][1]}) missing or out of date. Building...")
+        cmd_build(argparse.Namespace(mode=mode))
+    return sim_bin
+
 def cmd_build(args):
-    if args.mode not in ["headless", "gui", "coverage"]:
-        log_error("Invalid mode. Use --mode headless, --mode gui, or --mode coverage")
+    if args.mode not in BUILD_MODES:
+        log_error("Invalid mode. Use --mode headless, --mode headless_trace, --mode gui, --mode coverage, or --mode pylib")
         sys.exit(1)
     
     # Ensure build dir exists
     os.makedirs(BUILD_DIR, exist_ok=True)
     
-    target = args.mode # 'headless' or 'gui'
-    # log(f"Building target: {target}...")
-    run_cmd(f"make {target} -s", silent=False) # Keep make output visible if needed, or silent? User wanted prettier logic.
+    target = BUILD_MODES[args.mode][0]
+    out_dir = variant_dir(args.mode)
+    # Makefile expects a path relative to the project root
+    rel_dir = os.path.relpath(out_dir, PROJECT_ROOT)
+    run_cmd(f"make {target} VARIANT_DIR={rel_dir} -s", silent=False)
     # Makefile is mostly silent now due to modifications, only prints custom echos.
+    
+    # Drop stale variants of the same target (other modes are kept)
+    for entry in os.listdir(BUILD_DIR):
+        path = os.path.join(BUILD_DIR, entry)
+        if entry.startswith(f"{target}-") and path != out_dir and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
 
 # --- Helper Functions ---
 def detect_gui_needed(file_path):
@@ -133,7 +336,6 @@ def cmd_run(args):
     # Auto-Detect Mode
     use_gui = detect_gui_needed(app_path)
     mode_str = "gui" if use_gui else "headless"
-    sim_bin_name = "sim_gui" if use_gui else "sim_headless"
     
     # Trace mode check - only works with headless
     if args.trace and use_gui:
@@ -141,34 +343,44 @@ def cmd_run(args):
         log("Application requires GUI (VRAM usage detected). Cannot generate waveform.")
         sys.exit(1)
     
-    # Ensure simulator exists (Auto-build if needed)
-    sim_bin = os.path.join(BUILD_DIR, sim_bin_name)
-    if not os.path.exists(sim_bin):
-        log(f"Simulator binary ({sim_bin_name}) not found. Building first...")
-        args.mode = mode_str
-        cmd_build(args)
+    if args.retire_trace and use_gui:
+        log_error("Retire trace (--retire-trace) is only supported with headless simulation.")
+        sys.exit(1)
     
-    # Prepare Hex File
-    hex_path = os.path.join(BUILD_DIR, "app.hex")
+    if args.link and args.profile:
+        log_error("--profile applies to a single assembled program and cannot be combined with --link.")
+        sys.exit(1)
+    
+    # Only waveform runs pay for trace instrumentation
+    build_mode = "headless_trace" if args.trace else mode_str
+    
+    # Ensure an up-to-date simulator exists (Auto-build if missing or stale)
+    sim_bin = sim_binary(build_mode)
     
+    # Prepare Hex File
     if ext == ".s":
-        # Assemble Assembly file
+        # Assemble Assembly file (cached by content hash)
         log(f"Assembling {os.path.basename(args.file)}")
-        assembler_script = os.path.join(TOOLS_DIR, "assembler.py")
-        if not os.path.exists(assembler_script):
-            log_error(f"Assembler not found at {assembler_script}")
+        try:
+            if args.link:
+                hex_path = link_cached([app_path] + [os.path.abspath(p) for p in args.link], schedule=args.schedule)
+            else:
+                hex_path = assemble_cached(app_path, schedule=args.schedule, profile=args.profile)
+        except RuntimeError as e:
+            log_error(f"Assembly failed:\n{e}")
             sys.exit(1)
-
-        run_cmd(f"python3 {assembler_script} {app_path} {hex_path}", silent=True)
         
     elif ext == ".hex" or ext == ".txt":
         # Use directly
         log(f"Using hex file: {os.path.basename(args.file)}")
-        shutil.copy(app_path, hex_path)
+        hex_path = app_path
     else:
         log_error(f"Unsupported file type: {ext}")
         sys.exit(1)
     
+    # Labels/source lines for the reports (assembler/linker map next to the hex)
+    prog_map = source_map(hex_path)
+    
     # Prepare VCD path if trace enabled
     vcd_path = None
     if args.trace:
@@ -182,27 +394,38 @@ def cmd_run(args):
         
         vcd_path = os.path.join(waveform_dir, vcd_filename)
         log(f"Waveform will be saved to: {vcd_path}")
+    
+    # Prepare retire trace path (binary, works with every headless build)
+    retire_path = None
+    if args.retire_trace:
+        import datetime
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        app_name = os.path.splitext(os.path.basename(args.file))[0]
+        retire_dir = os.path.join(PROJECT_ROOT, "logs", "traces", f"{app_name}_{timestamp}")
+        os.makedirs(retire_dir, exist_ok=True)
+        retire_path = os.path.join(retire_dir, "retire.rvrt")
             
     # Run Simulation
     log(f"Launching simulation [{mode_str}] (Auto-Detected)...")
     
     # Clear old performance log if --perf enabled (prevents showing stale data)
+    perf_log = os.path.join(LOG_DIR, PERF_LOG_NAME)
     if args.perf:
-        perf_log = os.path.join(PROJECT_ROOT, "logs", "perf_counters.txt")
         if os.path.exists(perf_log):
             os.remove(perf_log)
     
     # Build command with flags
     perf_flag = "+PERF_ENABLE" if args.perf else ""
     vcd_flag = f"+VCD={vcd_path}" if args.trace else ""
-    cmd = f"{sim_bin} +TESTFILE={hex_path} {perf_flag} {vcd_flag}".strip()
+    retire_flag = f"+RETIRE_TRACE={retire_path}" if retire_path else ""
+    cmd = f"{sim_bin} {sim_flags(hex_path)} +OUTDIR={LOG_DIR} {perf_flag} {vcd_flag} {retire_flag} {max_cycles_flag(args)}".strip()
     
     try:
         result = subprocess.run(cmd, shell=True, cwd=PROJECT_ROOT)
         
         # Show performance report if --perf enabled and simulation succeeded
-        if args.perf and result.returncode == 0:
-            perf_log = os.path.join(PROJECT_ROOT, "logs", "perf_counters.txt")
+        # (a run stopped at the cycle limit still has its counters)
+        if args.perf and result.returncode in (0, SIM_EXIT_TIMEOUT):
             if os.path.exists(perf_log):
                 
                 # Import and call performance_report
@@ -211,16 +434,39 @@ def cmd_run(args):
                 
                 try:
                     app_name = os.path.splitext(os.path.basename(args.file))[0]
-                    generate_report(perf_file=perf_log, test_name=app_name)
+                    generate_report(perf_file=perf_log, test_name=app_name,
+                                    hotspots=retire_hotspots(retire_path, prog_map), source_map=prog_map)
                 except Exception as e:
                     log_error(f"Report generation failed: {e}")
             else:
                 log_error("Performance log not found. Make sure simulation completed successfully.")
         
-        if result.returncode != 0:
+        if result.returncode == SIM_EXIT_HANG:
+            log_error("Program hung (stopped by the simulator watchdog).")
+            sys.exit(result.returncode)
+        if result.returncode == SIM_EXIT_TIMEOUT:
+            log("Warning: program did not reach EBREAK/ECALL within the cycle limit (--max-cycles).")
+        elif result.returncode != 0:
             log_error("Simulation failed.")
             sys.exit(result.returncode)
         
+        # Generate exec/pipeline reports from the retire trace
+        if retire_path and os.path.exists(retire_path):
+            sys.path.insert(0, TOOLS_DIR)
+            try:
+                from retire_trace import RetireTrace
+                
+                trace = RetireTrace(retire_path, prog_map)
+                retire_dir = os.path.dirname(retire_path)
+                for output_type in ('exec', 'pipeline', 'hotspots'):
+                    trace.generate(output_type, os.path.join(retire_dir, f"{output_type}.txt"))
+                trace.write_profile(os.path.join(retire_dir, "profile.json"))
+                log_success(f"Retire trace reports: {os.path.relpath(retire_dir, PROJECT_ROOT)}/")
+            except ImportError as e:
+                log_error(f"Retire trace saved but not analyzed: {e}")
+            except Exception as e:
+                log_error(f"Retire trace analysis failed: {e}")
+        
         # Launch GTKWave if --view flag and trace was enabled
         if args.trace and args.view and vcd_path and os.path.exists(vcd_path):
             log("Launching GTKWave...")
@@ -276,16 +522,16 @@ def cmd_run(args):
             try:
                 from vcd_analyzer import VCDAnalyzer
                 
-                analyzer = VCDAnalyzer(vcd_path)
+                analyzer = VCDAnalyzer(vcd_path, from_cycle=args.from_cycle, to_cycle=args.to_cycle,
+                                       source_map=prog_map)
                 outputs = parse_analyze_mode(args.analyze)
                 
-                # Generate outputs
-                for output_type in outputs:
-                    output_file = os.path.join(trace_dir, f"{output_type}.txt")
-                    try:
-                        analyzer.generate(output_type, output_file)
-                    except Exception as e:
-                        log_error(f"Failed to generate {output_type}: {e}")
+                # Generate all requested outputs in one fused pass (parallel on long traces)
+                try:
+                    analyzer.generate_reports(
+                        {output_type: os.path.join(trace_dir, f"{output_type}.txt") for output_type in outputs})
+                except Exception as e:
+                    log_error(f"Failed to generate {', '.join(outputs)}: {e}")
                 
                 log_success(f"Analysis reports: logs/traces/{vcd_name}/")
                 
@@ -300,7 +546,6 @@ def cmd_run(args):
         
         # Show performance report if --perf enabled even on interrupt
         if args.perf:
-            perf_log = os.path.join(PROJECT_ROOT, "logs", "perf_counters.txt")
             if os.path.exists(perf_log):
                 print("\n" + "="*60)
                 log("Performance Report (interrupted):")
@@ -357,13 +602,248 @@ def generate_performance_summary(perf_results, args):
         print(f"\n💾 Report saved to: {saved_file}")
 
 
+def max_cycles_flag(args):
+    """+MAX_CYCLES plusarg for --max-cycles ('' for the simulator default)."""
+    return f"+MAX_CYCLES={args.max_cycles}" if args.max_cycles else ""
+
+def run_sim_test(sim_bin, test_name, hex_path, category, perf, sim_args=""):
+    """
+    Run one regression hex through the headless simulator.
+    Executed from a worker thread; the simulator itself runs as a child process.
+    Each test gets its own +OUTDIR and +SHM_NAME so perf counters, dumps and
+    the VRAM segment never collide between parallel runs. A program stopped
+    by the simulator's watchdog is reported as HANG.
+    """
+    run_id = f"{category}_{test_name.replace('.hex', '')}"
+    run_dir = os.path.join(BUILD_DIR, "runs", run_id)
+    os.makedirs(run_dir, exist_ok=True)
+    perf_log = os.path.join(run_dir, PERF_LOG_NAME)
+    if os.path.exists(perf_log):
+        os.remove(perf_log)
+
+    res = {
+        'name': test_name, 'path': hex_path, 'category': category,
+        'status': 'ERR', 'returncode': None, 'output': "", 'perf_log': perf_log,
+    }
+
+    try:
+        # Build command with performance flag for performance tests
+        perf_flag = "+PERF_ENABLE" if (category == "performance" or perf) else ""
+        shm_name = f"/rv32i_vram_{os.getpid()}_{run_id}"
+        cmd = f"{sim_bin} {sim_flags(hex_path)} +OUTDIR={run_dir} +SHM_NAME={shm_name} {perf_flag} {sim_args}".strip()
+
+        result = subprocess.run(
+            cmd,
+            shell=True,
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            timeout=30
+        )
+        output = result.stdout + result.stderr
+        res['returncode'] = result.returncode
+        res['output'] = output
+
+        # Check for success (exit code 0)
+        if result.returncode == 0 and "PASSED" in output:
+            res['status'] = 'PASS'
+        elif result.returncode == SIM_EXIT_HANG:
+            res['status'] = 'HANG'
+        elif result.returncode == SIM_EXIT_TIMEOUT:
+            res['status'] = 'TIMEOUT'
+        else:
+            res['status'] = 'FAIL'
+    except subprocess.TimeoutExpired:
+        res['status'] = 'TIMEOUT'
+    except Exception as e:
+        res['output'] = str(e)
+
+    return res
+
+def run_embedded_tests(tests, perf, max_cycles=None):
+    """
+    Run the whole suite in this process through one reused SoC model
+    (librv32i_sim.so). Yields the same result dicts as run_sim_test, with
+    perf_counters.txt written from the live counters into each run dir.
+    """
+    sys.path.insert(0, TOOLS_DIR)
+    from soc_model import SoCModel, DEFAULT_MAX_CYCLES
+
+    lib_path = sim_binary("pylib")
+    embed_dir = os.path.join(BUILD_DIR, "runs", "embedded")
+    os.makedirs(embed_dir, exist_ok=True)
+
+    with SoCModel(lib_path, plusargs=[f"+OUTDIR={embed_dir}"]) as model:
+        for test_name, hex_path, category in tests:
+            run_id = f"{category}_{test_name.replace('.hex', '')}"
+            run_dir = os.path.join(BUILD_DIR, "runs", run_id)
+            os.makedirs(run_dir, exist_ok=True)
+            perf_log = os.path.join(run_dir, PERF_LOG_NAME)
+            if os.path.exists(perf_log):
+                os.remove(perf_log)
+
+            res = {
+                'name': test_name, 'path': hex_path, 'category': category,
+                'status': 'ERR', 'returncode': None, 'output': "", 'perf_log': perf_log,
+            }
+            perf_enable = category == "performance" or perf
+
+            try:
+                with model.capture_output() as out:
+                    model.load_program(sim_image(hex_path))
+                    data_path = data_image(hex_path)
+                    model.load_data(sim_image(data_path) if data_path else None)
+                    model.reset(perf_enable=perf_enable)
+                    finished = model.run_until_ebreak(max_cycles or DEFAULT_MAX_CYCLES)
+                res['output'] = out[0]
+                hang = model.hang
+                if hang:
+                    reason, pc = hang
+                    res['output'] += f"[SIM] HANG at cycle {model.cycles}: {reason} at PC 0x{pc:08x}\n"
+                    res['returncode'] = SIM_EXIT_HANG
+                    res['status'] = 'HANG'
+                elif not finished:
+                    # Like sim_headless, hitting the cycle limit is a TIMEOUT
+                    res['output'] += f"[SIM] Stopped at MAX_CYCLES ({model.cycles} cycles)\n"
+                    res['returncode'] = SIM_EXIT_TIMEOUT
+                    res['status'] = 'TIMEOUT'
+                else:
+                    res['returncode'] = 0
+                    if perf_enable:
+                        model.write_perf_file(perf_log)
+                    res['status'] = 'PASS'
+            except Exception as e:
+                res['output'] = str(e)
+
+            yield res
+
+def report_test_result(res, args):
+    """Print the result line for a finished test and write failure/timeout logs."""
+    test_name = res['name']
+    category = res['category']
+    perf_log = res['perf_log']
+
+    if res['status'] == 'PASS':
+        print(f"{test_name:<45} | \033[92m✅ PASS\033[0m")
+
+        # Generate performance report if --perf enabled for functional tests
+        # OR always for performance category tests (but only if NOT in summary mode)
+        if (args.perf and category == "functional") or (category == "performance" and args.verbose):
+            if os.path.exists(perf_log):
+                sys.path.insert(0, TOOLS_DIR)
+                from performance_report import generate_report
+
+                # Display compact report
+                print(f"   📊 Performance Metrics:")
+                try:
+                    generate_report(perf_file=perf_log, test_name=test_name.replace('.hex', ''))
+                except Exception as e:
+                    print(f"   ⚠️  Report generation failed: {e}")
+
+    elif res['status'] == 'FAIL':
+        print(f"{test_name:<45} | \033[91m❌ FAIL\033[0m")
+        output = res['output']
+        returncode = res['returncode']
+
+        # Create logs directory if it doesn't exist
+        log_dir = os.path.join(PROJECT_ROOT, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+
+        # Generate log filename with timestamp
+        import datetime
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = os.path.join(log_dir, f"test_fail_{test_name.replace('.hex', '')}_{timestamp}.log")
+
+        # Write detailed log
+        with open(log_file, 'w') as f:
+            f.write(f"=== TEST FAILURE REPORT ===\n")
+            f.write(f"Test: {test_name}\n")
+            f.write(f"Category: {category}\n")
+            f.write(f"Test File: {res['path']}\n")
+            f.write(f"Exit Code: {returncode}\n")
+            f.write(f"Timestamp: {timestamp}\n")
+            f.write(f"\n=== SIMULATION OUTPUT ===\n")
+            f.write(output)
+            f.write(f"\n\n=== ANALYSIS ===\n")
+
+            # Extract useful debug info
+            if "TIMEOUT" in output or returncode == -9:
+                f.write("Likely cause: TIMEOUT - simulation did not complete in time\n")
+                f.write("Suggestion: Check for infinite loops or increase timeout value\n")
+            elif "Segmentation fault" in output:
+                f.write("Likely cause: Memory access violation\n")
+            elif returncode != 0:
+                f.write(f"Non-zero exit code: {returncode}\n")
+
+            f.write("\n=== LAST 20 LINES ===\n")
+            output_lines = output.strip().split('\n')
+            last_lines = output_lines[-20:] if len(output_lines) > 20 else output_lines
+            f.write('\n'.join(last_lines))
+
+        # Print summary to console
+        print(f"  \033[93m📝 Detailed log saved: {log_file}\033[0m")
+        print(f"  Exit code: {returncode}\n")
+
+    elif res['status'] == 'HANG':
+        print(f"{test_name:<45} | \033[93m🔁 HANG\033[0m")
+        hang_lines = [line for line in res['output'].splitlines() if line.startswith("[SIM] HANG")]
+        if hang_lines:
+            print(f"  {hang_lines[-1][len('[SIM] '):]}")
+
+        # Log the hang with the simulator output
+        log_dir = os.path.join(PROJECT_ROOT, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        import datetime
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = os.path.join(log_dir, f"test_hang_{test_name.replace('.hex', '')}_{timestamp}.log")
+
+        with open(log_file, 'w') as f:
+            f.write(f"=== TEST HANG ===\n")
+            f.write(f"Test: {test_name}\n")
+            f.write(f"Category: {category}\n")
+            f.write(f"Test File: {res['path']}\n")
+            f.write(f"Stopped by the simulator watchdog (self-looping PC or no retirement).\n")
+            f.write(f"Likely causes:\n")
+            f.write(f"  - Branch/jump to itself (e.g. beq with offset 0) or a missing ebreak\n")
+            f.write(f"  - Pipeline deadlock (nothing retires)\n")
+            f.write(f"\n=== SIMULATION OUTPUT ===\n")
+            f.write(res['output'])
+
+        print(f"  \033[93m📝 Hang log saved: {log_file}\033[0m\n")
+    elif res['status'] == 'TIMEOUT':
+        print(f"{test_name:<45} | \033[93m⏱️  TIMEOUT\033[0m")
+        limit_lines = [line for line in res['output'].splitlines() if line.startswith("[SIM] Stopped at MAX_CYCLES")]
+        if limit_lines:
+            print(f"  {limit_lines[-1][len('[SIM] '):]}")
+
+        # Log timeout
+        log_dir = os.path.join(PROJECT_ROOT, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        import datetime
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        log_file = os.path.join(log_dir, f"test_timeout_{test_name.replace('.hex', '')}_{timestamp}.log")
+
+        with open(log_file, 'w') as f:
+            f.write(f"=== TEST TIMEOUT ===\n")
+            f.write(f"Test: {test_name}\n")
+            if limit_lines:
+                f.write(f"{limit_lines[-1][len('[SIM] '):]} without EBREAK/ECALL\n")
+            else:
+                f.write(f"Timeout: 30 seconds\n")
+            f.write(f"Likely causes:\n")
+            f.write(f"  - Infinite loop in test code or a missing ebreak\n")
+            f.write(f"  - Deadlock in pipeline\n")
+            f.write(f"  - Test requires more time (increase timeout or --max-cycles)\n")
+            f.write(f"\n=== SIMULATION OUTPUT ===\n")
+            f.write(res['output'])
+
+        print(f"  \033[93m📝 Timeout log saved: {log_file}\033[0m\n")
+    else:
+        print(f"{test_name:<45} | \033[91m❌ ERR \033[0m")
+
 def cmd_test(args):
-    # Build headless simulator first if needed
-    sim_bin = os.path.join(BUILD_DIR, "sim_headless")
-    if not os.path.exists(sim_bin):
-        log("Building headless simulator...")
-        build_args = argparse.Namespace(mode="headless")
-        cmd_build(build_args)
+    # Build headless simulator first if needed (or if RTL/harness changed)
+    sim_bin = None if args.embedded else sim_binary("headless")
 
     print("\n🧪 Running Regression Tests...")
     print("-" * 65)
@@ -396,27 +876,20 @@ def cmd_test(args):
         # 2. Functional Tests (hazard, corner, matrix, ISA coverage)
         func_dir = os.path.join(PROJECT_ROOT, "tests", "functional")
         if os.path.exists(func_dir):
-            # Assemble .s files first
-            assembler_script = os.path.join(TOOLS_DIR, "assembler.py")
-            for f in sorted(os.listdir(func_dir)):
-                if f.endswith(".s"):
-                    # Assemble to hex
-                    asm_path = os.path.join(func_dir, f)
-                    hex_name = f.replace(".s", ".hex")
-                    hex_path = os.path.join(func_dir, hex_name)
-                    
+            # Assemble .s files through the cache, plus any standalone hex files
+            # (e.g. the random test). Sources are never assembled into the tree.
+            func_files = sorted(os.listdir(func_dir))
+            sources = {os.path.splitext(f)[0] for f in func_files if f.endswith(".s")}
+            for f in func_files:
+                stem, ext = os.path.splitext(f)
+                if ext == ".s":
                     try:
-                        subprocess.check_call(
-                            f"python3 {assembler_script} {asm_path} {hex_path}",
-                            shell=True, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                        )
-                    except subprocess.CalledProcessError:
+                        hex_path = assemble_cached(os.path.join(func_dir, f), schedule=args.schedule)
+                    except RuntimeError:
                         log_error(f"Failed to assemble {f}")
                         continue
-            
-            # Now collect all hex files
-            for f in sorted(os.listdir(func_dir)):
-                if f.endswith(".hex"):
+                    tests.append((f"{stem}.hex", hex_path, "functional"))
+                elif ext == ".hex" and stem not in sources:
                     tests.append((f, os.path.join(func_dir, f), "functional"))
     
     # === PERFORMANCE TESTS ===
@@ -432,20 +905,15 @@ def cmd_test(args):
             os.path.join(PROJECT_ROOT, "tests", "performance", "gcd.s"),
         ]
         
-        assembler_script = os.path.join(TOOLS_DIR, "assembler.py")
         for asm_file in perf_tests:
             if os.path.exists(asm_file):
-                # Assemble to hex in BUILD_DIR
+                # Assemble through the cache in BUILD_DIR
                 hex_name = os.path.basename(asm_file).replace(".s", ".hex")
-                hex_path = os.path.join(BUILD_DIR, hex_name)
                 
                 try:
-                    subprocess.check_call(
-                        f"python3 {assembler_script} {asm_file} {hex_path}",
-                        shell=True, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                    )
-                    tests.append((os.path.basename(hex_path), hex_path, "performance"))
-                except subprocess.CalledProcessError:
+                    hex_path = assemble_cached(asm_file, schedule=args.schedule)
+                    tests.append((hex_name, hex_path, "performance"))
+                except RuntimeError:
                     log_error(f"Failed to assemble performance test {os.path.basename(asm_file)}")
             else:
                 log_error(f"Performance test file not found: {asm_file}")
@@ -454,129 +922,48 @@ def cmd_test(args):
         log_error("No tests found to run.")
         return
 
-    passed_count = 0
-    failed_count = 0
     perf_results = {}  # NEW: Collect performance results for summary table
     
-    sim_bin = os.path.join(BUILD_DIR, "sim_headless")
+    if args.embedded:
+        # One in-process model runs every test back to back (no process launches)
+        results = []
+        for res in run_embedded_tests(tests, args.perf, args.max_cycles):
+            results.append(res)
+            report_test_result(res, args)
+    else:
+        jobs = args.jobs if args.jobs and args.jobs > 0 else (os.cpu_count() or 1)
+
+        # Simulations run as independent child processes, so a thread pool is enough
+        # to keep `jobs` simulators busy. Results stream in completion order.
+        results = [None] * len(tests)
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                pool.submit(run_sim_test, sim_bin, test_name, hex_path, category, args.perf,
+                            max_cycles_flag(args)): idx
+                for idx, (test_name, hex_path, category) in enumerate(tests)
+            }
+            for future in as_completed(futures):
+                res = future.result()
+                results[futures[future]] = res
+                report_test_result(res, args)
+
+    passed_count = sum(1 for res in results if res['status'] == 'PASS')
+    failed_count = len(results) - passed_count
     
-    for test_name, hex_path, category in tests:
-        try:
-            # Build command with performance flag for performance tests
-            perf_flag = "+PERF_ENABLE" if (category == "performance" or args.perf) else ""
-            cmd = f"{sim_bin} +TESTFILE={hex_path} {perf_flag}".strip()
-            
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                cwd=PROJECT_ROOT,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            output = result.stdout + result.stderr
-            
-            # Check for success (exit code 0)
-            if result.returncode == 0 and "PASSED" in output:
-                print(f"{test_name:<45} | \033[92m✅ PASS\033[0m")
-                passed_count += 1
-                
-                # Collect performance data for summary table (performance category only)
-                if category == "performance":
-                    perf_log = os.path.join(PROJECT_ROOT, "logs", "perf_counters.txt")
-                    if os.path.exists(perf_log):
-                        sys.path.insert(0, TOOLS_DIR)
-                        from performance_summary import parse_perf_file
-                        metrics = parse_perf_file(perf_log)
-                        benchmark_name = test_name.replace('.hex', '')
-                        perf_results[benchmark_name] = ('PASS', metrics)
-                
-                # Generate performance report if --perf enabled for functional tests
-                # OR always for performance category tests (but only if NOT in summary mode)
-                if (args.perf and category == "functional") or (category == "performance" and args.verbose):
-                    perf_log = os.path.join(PROJECT_ROOT, "logs", "perf_counters.txt")
-                    if os.path.exists(perf_log):
-                        sys.path.insert(0, TOOLS_DIR)
-                        from performance_report import generate_report
-                        
-                        # Display compact report
-                        print(f"   📊 Performance Metrics:")
-                        try:
-                            generate_report(perf_file=perf_log, test_name=test_name.replace('.hex', ''))
-                        except Exception as e:
-                            print(f"   ⚠️  Report generation failed: {e}")
-            else:
-                print(f"{test_name:<45} | \033[91m❌ FAIL\033[0m")
-                failed_count += 1
-                
-                # Store FAIL status for performance tests too
-                if category == "performance":
-                    benchmark_name = test_name.replace('.hex', '')
-                    perf_results[benchmark_name] = ('FAIL', None)
-                
-                # Create logs directory if it doesn't exist
-                log_dir = os.path.join(PROJECT_ROOT, "logs")
-                os.makedirs(log_dir, exist_ok=True)
-                
-                # Generate log filename with timestamp
-                import datetime
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                log_file = os.path.join(log_dir, f"test_fail_{test_name.replace('.hex', '')}_{timestamp}.log")
-                
-                # Write detailed log
-                with open(log_file, 'w') as f:
-                    f.write(f"=== TEST FAILURE REPORT ===\n")
-                    f.write(f"Test: {test_name}\n")
-                    f.write(f"Category: {category}\n")
-                    f.write(f"Test File: {test_path}\n")
-                    f.write(f"Exit Code: {result.returncode}\n")
-                    f.write(f"Timestamp: {timestamp}\n")
-                    f.write(f"\n=== SIMULATION OUTPUT ===\n")
-                    f.write(output)
-                    f.write(f"\n\n=== ANALYSIS ===\n")
-                    
-                    # Extract useful debug info
-                    if "TIMEOUT" in output or result.returncode == -9:
-                        f.write("Likely cause: TIMEOUT - simulation did not complete in time\n")
-                        f.write("Suggestion: Check for infinite loops or increase timeout value\n")
-                    elif "Segmentation fault" in output:
-                        f.write("Likely cause: Memory access violation\n")
-                    elif result.returncode != 0:
-                        f.write(f"Non-zero exit code: {result.returncode}\n")
-                    
-                    f.write("\n=== LAST 20 LINES ===\n")
-                    output_lines = output.strip().split('\n')
-                    last_lines = output_lines[-20:] if len(output_lines) > 20 else output_lines
-                    f.write('\n'.join(last_lines))
-                
-                # Print summary to console
-                print(f"  \033[93m📝 Detailed log saved: {log_file}\033[0m")
-                print(f"  Exit code: {result.returncode}\n")
-                
-        except subprocess.TimeoutExpired:
-            print(f"{test_name:<45} | \033[93m⏱️  TIMEOUT\033[0m")
-            failed_count += 1
-            
-            # Log timeout
-            log_dir = os.path.join(PROJECT_ROOT, "logs")
-            os.makedirs(log_dir, exist_ok=True)
-            import datetime
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            log_file = os.path.join(log_dir, f"test_timeout_{test_name.replace('.hex', '')}_{timestamp}.log")
-            
-            with open(log_file, 'w') as f:
-                f.write(f"=== TEST TIMEOUT ===\n")
-                f.write(f"Test: {test_name}\n")
-                f.write(f"Timeout: 10 seconds\n")
-                f.write(f"Likely causes:\n")
-                f.write(f"  - Infinite loop in test code\n")
-                f.write(f"  - Deadlock in pipeline\n")
-                f.write(f"  - Test requires more time (increase timeout)\n")
-            
-            print(f"  \033[93m📝 Timeout log saved: {log_file}\033[0m\n")
-        except Exception as e:
-            print(f"{test_name:<45} | \033[91m❌ ERR \033[0m")
-            failed_count += 1
+    # Collect performance data for summary table in suite order (performance category only)
+    for res in results:
+        if res['category'] != "performance":
+            continue
+        benchmark_name = res['name'].replace('.hex', '')
+        if res['status'] == 'PASS':
+            if os.path.exists(res['perf_log']):
+                sys.path.insert(0, TOOLS_DIR)
+                from performance_summary import parse_perf_file
+                metrics = parse_perf_file(res['perf_log'])
+                perf_results[benchmark_name] = ('PASS', metrics)
+        elif res['status'] in ('FAIL', 'HANG', 'TIMEOUT'):
+            # Store FAIL/HANG/TIMEOUT status for performance tests too
+            perf_results[benchmark_name] = (res['status'], None)
 
     print("-" * 65)
     if failed_count == 0:
@@ -601,7 +988,7 @@ def cmd_coverage(args):
     # 2. Generate Random Test Data
     # Use a safer count to avoid crashes (1000 instrs)
     log("Generating Random Test Vectors (Count=1000)...")
-    sim_bin = os.path.join(BUILD_DIR, "sim_cov")
+    sim_bin = os.path.join(variant_dir("coverage"), BUILD_MODES["coverage"][1])
     rand_hex = os.path.join(BUILD_DIR, "random_cov.hex")
     gen_script = os.path.join(PROJECT_ROOT, "tests", "test_gen.py")
     
@@ -674,11 +1061,13 @@ def main():
      - Removes 'build/' directory and temporary compiled files.
 
    \033[93m3. BUILD SIMULATOR\033[0m
-     \033[1m./runner.py build [--mode {headless|gui|coverage}]\033[0m
+     \033[1m./runner.py build [--mode {headless|headless_trace|gui|coverage}]\033[0m
      - Compiles the Verilog core into a C++ simulator.
-     - \033[96m--mode headless\033[0m : (Default) Fast simulation, no video output.
+     - \033[96m--mode headless\033[0m : (Default) Fast simulation, no video output, no trace.
+     - \033[96m--mode headless_trace\033[0m : Headless with VCD support (auto-used by run --trace).
      - \033[96m--mode gui\033[0m      : Enable SDL2 window for VGA/Video output.
      - \033[96m--mode coverage\033[0m : Enable Verification Coverage (logs/coverage.dat).
+     - \033[96m--mode pylib\033[0m    : Shared library for in-process use (tools/soc_model.py).
 
   \033[93m4. RUN APPLICATION\033[0m
      \033[1m./runner.py run <file> [OPTIONS]\033[0m
@@ -690,6 +1079,15 @@ def main():
          Modes: all (4 traces), minimal (exec+pipeline), debug (pipeline+events)
          Custom: exec,pipeline,events,state
          Output: logs/traces/<name>_<timestamp>/
+     - \033[96m--from-cycle N / --to-cycle N\033[0m : Limit --analyze reports to a cycle window.
+     - \033[96m--retire-trace\033[0m : Binary retire trace + exec/pipeline/hot spot reports, much cheaper than a VCD.
+         Output: logs/traces/<name>_<timestamp>/ (retire.rvrt, exec.txt, pipeline.txt, hotspots.txt, profile.json)
+         With --perf, the report also lists the hot spots (label+offset and source line).
+     - \033[96m--profile <json>\033[0m : Lay out basic blocks by a branch profile (profile.json from --retire-trace).
+     - \033[96m--schedule\033[0m : Assemble with the load-use scheduling pass (reorders within basic blocks).
+     - \033[96m--link <file>\033[0m : Link another .s/.rvo into the program (repeatable; objects cached per source).
+     - \033[96m--max-cycles N\033[0m : Cycle budget (default: 1000000). A program that branches to itself
+         or stops retiring is stopped at once by the simulator watchdog.
      - \033[96m--view\033[0m  : Auto-launch GTKWave after trace generation (requires --trace).
      - \033[96m--template <name>\033[0m : Use GTKWave template from tb/templates/<name>.gtkw
        Default template: core_signals
@@ -706,7 +1104,13 @@ def main():
      - \033[96m--check-regression\033[0m : Compare against baseline and report improvements/regressions.
      - \033[96m--count N\033[0m        : Number of random instructions (default: 100).
      - \033[96m--seed S\033[0m         : Seed for random generation (optional).
+     - \033[96m--jobs N\033[0m         : Parallel simulations (default: CPU count, 1 = sequential).
+     - \033[96m--embedded\033[0m       : Run all tests in-process on one reused model (librv32i_sim.so).
+     - \033[96m--schedule\033[0m       : Assemble with the load-use scheduling pass (compare with --check-regression).
+     - \033[96m--max-cycles N\033[0m   : Cycle budget per test (default: 1000000).
      - Note: If no filter specified, runs ALL tests.
+     - Note: Programs that hang (PC branching to itself, nothing retiring) are stopped by the
+       simulator watchdog right away and reported as HANG.
   \033[93m6. COVERAGE REPORT\033[0m
      \033[1m./runner.py coverage\033[0m
      - Builds coverage binary, runs simulation, and generates report.
@@ -742,8 +1146,8 @@ Maintainer: Ismail Melik
     
     # Command: build
     p_build = subparsers.add_parser("build", help="Build the simulator binary")
-    p_build.add_argument("--mode", choices=["headless", "gui", "coverage"], default="headless", 
-                        help="Select build target:\n  headless - Fast, no display (default)\n  gui      - SDL2 visualization\n  coverage - Verification with coverage")
+    p_build.add_argument("--mode", choices=list(BUILD_MODES), default="headless", 
+                        help="Select build target:\n  headless       - Fast, no display, no trace (default)\n  headless_trace - Headless with VCD waveform support\n  gui            - SDL2 visualization\n  coverage       - Verification with coverage\n  pylib          - Shared library for in-process Python use")
     
     # Command: run
     p_run = subparsers.add_parser("run", help="Run a RISC-V application (.s or .hex)")
@@ -756,6 +1160,20 @@ Maintainer: Ismail Melik
   minimal  - Exec + Pipeline traces only  
   debug    - Pipeline + Events (for bug hunting)
   Custom combination: exec,pipeline,events,state""")
+    p_run.add_argument("--from-cycle", type=int, default=None, metavar='N',
+                      help="First cycle included in --analyze reports (inclusive)")
+    p_run.add_argument("--to-cycle", type=int, default=None, metavar='N',
+                      help="Last cycle included in --analyze reports (inclusive)")
+    p_run.add_argument("--retire-trace", action="store_true",
+                      help="Record a binary retire trace (+RETIRE_TRACE) and write exec/pipeline/hot spot reports from it (no VCD needed)")
+    p_run.add_argument("--schedule", action="store_true",
+                       help="Reorder instructions in the assembler to avoid load-use stalls")
+    p_run.add_argument("--link", action="append", default=[], metavar='FILE',
+                       help="Link another .s/.rvo file into the program (repeatable)")
+    p_run.add_argument("--profile", type=str, default=None, metavar='JSON',
+                       help="Branch profile (profile.json from --retire-trace) for profile-guided block layout")
+    p_run.add_argument("--max-cycles", type=int, default=None, metavar='N',
+                       help="Cycle budget of the simulation (+MAX_CYCLES, default: 1000000)")
     p_run.add_argument("--view", action="store_true", help="Auto-launch GTKWave after trace generation (requires --trace)")
     p_run.add_argument("--template", type=str, help="GTKWave template name (e.g., 'core_signals' loads templates/core_signals.gtkw)")
     # p_run.add_argument("--gui", action="store_true", help="Launch in Graphical User Interface (GUI) mode") (Removed/Auto-detected)
@@ -772,6 +1190,14 @@ Maintainer: Ismail Melik
                        help="Save performance report to file (auto-generated name if no path given)")
     p_test.add_argument("--save-baseline", action="store_true", help="Save current performance results as baseline (expected.json)")
     p_test.add_argument("--check-regression", action="store_true", help="Compare performance against baseline and report regressions")
+    p_test.add_argument("--jobs", "-j", type=int, default=None, metavar='N',
+                       help="Number of simulations to run in parallel (default: CPU count)")
+    p_test.add_argument("--schedule", action="store_true",
+                        help="Reorder instructions in the assembler to avoid load-use stalls")
+    p_test.add_argument("--embedded", action="store_true",
+                       help="Run tests sequentially in-process on one reused model (ignores --jobs)")
+    p_test.add_argument("--max-cycles", type=int, default=None, metavar='N',
+                       help="Cycle budget per test (+MAX_CYCLES, default: 1000000); reaching it is a TIMEOUT")
     
     # Command: coverage
     p_cov = subparsers.add_parser("coverage", help="Run & Generate Coverage Report")
@@ -782,6 +1208,8 @@ Maintainer: Ismail Melik
         sys.exit(1)
 
     args = parser.parse_args()
+    if getattr(args, 'max_cycles', None) is not None and args.max_cycles < 1:
+        parser.error("--max-cycles must be at least 1")
     
     if args.command == "env":
         cmd_check(args)
@@ -0,0 +1,134 @@
+#ifndef PROGRAM_IMAGE_H
+#define PROGRAM_IMAGE_H
+
+#include <cctype>
+#include <cerrno>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#include <fstream>
+#include <iostream>
+#include <string>
+#include <vector>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <fcntl.h>
+#include <unistd.h>
+
+// Memory image loader for +TESTFILE / +DATAFILE - the only path that fills
+// I_mem and D_mem in Verilator builds (I_mem.v's $readmemh is `ifndef VERILATOR).
+//
+// Two formats, chosen by extension:
+//   .bin  raw little-endian words (assembler/linker output: prog.bin,
+//         prog.data.bin), memory-mapped and copied with one memcpy
+//   other text, one hex word per line ($readmemh style: hand-written tests,
+//         instr.txt); lines that do not start with a hex digit are skipped
+//
+// Words past the destination size are dropped and reported by the caller.
+
+static_assert(__BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__,
+              ".bin images are little-endian and copied as-is");
+
+class ProgramImage {
+private:
+    void* map;
+    size_t map_bytes;
+    std::vector<uint32_t> parsed;
+    const uint32_t* data;
+    size_t count;
+
+    bool openBinary(const std::string& path) {
+        int fd = ::open(path.c_str(), O_RDONLY);
+        if (fd == -1) {
+            std::cerr << "Error: Could not open " << path << ": " << strerror(errno) << std::endl;
+            return false;
+        }
+        struct stat st;
+        if (fstat(fd, &st) == -1) {
+            std::cerr << "Error: Could not stat " << path << ": " << strerror(errno) << std::endl;
+            ::close(fd);
+            return false;
+        }
+        if (st.st_size % 4) {
+            std::cerr << "Warning: " << path << " is " << st.st_size
+                      << " bytes (not whole words); the last bytes are ignored" << std::endl;
+        }
+        count = st.st_size / 4;
+        if (count) {
+            map_bytes = st.st_size;
+            map = mmap(nullptr, map_bytes, PROT_READ, MAP_PRIVATE, fd, 0);
+            if (map == MAP_FAILED) {
+                std::cerr << "Error: mmap of " << path << " failed: " << strerror(errno) << std::endl;
+                ::close(fd);
+                count = 0;
+                return false;
+            }
+            data = static_cast<const uint32_t*>(map);
+        }
+        ::close(fd);   // The mapping stays valid
+        return true;
+    }
+
+    bool openHex(const std::string& path) {
+        std::ifstream file(path);
+        if (!file.is_open()) {
+            std::cerr << "Error: Could not open " << path << std::endl;
+            return false;
+        }
+        std::string line;
+        while (std::getline(file, line)) {
+            const char* s = line.c_str();
+            while (*s == ' ' || *s == '\t') s++;
+            if (!isxdigit(static_cast<unsigned char>(*s))) continue;
+            parsed.push_back(static_cast<uint32_t>(strtoul(s, nullptr, 16)));
+        }
+        data = parsed.data();
+        count = parsed.size();
+        return true;
+    }
+
+public:
+    ProgramImage() : map(MAP_FAILED), map_bytes(0), data(nullptr), count(0) {}
+
+    ~ProgramImage() {
+        if (map != MAP_FAILED) munmap(map, map_bytes);
+    }
+
+    ProgramImage(const ProgramImage&) = delete;
+    ProgramImage& operator=(const ProgramImage&) = delete;
+
+    static bool isBinary(const std::string& path) {
+        return path.size() >= 4 && path.compare(path.size() - 4, 4, ".bin") == 0;
+    }
+
+    bool open(const std::string& path) {
+        return isBinary(path) ? openBinary(path) : openHex(path);
+    }
+
+    size_t size() const { return count; }
+
+    // Copy the image into dst[0..capacity) and zero the rest. Returns words copied.
+    size_t copyTo(uint32_t* dst, size_t capacity) const {
+        size_t n = count < capacity ? count : capacity;
+        if (n) std::memcpy(dst, data, n * sizeof(uint32_t));
+        std::memset(dst + n, 0, (capacity - n) * sizeof(uint32_t));
+        return n;
+    }
+};
+
+// Load path into a memory of `capacity` words, with the usual messages.
+// Returns false if the file cannot be read.
+static inline bool load_memory_image(const std::string& path, uint32_t* dst, size_t capacity,
+                                     const char* name) {
+    ProgramImage image;
+    if (!image.open(path)) return false;
+    size_t words = image.copyTo(dst, capacity);
+    std::cout << "Loaded " << words << " " << name << " words from: " << path << std::endl;
+    if (image.size() > capacity) {
+        std::cerr << "Warning: " << (image.size() - capacity) << " words beyond " << name << " ("
+                  << capacity << " words) were not loaded" << std::endl;
+    }
+    return true;
+}
+
+#endif // PROGRAM_IMAGE_H
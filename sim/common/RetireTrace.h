@@ -0,0 +1,123 @@
+#ifndef RETIRE_TRACE_H
+#define RETIRE_TRACE_H
+
+#include <cerrno>
+#include <cstdint>
+#include <cstdio>
+#include <cstring>
+#include <string>
+#include <vector>
+#include <iostream>
+
+// Binary retire trace (+RETIRE_TRACE=<file>), read by tools/retire_trace.py.
+//
+// Layout (little-endian):
+//   [0..15]  header: magic "RVRT", version, record size, reserved
+//   [16..]   fixed-size records, one per cycle in which WB retired an
+//            instruction or the pipeline stalled/flushed
+//
+// Records are fixed-size so the reader can memory-map the file directly; the
+// cycle is stored as a delta to the previous record (cumsum to recover it).
+
+const char RETIRE_TRACE_MAGIC[4] = {'R', 'V', 'R', 'T'};
+const uint32_t RETIRE_TRACE_VERSION = 1;
+
+// Record flags
+const uint8_t RT_RETIRED = 1 << 0;   // Valid instruction in WB this cycle
+const uint8_t RT_STALL   = 1 << 1;   // Load-use stall (Forwarding Unit)
+const uint8_t RT_FLUSH   = 1 << 2;   // Control-flow flush
+const uint8_t RT_LOAD    = 1 << 3;   // mem_addr holds a load address
+const uint8_t RT_STORE   = 1 << 4;   // mem_addr holds a store address
+
+#pragma pack(push, 1)
+struct RetireTraceHeader {
+    char magic[4];
+    uint32_t version;
+    uint32_t record_size;
+    uint32_t reserved;
+};
+
+struct RetireRecord {
+    uint32_t cycle_delta;   // Cycles since the previous record (first: since cycle 0)
+    uint32_t pc;
+    uint32_t instr;
+    uint32_t rd_value;      // Value written to rd (valid when rd != 0)
+    uint32_t mem_addr;      // Load/store address (valid with RT_LOAD/RT_STORE)
+    uint8_t  rd;            // Destination register, 0 = no register write
+    uint8_t  flags;
+    uint16_t reserved;
+};
+#pragma pack(pop)
+
+static_assert(sizeof(RetireTraceHeader) == 16, "RetireTraceHeader must be 16 bytes");
+static_assert(sizeof(RetireRecord) == 24, "RetireRecord must be 24 bytes");
+
+class RetireTrace {
+private:
+    static const size_t BUFFER_RECORDS = 1 << 14;   // 384 KB per fwrite
+
+    FILE* file;
+    std::vector<RetireRecord> buffer;
+    uint64_t last_cycle;
+    uint64_t count;
+
+    void flush() {
+        if (file && !buffer.empty()) {
+            fwrite(buffer.data(), sizeof(RetireRecord), buffer.size(), file);
+            buffer.clear();
+        }
+    }
+
+public:
+    RetireTrace() : file(nullptr), last_cycle(0), count(0) {}
+
+    ~RetireTrace() {
+        close();
+    }
+
+    bool open(const std::string& path) {
+        file = fopen(path.c_str(), "wb");
+        if (!file) {
+            std::cerr << "RetireTrace: could not open " << path << ": " << strerror(errno) << std::endl;
+            return false;
+        }
+        RetireTraceHeader header;
+        memcpy(header.magic, RETIRE_TRACE_MAGIC, sizeof(header.magic));
+        header.version = RETIRE_TRACE_VERSION;
+        header.record_size = sizeof(RetireRecord);
+        header.reserved = 0;
+        fwrite(&header, sizeof(header), 1, file);
+        buffer.reserve(BUFFER_RECORDS);
+        return true;
+    }
+
+    bool isOpen() const { return file != nullptr; }
+
+    uint64_t records() const { return count; }
+
+    void record(uint64_t cycle, uint32_t pc, uint32_t instr, uint8_t rd,
+                uint32_t rd_value, uint32_t mem_addr, uint8_t flags) {
+        RetireRecord r;
+        r.cycle_delta = static_cast<uint32_t>(cycle - last_cycle);
+        r.pc = pc;
+        r.instr = instr;
+        r.rd_value = rd_value;
+        r.mem_addr = mem_addr;
+        r.rd = rd;
+        r.flags = flags;
+        r.reserved = 0;
+        buffer.push_back(r);
+        last_cycle = cycle;
+        count++;
+        if (buffer.size() == BUFFER_RECORDS) flush();
+    }
+
+    void close() {
+        if (!file) return;
+        flush();
+        fclose(file);
+        file = nullptr;
+    }
+};
+
+#endif // RETIRE_TRACE_H
@@ -0,0 +1,83 @@
+#ifndef WATCHDOG_H
+#define WATCHDOG_H
+
+#include <cstdint>
+#include <cstdio>
+#include <string>
+
+// Hang detection for the simulation harnesses (sim_headless, sim_lib).
+//
+// Fed once per clock cycle with the WB stage (rt_valid / rt_pc), it flags:
+//   - a self-loop: the same PC retires SELF_LOOP_RETIRES times in a row
+//     (e.g. `j .` or `beq x0, x0, 0`; nothing but that instruction can run)
+//   - no instruction retiring for idle_limit cycles (a wedged pipeline)
+// Both checks are a compare and a counter per cycle, so they stay on by default.
+
+// Exit code of sim_headless when the watchdog stops a run (runner.py: HANG)
+const int EXIT_HANG = 3;
+// Exit code of sim_headless when +MAX_CYCLES is reached before EBREAK/ECALL
+// (runner.py: TIMEOUT)
+const int EXIT_TIMEOUT = 4;
+
+enum HangReason {
+    HANG_NONE = 0,
+    HANG_SELF_LOOP = 1,
+    HANG_NO_RETIRE = 2,
+};
+
+class Watchdog {
+private:
+    static const uint32_t SELF_LOOP_RETIRES = 16;
+
+    uint64_t idle_limit;   // 0 disables the watchdog
+    uint64_t idle;         // Cycles since the last retirement
+    uint32_t repeats;      // Consecutive retirements of last_pc
+    uint32_t last_pc;
+    HangReason hang;
+
+public:
+    static const uint64_t DEFAULT_IDLE_LIMIT = 10000;
+
+    explicit Watchdog(uint64_t limit = DEFAULT_IDLE_LIMIT) : idle_limit(limit) { reset(); }
+
+    void reset() {
+        idle = 0;
+        repeats = 0;
+        last_pc = 0;
+        hang = HANG_NONE;
+    }
+
+    void setIdleLimit(uint64_t limit) { idle_limit = limit; }
+
+    // Account one cycle. Returns true once a hang has been detected.
+    bool cycle(bool retired, uint32_t pc) {
+        if (!idle_limit || hang) return hang != HANG_NONE;
+        if (!retired) {
+            if (++idle >= idle_limit) hang = HANG_NO_RETIRE;
+            return hang != HANG_NONE;
+        }
+        idle = 0;
+        repeats = (pc == last_pc) ? repeats + 1 : 1;
+        last_pc = pc;
+        if (repeats >= SELF_LOOP_RETIRES) hang = HANG_SELF_LOOP;
+        return hang != HANG_NONE;
+    }
+
+    HangReason reason() const { return hang; }
+    uint32_t pc() const { return last_pc; }
+
+    std::string describe() const {
+        char buf[96];
+        if (hang == HANG_SELF_LOOP) {
+            snprintf(buf, sizeof(buf), "PC 0x%08x branches to itself", last_pc);
+        } else if (hang == HANG_NO_RETIRE) {
+            snprintf(buf, sizeof(buf), "no instruction retired for %llu cycles (last PC 0x%08x)",
+                     (unsigned long long)idle, last_pc);
+        } else {
+            return "running";
+        }
+        return buf;
+    }
+};
+
+#endif // WATCHDOG_H
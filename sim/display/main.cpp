@@ -26,8 +26,10 @@ int main(int argc, char* argv[]) {
                                              SDL_TEXTUREACCESS_STREAMING,
                                              VRAM_WIDTH, VRAM_HEIGHT);
 
-    // 2. Connect to Shared Memory
-    SharedMemory shm(SHM_NAME, SHM_TOTAL_SIZE);
+    // 2. Connect to Shared Memory (optional argv[1] matches the simulator's +SHM_NAME=)
+    std::string shm_name = (argc > 1) ? argv[1] : SHM_NAME;
+    if (shm_name[0] != '/') shm_name = "/" + shm_name;
+    SharedMemory shm(shm_name, SHM_TOTAL_SIZE);
     std::cout << "Waiting for simulator to start..." << std::endl;
 
     // Retry loop until shared memory is available
@@ -12,13 +12,21 @@
 #include <iostream>
 #include <iomanip>
 #include <fstream>
-#include <vector>
+#include <cctype>
+#include <cerrno>
+#include <cstdlib>
 #include "common/VramDefines.h"
 #include "common/SharedMemory.h"
+#include "common/RetireTrace.h"
+#include "common/ProgramImage.h"
+#include "common/Watchdog.h"
 
 // Constants
-// Simulation time limit (in time units, 1 cycle = 10 time units)
-const unsigned long long MAX_CYCLES = 10000000;  // 1M cycles - safety timeout (adaptive stop via $finish)
+const uint64_t DEFAULT_MAX_CYCLES = 1000000;     // Safety timeout in clock cycles (+MAX_CYCLES; adaptive stop via $finish)
+const vluint64_t HALF_PERIOD = 5;                // clk toggles every 5 time units (1 cycle = 10 time units)
+const uint64_t SPEED_SAMPLE_STEPS = 1 << 16;     // Loop iterations between wall-clock samples (power of 2)
+const uint32_t IMEM_WORDS = 2048;                // I_mem depth (I_mem.v)
+const uint32_t DMEM_WORDS = 512;                 // D_mem depth (D_mem.v)
 vluint64_t main_time = 0;
 
 double sc_time_stamp() {
@@ -33,6 +41,35 @@ void signal_handler(int signum) {
     stop_simulation = true;
 }
 
+// Append one retire-trace record for the current cycle (no-op when WB is idle)
+static void record_retire(VSoC* top, RetireTrace& trace, uint64_t cycle) {
+    auto* core = top->rootp->SoC->core_inst;
+    uint8_t flags = 0;
+    if (core->rt_valid) flags |= RT_RETIRED;
+    if (core->rt_stall) flags |= RT_STALL;
+    if (core->rt_flush) flags |= RT_FLUSH;
+    if (!flags) return;
+    if (core->rt_opcode == 0x03) flags |= RT_LOAD;
+    if (core->rt_opcode == 0x23) flags |= RT_STORE;
+
+    // The WB stage carries no instruction word; I_mem is read-only, so look it up by PC
+    uint32_t pc = core->rt_pc;
+    uint32_t instr = core->I_mem->Imem[(pc >> 2) % IMEM_WORDS];
+    trace.record(cycle, pc, instr, core->rt_rd, core->rt_rd_data, core->rt_mem_addr, flags);
+}
+
+// Parse a cycle-count plusarg value (decimal). False on anything but a whole
+// non-negative number that fits in 64 bits.
+static bool parse_cycles(const std::string& text, uint64_t& value) {
+    if (text.empty() || !isdigit(static_cast<unsigned char>(text[0]))) return false;
+    char* end = nullptr;
+    errno = 0;
+    unsigned long long parsed = strtoull(text.c_str(), &end, 10);
+    if (errno == ERANGE || *end != '\0') return false;
+    value = parsed;
+    return true;
+}
+
 // DPI Setup Function from sim_vram_dpi.cpp
 extern "C" void setup_dpi_vram(uint32_t* vram, volatile uint32_t* refresh);
 
@@ -40,9 +77,17 @@ int main(int argc, char** argv) {
     // 1. Argument Parsing
     std::string test_file = "";
     std::string vcd_file = "trace.vcd";  // Default VCD filename
+    std::string out_dir = "";            // +OUTDIR: per-run directory for all output files
+    std::string shm_name = SHM_NAME;     // +SHM_NAME: per-run shared memory segment
+    std::string retire_file = "";        // +RETIRE_TRACE: binary retire trace output
+    std::string data_file = "";          // +DATAFILE: .data image preloaded into D_mem
+    bool vcd_given = false;
     bool dump_enabled = false;
     bool trace_enabled = false;
     bool interactive_mode = false;
+    bool fine_step = false;
+    uint64_t max_cycles = DEFAULT_MAX_CYCLES;                  // +MAX_CYCLES: cycle budget
+    uint64_t watchdog_cycles = Watchdog::DEFAULT_IDLE_LIMIT;   // +WATCHDOG: idle cycles before HANG, 0 = off
 
     for (int i = 1; i < argc; i++) {
         std::string arg = argv[i];
@@ -50,13 +95,38 @@ int main(int argc, char** argv) {
             test_file = arg.substr(10);
         } else if (arg.find("+VCD=") == 0) {
             vcd_file = arg.substr(5);
+            vcd_given = true;
             trace_enabled = true;  // Auto-enable trace if VCD path given
+        } else if (arg.find("+OUTDIR=") == 0) {
+            out_dir = arg.substr(8);
+        } else if (arg.find("+SHM_NAME=") == 0) {
+            shm_name = arg.substr(10);
+            // POSIX shared memory names must start with a single '/'
+            if (shm_name.empty() || shm_name[0] != '/') shm_name = "/" + shm_name;
+        } else if (arg.find("+RETIRE_TRACE=") == 0) {
+            retire_file = arg.substr(14);
+        } else if (arg.find("+DATAFILE=") == 0) {
+            data_file = arg.substr(10);
+        } else if (arg.find("+MAX_CYCLES=") == 0) {
+            if (!parse_cycles(arg.substr(12), max_cycles) || max_cycles == 0) {
+                std::cerr << "Error: +MAX_CYCLES needs a cycle count of at least 1 (got '"
+                          << arg.substr(12) << "')" << std::endl;
+                return 1;
+            }
+        } else if (arg.find("+WATCHDOG=") == 0) {
+            if (!parse_cycles(arg.substr(10), watchdog_cycles)) {
+                std::cerr << "Error: +WATCHDOG needs a cycle count, or 0 to turn it off (got '"
+                          << arg.substr(10) << "')" << std::endl;
+                return 1;
+            }
         } else if (arg == "+DUMP") {
             dump_enabled = true;
         } else if (arg == "+TRACE") {
             trace_enabled = true;
         } else if (arg == "+INTERACTIVE") {
             interactive_mode = true;
+        } else if (arg == "+FINE_STEP") {
+            fine_step = true;
         }
     }
     
@@ -72,14 +142,22 @@ int main(int argc, char** argv) {
         return 1;
     }
 
+    // Output paths: everything goes to +OUTDIR when given, legacy locations otherwise.
+    // The RTL perf dump reads the same plusarg (default: logs/).
+    Verilated::mkdir(out_dir.empty() ? "logs" : out_dir.c_str());
+    auto out_path = [&](const std::string& name, const std::string& legacy) {
+        return out_dir.empty() ? legacy : out_dir + "/" + name;
+    };
+    if (!vcd_given) vcd_file = out_path("trace.vcd", vcd_file);
+
     std::cout << "Starting Headless Simulation... (Waveform: " << (trace_enabled ? "ON" : "OFF") << ")" << std::endl;
 
     // 2. Initialize Shared Memory
-    SharedMemory shm_vram(SHM_NAME, SHM_TOTAL_SIZE);
+    SharedMemory shm_vram(shm_name, SHM_TOTAL_SIZE);
     if (!shm_vram.create()) {
         std::cerr << "Failed to create Shared Memory! Running without display output." << std::endl;
     } else {
-        std::cout << "Shared Memory VRAM created." << std::endl;
+        std::cout << "Shared Memory VRAM created: " << shm_name << std::endl;
     }
 
     uint32_t* vram_buffer = nullptr;
@@ -121,6 +199,13 @@ int main(int argc, char** argv) {
     }
 
     // 4. Trace Setup
+#if !VM_TRACE
+    if (trace_enabled) {
+        std::cerr << "[SIM] Warning: this binary was built without --trace; "
+                  << "use sim_headless_trace for VCD output." << std::endl;
+        trace_enabled = false;
+    }
+#endif
 #if VM_TRACE
     VerilatedVcdC* tfp = nullptr;
     if (trace_enabled) {
@@ -131,24 +216,23 @@ int main(int argc, char** argv) {
     }
 #endif
 
-    // 5. Load Memory
-    std::cout << "Loading I_mem from: " << test_file << std::endl;
-    std::ifstream file(test_file);
-    if (!file.is_open()) {
-        std::cerr << "Error: Could not open hex file" << std::endl;
+    // Binary retire trace (much cheaper than a VCD; works in every build)
+    RetireTrace retire_trace;
+    if (!retire_file.empty() && retire_trace.open(retire_file)) {
+        std::cout << "[SIM] Retire trace enabled: " << retire_file << std::endl;
+    }
+
+    // 5. Load Memory (.bin images are mmap'd; see common/ProgramImage.h)
+    auto* core = top->rootp->SoC->core_inst;
+    if (!load_memory_image(test_file, &core->I_mem->Imem[0], IMEM_WORDS, "I_mem")) {
         return 1;
     }
-    
-    std::string line;
-    int addr = 0;
-    while (std::getline(file, line) && addr < 1024) { 
-        try {
-            uint32_t instr = std::stoul(line, nullptr, 16);
-            top->rootp->SoC->core_inst->I_mem->Imem[addr] = instr;
-            addr++;
-        } catch (...) {}
+
+    // Preload D_mem with the program's .data image (before reset, so setup
+    // code does not have to build input data with stores)
+    if (!data_file.empty() && !load_memory_image(data_file, &core->D_mem->Memory[0], DMEM_WORDS, "D_mem")) {
+        return 1;
     }
-    file.close();
 
     // 6. Simulation Loop
     top->clk = 0;
@@ -156,15 +240,37 @@ int main(int argc, char** argv) {
 
     bool finished = false;
 
+    // Stepping: by default the model is evaluated only on clock edges (every
+    // HALF_PERIOD time units). Nothing changes between edges, so results are
+    // cycle-identical to evaluating every time unit (+FINE_STEP), which only
+    // matters if you want the reset release at its exact time in the VCD.
+    const vluint64_t step = fine_step ? 1 : HALF_PERIOD;
+    uint64_t steps = 0;
+
+    // Speed reporting state (wall clock sampled every SPEED_SAMPLE_STEPS steps)
+    auto last_time = std::chrono::steady_clock::now();
+    uint64_t last_cycles = 0;
+    int frames = 0;
+
+    // Hang detection: a self-looping PC or no retirement for watchdog_cycles
+    // ends the run at once with EXIT_HANG instead of burning the cycle budget
+    Watchdog watchdog(interactive_mode ? 0 : watchdog_cycles);
+    const vluint64_t max_time = max_cycles * 2 * HALF_PERIOD;
+    bool timed_out = false;   // MAX_CYCLES reached before EBREAK/ECALL: EXIT_TIMEOUT
+
     // Condition: 
     // If interactive: stop only on SIGINT or finish
-    // If not interactive: stop on MAX_CYCLES or finish
+    // If not interactive: stop on MAX_CYCLES, finish or a hang
     while (!Verilated::gotFinish() && !finished && !stop_simulation) {
-        if (!interactive_mode && main_time >= MAX_CYCLES) break;
+        if (!interactive_mode && main_time >= max_time) {
+            std::cout << "[SIM] Stopped at MAX_CYCLES (" << max_cycles << " cycles)" << std::endl;
+            timed_out = true;
+            break;
+        }
 
         if (main_time > 10) top->rst = 0; 
         
-        if ((main_time % 5) == 0) top->clk = !top->clk; 
+        if ((main_time % HALF_PERIOD) == 0) top->clk = !top->clk; 
 
         top->eval();
 
@@ -172,29 +278,24 @@ int main(int argc, char** argv) {
         if (trace_enabled) tfp->dump(main_time);
 #endif
 
-        // --- VRAM Update Logic using Shared Memory ---
+        // Sample the WB stage once per cycle, right after the rising edge
+        if (top->clk && !top->rst && (main_time % HALF_PERIOD) == 0) {
+            if (retire_trace.isOpen()) record_retire(top, retire_trace, main_time / (2 * HALF_PERIOD));
+            auto* core = top->rootp->SoC->core_inst;
+            if (watchdog.cycle(core->rt_valid, core->rt_pc)) break;
+        }
+
         // --- VRAM Update Logic (Legacy Copy Removed) ---
         // DPI-C handles writes instantly. We just clear the Verilog flag if set.
-        bool new_frame = false;
         if (top->rootp->SoC->video_mem_inst->refresh_frame == 1) {
              top->rootp->SoC->video_mem_inst->refresh_frame = 0;
-             new_frame = true;
+             frames++;
         }
         
-        main_time++;
+        main_time += step;
 
         // --- Performance Reporting ---
-        static auto last_time = std::chrono::steady_clock::now();
-        static uint64_t last_cycles = 0;
-        static int frames = 0;
-        static uint64_t total_cycles_per_sec = 0;
-        static uint64_t frame_count_per_sec = 0;
-
-        if (new_frame) {
-            frames++;
-            // Calculate cycles since last frame for statistics? 
-            // Better to just average over a second.
-        }
+        if ((++steps & (SPEED_SAMPLE_STEPS - 1)) != 0) continue;
 
         auto now = std::chrono::steady_clock::now();
         if (std::chrono::duration_cast<std::chrono::seconds>(now - last_time).count() >= 1) {
@@ -217,7 +318,7 @@ int main(int argc, char** argv) {
 
     if (dump_enabled) {
         // ... (Register dump logic - kept same)
-        std::ofstream dmem_file("dmem_dump.txt");
+        std::ofstream dmem_file(out_path("dmem_dump.txt", "dmem_dump.txt"));
          if (dmem_file.is_open()) {
              for (int addr = 0; addr < 2048; addr += 4) {
                   uint32_t word_addr = addr >> 2;
@@ -235,15 +336,29 @@ int main(int argc, char** argv) {
     }
 #endif
 
+    if (retire_trace.isOpen()) {
+        retire_trace.close();
+        std::cout << "[SIM] Retire trace: " << retire_trace.records() << " records" << std::endl;
+    }
+
 #if VM_COVERAGE
-    Verilated::mkdir("logs");
-    VerilatedCov::write("logs/coverage.dat");
+    VerilatedCov::write(out_path("coverage.dat", "logs/coverage.dat").c_str());
 #endif
 
     top->final();
-    std::cout << "Simulation PASSED" << std::endl;
     delete top;
     // shm destructor closes shared memory automatically
 
+    if (watchdog.reason() != HANG_NONE) {
+        std::cout << "[SIM] HANG at cycle " << main_time / (2 * HALF_PERIOD) << ": "
+                  << watchdog.describe() << std::endl;
+        std::cout << "Simulation HANG" << std::endl;
+        return EXIT_HANG;
+    }
+    if (timed_out) {
+        std::cout << "Simulation TIMEOUT" << std::endl;
+        return EXIT_TIMEOUT;
+    }
+    std::cout << "Simulation PASSED" << std::endl;
     return 0;
 }
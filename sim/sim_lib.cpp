@@ -0,0 +1,219 @@
+// In-process embedding API for the verilated SoC.
+//
+// Built as a shared library (make pylib -> librv32i_sim.so) and driven from
+// Python through tools/soc_model.py (ctypes). One model is constructed once and
+// reused across programs: load_program + reset replace a full process launch,
+// so test suites skip the per-test startup and hex parsing cost.
+//
+// Timing matches sim_headless: two reset cycles, then one posedge/negedge pair
+// per step. Register/memory/perf state is read straight from public signals.
+// The same watchdog as sim_headless stops a run that hangs (rv32i_hang).
+#include <verilated.h>
+#include "VSoC.h"
+#include "VSoC___024root.h"
+#include "VSoC_SoC.h"
+#include "VSoC_Core.h"
+#include "VSoC_I_mem.h"
+#include "VSoC_D_mem.h"
+#include "VSoC_RF.h"
+#include "VSoC_Performance_Monitor.h"
+#include "VSoC_Video_Mem.h"
+
+#include <cstdint>
+#include <cstdio>
+#include <iostream>
+#include <vector>
+#include "common/Watchdog.h"
+
+// Memory geometry (must match I_mem.v / D_mem.v)
+const uint32_t IMEM_WORDS = 2048;
+const uint32_t DMEM_WORDS = 512;
+const uint32_t NUM_REGS = 32;
+const uint32_t RESET_CYCLES = 2;   // sim_headless holds rst for the posedges at t=0 and t=10
+
+// Counter order matches perf_counters.txt (see Performance_Monitor.save_metrics)
+const uint32_t NUM_PERF_COUNTERS = 16;
+
+static vluint64_t main_time = 0;
+
+double sc_time_stamp() {
+    return main_time;
+}
+
+// DPI Setup Function from sim_vram_dpi.cpp (VRAM writes are dropped in-process)
+extern "C" void setup_dpi_vram(uint32_t* vram, volatile uint32_t* refresh);
+
+struct SimHandle {
+    VSoC* top;
+    uint64_t cycles;              // Cycles run since the last reset (excluding reset cycles)
+    std::vector<uint32_t> data;   // .data image copied into D_mem on every reset
+    Watchdog watchdog;            // Hang detection, re-armed on every reset
+};
+
+static void tick(VSoC* top) {
+    top->clk = 1;
+    top->eval();
+    main_time += 5;
+    top->clk = 0;
+    top->eval();
+    main_time += 5;
+
+    // Nobody consumes frames here; just acknowledge the refresh request
+    if (top->rootp->SoC->video_mem_inst->refresh_frame == 1) {
+        top->rootp->SoC->video_mem_inst->refresh_frame = 0;
+    }
+}
+
+static bool finished(VSoC* top) {
+    return Verilated::gotFinish() || top->program_finished;
+}
+
+static bool hung(SimHandle* h) {
+    return h->watchdog.reason() != HANG_NONE;
+}
+
+extern "C" {
+
+// Create the model. argv holds plusargs (e.g. "+OUTDIR=build/runs/x"), which are
+// only read by the RTL initial blocks, i.e. once per process.
+void* rv32i_create(int argc, const char** argv) {
+    Verilated::commandArgs(argc, argv);
+    setup_dpi_vram(nullptr, nullptr);
+
+    SimHandle* h = new SimHandle;
+    h->top = new VSoC;
+    h->cycles = 0;
+    h->top->clk = 0;
+    h->top->rst = 1;
+    h->top->perf_enable = 0;
+    return h;
+}
+
+void rv32i_destroy(void* handle) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    if (!h) return;
+    h->top->final();
+    delete h->top;
+    delete h;
+}
+
+// Copy a program into I_mem; the rest of I_mem is cleared. Returns words loaded.
+uint32_t rv32i_load_program(void* handle, const uint32_t* words, uint32_t count) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    if (count > IMEM_WORDS) count = IMEM_WORDS;
+    auto& imem = h->top->rootp->SoC->core_inst->I_mem->Imem;
+    for (uint32_t i = 0; i < IMEM_WORDS; i++) {
+        imem[i] = (i < count) ? words[i] : 0;
+    }
+    return count;
+}
+
+// Set the .data image (like +DATAFILE) that rv32i_reset preloads into D_mem.
+// count = 0 clears it. Returns words kept (at most the D_mem size).
+uint32_t rv32i_load_data(void* handle, const uint32_t* words, uint32_t count) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    if (count > DMEM_WORDS) count = DMEM_WORDS;
+    h->data.assign(words, words + count);
+    return count;
+}
+
+// Clear architectural state, preload the .data image and run the reset
+// sequence. Leaves the model ready to execute the loaded program from PC 0.
+void rv32i_reset(void* handle, int perf_enable) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    VSoC* top = h->top;
+
+    auto& dmem = top->rootp->SoC->core_inst->D_mem->Memory;
+    for (uint32_t i = 0; i < DMEM_WORDS; i++) dmem[i] = (i < h->data.size()) ? h->data[i] : 0;
+    auto& rf = top->rootp->SoC->core_inst->regFile->rf;
+    for (uint32_t i = 0; i < NUM_REGS; i++) rf[i] = 0;
+
+    Verilated::gotFinish(false);
+    top->perf_enable = perf_enable ? 1 : 0;
+    top->rst = 1;
+    for (uint32_t i = 0; i < RESET_CYCLES; i++) tick(top);
+    top->rst = 0;
+    top->eval();
+    h->cycles = 0;
+    h->watchdog.reset();
+}
+
+// Run up to `cycles` clock cycles, stopping early when the program finishes
+// (ebreak/ecall) or hangs. Returns the number of cycles actually run.
+uint64_t rv32i_step(void* handle, uint64_t cycles) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    VSoC* top = h->top;
+    auto* core = top->rootp->SoC->core_inst;
+    uint64_t n = 0;
+    while (n < cycles && !finished(top) && !hung(h)) {
+        tick(top);
+        h->watchdog.cycle(core->rt_valid, core->rt_pc);
+        n++;
+    }
+    h->cycles += n;
+    return n;
+}
+
+int rv32i_finished(void* handle) {
+    return finished(static_cast<SimHandle*>(handle)->top) ? 1 : 0;
+}
+
+uint64_t rv32i_cycles(void* handle) {
+    return static_cast<SimHandle*>(handle)->cycles;
+}
+
+// Idle cycles without a retirement before the watchdog reports a hang (0 = off)
+void rv32i_set_watchdog(void* handle, uint64_t idle_cycles) {
+    static_cast<SimHandle*>(handle)->watchdog.setIdleLimit(idle_cycles);
+}
+
+// Why the last run stopped early: HANG_NONE (0), HANG_SELF_LOOP (1) or
+// HANG_NO_RETIRE (2). *pc receives the last retired PC.
+int rv32i_hang(void* handle, uint32_t* pc) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    if (pc) *pc = h->watchdog.pc();
+    return h->watchdog.reason();
+}
+
+// out must hold 32 words (x0..x31)
+void rv32i_read_regs(void* handle, uint32_t* out) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    auto& rf = h->top->rootp->SoC->core_inst->regFile->rf;
+    for (uint32_t i = 0; i < NUM_REGS; i++) out[i] = rf[i];
+}
+
+// Copy up to `count` words of D_mem starting at word 0. Returns words copied.
+uint32_t rv32i_read_dmem(void* handle, uint32_t* out, uint32_t count) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    if (count > DMEM_WORDS) count = DMEM_WORDS;
+    auto& dmem = h->top->rootp->SoC->core_inst->D_mem->Memory;
+    for (uint32_t i = 0; i < count; i++) out[i] = dmem[i];
+    return count;
+}
+
+// Raw counter values in perf_counters.txt order (cycles NOT adjusted).
+// out must hold 16 words. Returns the number of counters written.
+uint32_t rv32i_read_perf(void* handle, uint32_t* out) {
+    SimHandle* h = static_cast<SimHandle*>(handle);
+    auto* pm = h->top->rootp->SoC->core_inst->perf_monitor;
+    const uint32_t values[NUM_PERF_COUNTERS] = {
+        pm->cycle_count, pm->instruction_count, pm->stall_count, pm->bubble_count,
+        pm->flush_count, pm->forward_count, pm->raw_hazard_count,
+        pm->cond_branch_count, pm->uncond_branch_count,
+        pm->alu_r_count, pm->alu_i_count, pm->load_count, pm->store_count,
+        pm->branch_count, pm->jump_count, pm->system_count,
+    };
+    for (uint32_t i = 0; i < NUM_PERF_COUNTERS; i++) out[i] = values[i];
+    return NUM_PERF_COUNTERS;
+}
+
+// Flush the model's stdout/stderr so a caller capturing the file descriptors
+// sees everything printed so far ($display, [CORE] messages, ...).
+void rv32i_flush() {
+    std::cout.flush();
+    std::cerr.flush();
+    fflush(stdout);
+    fflush(stderr);
+}
+
+}
@@ -3,15 +3,21 @@
 #include "VSoC.h"
 #include "VSoC___024root.h"
 #include "VSoC_SoC.h"
+#include "VSoC_Core.h"
+#include "VSoC_I_mem.h"
+#include "VSoC_D_mem.h"
 #include "VSoC_Video_Mem.h"
 #include <SDL2/SDL.h>
 #include <iostream>
 #include <fstream>
+#include "common/ProgramImage.h"
 
 // Constants
 const int WIDTH = 320;
 const int HEIGHT = 240;
 const int SCALE = 2; // Window scaling
+const uint32_t IMEM_WORDS = 2048;   // I_mem depth (I_mem.v)
+const uint32_t DMEM_WORDS = 512;    // D_mem depth (D_mem.v)
 
 // Global Simulation Time
 vluint64_t main_time = 0;
@@ -31,6 +37,18 @@ int main(int argc, char** argv) {
     // 2. Initialize Model
     VSoC* top = new VSoC;
 
+    // Load the program (+TESTFILE) and its .data image (+DATAFILE) like sim_headless
+    std::string test_file = "src/memory/instructions/instr.txt";
+    std::string data_file = "";
+    for (int i = 1; i < argc; i++) {
+        std::string arg = argv[i];
+        if (arg.find("+TESTFILE=") == 0) test_file = arg.substr(10);
+        else if (arg.find("+DATAFILE=") == 0) data_file = arg.substr(10);
+    }
+    auto* core = top->rootp->SoC->core_inst;
+    if (!load_memory_image(test_file, &core->I_mem->Imem[0], IMEM_WORDS, "I_mem")) return 1;
+    if (!data_file.empty() && !load_memory_image(data_file, &core->D_mem->Memory[0], DMEM_WORDS, "D_mem")) return 1;
+
     // VRAM Buffer for DPI
     uint32_t* vram_buffer = new uint32_t[WIDTH * HEIGHT];
     // Clear VRAM
@@ -81,8 +99,6 @@ int main(int argc, char** argv) {
     bool quit = false;
     SDL_Event e;
     
-    // Load Application Hex (handled by Verilog $readmemh in I_mem typically)
-    
     // Check for +PERF_ENABLE plusarg
     bool perf_enabled = false;
     for (int i = 1; i < argc; i++) {
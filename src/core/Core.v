@@ -288,6 +288,18 @@ module Core (clk, rst, perf_enable, program_finished, video_addr, video_data, vi
 	wire pipeline_flush = flush;
 	
 	
+	// === Retire Tap ===
+	// Sampled by the C++ harness after every rising edge for +RETIRE_TRACE:
+	// the instruction currently in WB plus this cycle's stall/flush state.
+	wire        rt_valid    /*verilator public*/ = valid_WB;
+	wire [31:0] rt_pc       /*verilator public*/ = PC_WB;
+	wire [4:0]  rt_rd       /*verilator public*/ = we_reg_WB ? rd_WB : 5'd0;
+	wire [31:0] rt_rd_data  /*verilator public*/ = RF_in;
+	wire [31:0] rt_mem_addr /*verilator public*/ = ALU_out_WB;
+	wire [6:0]  rt_opcode   /*verilator public*/ = opcode_WB;
+	wire        rt_stall    /*verilator public*/ = stall_FU;
+	wire        rt_flush    /*verilator public*/ = flush;
+
 	// === Program Finish Detection ===
 	// Detect EBREAK (0x00100073) or ECALL (0x00000073) at WB stage
 	// RISC-V SYSTEM opcode: 7'b1110011
@@ -32,25 +32,37 @@ module Performance_Monitor (
     input wire [6:0] opcode_wb
 );
 
-    // Performance Counters
-    reg [31:0] cycle_count;
-    reg [31:0] instruction_count;
-    reg [31:0] stall_count;
-    reg [31:0] bubble_count;
-    reg [31:0] flush_count;
-    reg [31:0] forward_count;
-    reg [31:0] raw_hazard_count;
-    reg [31:0] cond_branch_count;
-    reg [31:0] uncond_branch_count;
+    // Performance Counters (public so the embedding API can read them live)
+    reg [31:0] cycle_count /*verilator public*/;
+    reg [31:0] instruction_count /*verilator public*/;
+    reg [31:0] stall_count /*verilator public*/;
+    reg [31:0] bubble_count /*verilator public*/;
+    reg [31:0] flush_count /*verilator public*/;
+    reg [31:0] forward_count /*verilator public*/;
+    reg [31:0] raw_hazard_count /*verilator public*/;
+    reg [31:0] cond_branch_count /*verilator public*/;
+    reg [31:0] uncond_branch_count /*verilator public*/;
     
     // NEW: Instruction mix counters
-    reg [31:0] alu_r_count;
-    reg [31:0] alu_i_count;
-    reg [31:0] load_count;
-    reg [31:0] store_count;
-    reg [31:0] branch_count;
-    reg [31:0] jump_count;
-    reg [31:0] system_count;
+    reg [31:0] alu_r_count /*verilator public*/;
+    reg [31:0] alu_i_count /*verilator public*/;
+    reg [31:0] load_count /*verilator public*/;
+    reg [31:0] store_count /*verilator public*/;
+    reg [31:0] branch_count /*verilator public*/;
+    reg [31:0] jump_count /*verilator public*/;
+    reg [31:0] system_count /*verilator public*/;
+    
+    // Output location for perf_counters.txt (overridable with +OUTDIR=<dir>)
+    // Lets several simulations share a host without clobbering each other's results.
+    // Path strings hold up to 1024 characters (runner.py passes absolute run directories)
+    reg [8*1024-1:0] out_dir;
+    reg [8*1024-1:0] perf_path;
+    
+    initial begin
+        if (!$value$plusargs("OUTDIR=%s", out_dir))
+            out_dir = "logs";
+        $sformat(perf_path, "%0s/perf_counters.txt", out_dir);
+    end
     
     // ============================================
     // INSTRUCTION CLASSIFICATION
@@ -129,7 +141,7 @@ module Performance_Monitor (
                 /* verilator lint_off BLKSEQ */
                 adjusted_cycles = (cycle_count > 10) ? (cycle_count - 10) : cycle_count;
                 
-                f = $fopen("logs/perf_counters.txt", "w"); // Blocking OK for system tasks
+                f = $fopen(perf_path, "w"); // Blocking OK for system tasks
                 /* verilator lint_on BLKSEQ */
                 if (f) begin
                     $fwrite(f, "cycles=%0d\n", adjusted_cycles);
@@ -149,9 +161,9 @@ module Performance_Monitor (
                     $fwrite(f, "jump=%0d\n", jump_count);
                     $fwrite(f, "system=%0d\n", system_count);
                     $fclose(f);
-                    $display("[PERF] Metrics saved to logs/perf_counters.txt");
+                    $display("[PERF] Metrics saved to %0s", perf_path);
                 end else begin
-                    $display("[PERF] ERROR: Could not open logs/perf_counters.txt");
+                    $display("[PERF] ERROR: Could not open %0s", perf_path);
                 end
             end
         end
@@ -12,7 +12,11 @@ output reg nop_out;
 reg[31:0]Imem[0:2047] /*verilator public*/;
 
 //The I-Memory is initially loaded
-    reg [1023:0] test_file_path;
+// Skipped when verilated: the C++ harness copies the +TESTFILE image in
+// before reset (sim/common/ProgramImage.h), so the program is read only once.
+// Other flows (tb/tb.v, iverilog, vendor simulators) load it here.
+`ifndef VERILATOR
+    reg [8*1024-1:0] test_file_path;
 initial begin
     if ($value$plusargs("TESTFILE=%s", test_file_path)) begin
         $display("Loading I_mem from: %0s", test_file_path);
@@ -22,6 +26,7 @@ initial begin
         $readmemh("src/memory/instructions/instr.txt", Imem);
     end
 end
+`endif
 
 // Combinational Address Decoding
     wire [29:0] word_idx = address[31:2]; // Use 30 bits for index to match log
@@ -4,25 +4,27 @@
 # Measures: Load-use hazards, ALU forwarding, memory throughput
 #
 # PARAMETRIC CONFIGURATION:
-# To change array size, modify BOTH sections below:
+# To change array size, modify ARRAY_SIZE and TOTAL_ELEMENTS below.
+# .data lives in D_mem (512 words), so result + array must fit:
 #
-# 64×64   (4096):    ARRAY_SIZE=64,  TOTAL_ELEMENTS=4096,  lui x12/x22=1
-# 128×128 (16384):   ARRAY_SIZE=128, TOTAL_ELEMENTS=16384, lui x12/x22=4
-# 256×256 (65536):   ARRAY_SIZE=256, TOTAL_ELEMENTS=65536, lui x12/x22=16
+# 8×8   (64):    ARRAY_SIZE=8,  TOTAL_ELEMENTS=64
+# 16×16 (256):   ARRAY_SIZE=16, TOTAL_ELEMENTS=256   ← DEFAULT
+# 22×22 (484):   ARRAY_SIZE=22, TOTAL_ELEMENTS=484   (largest that fits)
 #
-# Expected sum formulas:
-# 64×64:   sum = 8,386,560    (0x7FF800)
-# 128×128: sum = 134,209,536  (0x7FFE000)
-# 256×256: sum = 2,147,450,880 (0x7FFFE000)
+# Expected sum formulas (N = TOTAL_ELEMENTS, sum = N*(N-1)/2):
+# 8×8:     sum = 2,016    (0x7E0)
+# 16×16:   sum = 32,640   (0x7F80)
+# 22×22:   sum = 116,886  (0x1C896)
 # ============================================================
 
-.eqv ARRAY_SIZE, 128
-.eqv TOTAL_ELEMENTS, 16384   # ARRAY_SIZE * ARRAY_SIZE
+.eqv ARRAY_SIZE, 16
+.eqv TOTAL_ELEMENTS, 256     # ARRAY_SIZE * ARRAY_SIZE
 
 .data
 .align 2
+result: .word 0              # First, so it stays inside D_mem
 array: 
-    .fill 16384, 4, 0        # Must match TOTAL_ELEMENTS
+    .fill TOTAL_ELEMENTS, 4, 0
 
 .text
 .globl _start
@@ -33,12 +35,12 @@ _start:
     # ============================================================
     lui sp, 0x10000
     
-    # Initialize array with sequential values (0..4095)
+    # Initialize array with sequential values (0..N-1)
     lui x10, %hi(array)
     addi x10, x10, %lo(array)   # x10 = array base address
     
     addi x11, x0, 0             # x11 = counter (0..N-1)
-    lui x12, 4                 # ⚠️ SIZE-DEPENDENT: 1=4K, 4=16K, 16=64K
+    addi x12, x0, TOTAL_ELEMENTS # x12 = N
     
 init_loop:
     slli x13, x11, 2            # x13 = offset = counter * 4
@@ -55,7 +57,7 @@ benchmark_start:
     
     addi x20, x0, 0             # x20 = sum = 0
     addi x21, x0, 0             # x21 = index = 0
-    lui x22, 4                 # ⚠️ SIZE-DEPENDENT: 1=4K, 4=16K, 16=64K
+    addi x22, x0, TOTAL_ELEMENTS # x22 = N
     
 sum_loop:
     slli x23, x21, 2            # x23 = offset = index * 4
@@ -71,7 +73,7 @@ sum_loop:
     # ============================================================
     
     # Result validation
-    # Expected: 8,386,560 (0x7FE000)
+    # Expected: 32,640 (0x7F80)
     # Result is in x20
     
     # Store result for validation
@@ -81,7 +83,3 @@ sum_loop:
     
     # Exit
     ebreak
-
-.data
-result: .word 0
-
@@ -4,25 +4,26 @@
 # Measures: Complex branching patterns (3-way), logarithmic access
 #
 # PARAMETRIC CONFIGURATION:
-# To change stress level, modify ARRAY_SIZE:
+# To change stress level, modify ARRAY_SIZE (SEARCH_TARGET < ARRAY_SIZE).
+# .data lives in D_mem (512 words), so result + array must fit:
 #
-# 256 elements:   ~8 iterations per search
-# 512 elements:   ~9 iterations per search
-# 1024 elements:  ~10 iterations per search ← DEFAULT
-# 2048 elements:  ~11 iterations per search
+# 64 elements:    ~6 iterations per search
+# 128 elements:   ~7 iterations per search
+# 256 elements:   ~8 iterations per search ← DEFAULT
+# 511 elements:   ~9 iterations per search (largest that fits)
 #
 # Expected result: Found index (varies by target)
 # ============================================================
 
-.eqv ARRAY_SIZE, 1024
-.eqv SEARCH_TARGET, 777
+.eqv ARRAY_SIZE, 256
+.eqv SEARCH_TARGET, 194
 
 .data
 .align 2
-array:
-    .fill 1024, 4, 0         # Sorted array (0, 1, 2, ..., 1023)
+result: .word 0              # Found index or -1 (first, so it stays inside D_mem)
 
-result: .word 0              # Found index or -1
+array:
+    .fill ARRAY_SIZE, 4, 0   # Sorted array (0, 1, 2, ..., N-1)
 
 .text
 .globl _start
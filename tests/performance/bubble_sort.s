@@ -4,12 +4,13 @@
 # Measures: Nested loops, data-dependent branches, memory swaps
 #
 # PARAMETRIC CONFIGURATION:
-# To change stress level, modify ARRAY_SIZE:
+# To change stress level, modify ARRAY_SIZE and the input table to match
+# (N-1 down to 0). .data lives in D_mem (512 words), so result + array must fit:
 #
 # 64 elements:   ~2K comparisons, O(n²)
 # 128 elements:  ~8K comparisons, O(n²)
 # 256 elements:  ~32K comparisons, O(n²) ← DEFAULT
-# 512 elements:  ~131K comparisons, O(n²) (heavy!)
+# 511 elements:  ~130K comparisons, O(n²) (heavy! largest that fits)
 #
 # Worst case: Reverse sorted array
 # Expected result: Sorted in ascending order
@@ -19,10 +20,27 @@
 
 .data
 .align 2
-array:
-    .fill 256, 4, 0          # Array to be sorted
+result: .word 0              # 1=sorted correctly, 0=failed (first, so it stays inside D_mem)
 
-result: .word 0              # 1=sorted correctly, 0=failed
+# Array to be sorted: REVERSE sorted values (worst case), array[i] = N - 1 - i
+# Preloaded into D_mem with the program, so no init loop runs
+array:
+    .word 255, 254, 253, 252, 251, 250, 249, 248, 247, 246, 245, 244, 243, 242, 241, 240
+    .word 239, 238, 237, 236, 235, 234, 233, 232, 231, 230, 229, 228, 227, 226, 225, 224
+    .word 223, 222, 221, 220, 219, 218, 217, 216, 215, 214, 213, 212, 211, 210, 209, 208
+    .word 207, 206, 205, 204, 203, 202, 201, 200, 199, 198, 197, 196, 195, 194, 193, 192
+    .word 191, 190, 189, 188, 187, 186, 185, 184, 183, 182, 181, 180, 179, 178, 177, 176
+    .word 175, 174, 173, 172, 171, 170, 169, 168, 167, 166, 165, 164, 163, 162, 161, 160
+    .word 159, 158, 157, 156, 155, 154, 153, 152, 151, 150, 149, 148, 147, 146, 145, 144
+    .word 143, 142, 141, 140, 139, 138, 137, 136, 135, 134, 133, 132, 131, 130, 129, 128
+    .word 127, 126, 125, 124, 123, 122, 121, 120, 119, 118, 117, 116, 115, 114, 113, 112
+    .word 111, 110, 109, 108, 107, 106, 105, 104, 103, 102, 101, 100, 99, 98, 97, 96
+    .word 95, 94, 93, 92, 91, 90, 89, 88, 87, 86, 85, 84, 83, 82, 81, 80
+    .word 79, 78, 77, 76, 75, 74, 73, 72, 71, 70, 69, 68, 67, 66, 65, 64
+    .word 63, 62, 61, 60, 59, 58, 57, 56, 55, 54, 53, 52, 51, 50, 49, 48
+    .word 47, 46, 45, 44, 43, 42, 41, 40, 39, 38, 37, 36, 35, 34, 33, 32
+    .word 31, 30, 29, 28, 27, 26, 25, 24, 23, 22, 21, 20, 19, 18, 17, 16
+    .word 15, 14, 13, 12, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1, 0
 
 .text
 .globl _start
@@ -33,23 +51,8 @@ _start:
     # ============================================================
     lui sp, 0x10000
     
-    # Initialize array with REVERSE sorted values (worst case)
-    # array[i] = N - 1 - i
     lui x10, %hi(array)
-    addi x10, x10, %lo(array)   # x10 = array base address
-    
-    addi x11, x0, 0                # x11 = counter
-    addi x12, x0, ARRAY_SIZE       # x12 = N
-    addi x13, x12, -1              # x13 = N - 1
-    
-init_loop:
-    sub x14, x13, x11              # x14 = (N-1) - counter
-    slli x15, x11, 2               # x15 = offset = counter * 4
-    add x16, x10, x15              # x16 = &array[counter]
-    sw x14, 0(x16)                 # array[counter] = N-1-counter
-    
-    addi x11, x11, 1               # counter++
-    blt x11, x12, init_loop
+    addi x10, x10, %lo(array)   # x10 = array base address (input preloaded in .data)
     
     # ============================================================
     # BENCHMARK START (measurement begins here)
@@ -4,26 +4,30 @@
 # Measures: Non-sequential memory access, cache behavior (stride)
 #
 # PARAMETRIC CONFIGURATION:
-# To change matrix size, modify ALL sections below:
+# To change matrix size, modify the .eqv lines below.
+# .data lives in D_mem (512 words), so result + 2 matrices must fit
+# (MATRIX_DIM is a power of two: rows are indexed with shifts):
 #
-# 64×64   (4096):    MATRIX_DIM=64,  TOTAL_ELEMENTS=4096,  lui x12/x22/x28=1
-# 128×128 (16384):   MATRIX_DIM=128, TOTAL_ELEMENTS=16384, lui x12/x22/x28=4
-# 256×256 (65536):   MATRIX_DIM=256, TOTAL_ELEMENTS=65536, lui x12/x22/x28=16
+# 4×4 (16):    MATRIX_DIM=4, DIM_SHIFT=2, TOTAL_ELEMENTS=16
+# 8×8 (64):    MATRIX_DIM=8, DIM_SHIFT=3, TOTAL_ELEMENTS=64   ← DEFAULT (largest that fits)
 #
 # Transpose: dest[j][i] = src[i][j]
 # Expected result: Transpose verified (result=1)
 # ============================================================
 
-.eqv MATRIX_DIM, 128
-.eqv TOTAL_ELEMENTS, 16384   # MATRIX_DIM * MATRIX_DIM
+.eqv MATRIX_DIM, 8
+.eqv DIM_SHIFT, 3            # log2(MATRIX_DIM)
+.eqv TOTAL_ELEMENTS, 64      # MATRIX_DIM * MATRIX_DIM
 
 .data
 .align 2
+result: .word 0              # First, so it stays inside D_mem
+
 source_matrix:
-    .fill 16384, 4, 0        # Must match TOTAL_ELEMENTS
+    .fill TOTAL_ELEMENTS, 4, 0
 
 transposed_matrix:
-    .fill 16384, 4, 0        # Must match TOTAL_ELEMENTS
+    .fill TOTAL_ELEMENTS, 4, 0
 
 .text
 .globl _start
@@ -46,13 +50,13 @@ init_row_loop:
     
 init_col_loop:
     # Calculate value = row * DIM + col
-    # row * 128 = row << 7 (since 128 = 2^7)
-    slli x14, x11, 7                     # x14 = row * 128
-    add x14, x14, x13                    # x14 = row * 128 + col
+    # row * DIM = row << DIM_SHIFT
+    slli x14, x11, DIM_SHIFT             # x14 = row * DIM
+    add x14, x14, x13                    # x14 = row * DIM + col
     
     # Calculate offset = (row * DIM + col) * 4
-    slli x15, x11, 7                     # x15 = row * 128
-    add x15, x15, x13                    # x15 = row * 128 + col
+    slli x15, x11, DIM_SHIFT             # x15 = row * DIM
+    add x15, x15, x13                    # x15 = row * DIM + col
     slli x15, x15, 2                     # x15 = offset in bytes
     
     add x16, x10, x15                    # x16 = &source[row][col]
@@ -81,17 +85,17 @@ transpose_row_loop:
     
 transpose_col_loop:
     # Read source[row][col]
-    # row * 128 = row << 7
-    slli x23, x20, 7                     # x23 = row * 128
-    add x23, x23, x21                    # x23 = row * 128 + col
+    # row * DIM = row << DIM_SHIFT
+    slli x23, x20, DIM_SHIFT             # x23 = row * DIM
+    add x23, x23, x21                    # x23 = row * DIM + col
     slli x23, x23, 2                     # x23 = offset in bytes
     add x24, x10, x23                    # x24 = &source[row][col]
     lw x25, 0(x24)                       # x25 = source[row][col] ← Load
     
     # Write dest[col][row] (transpose)
-    # col * 128 = col << 7
-    slli x26, x21, 7                     # x26 = col * 128
-    add x26, x26, x20                    # x26 = col * 128 + row
+    # col * DIM = col << DIM_SHIFT
+    slli x26, x21, DIM_SHIFT             # x26 = col * DIM
+    add x26, x26, x20                    # x26 = col * DIM + row
     slli x26, x26, 2                     # x26 = offset in bytes
     add x27, x17, x26                    # x27 = &dest[col][row]
     sw x25, 0(x27)                       # dest[col][row] = x25 ← Store
@@ -119,10 +123,10 @@ verify_loop:
     add x24, x17, x23                    # x24 = &dest[0][i]
     lw x25, 0(x24)                       # x25 = dest[0][i]
     
-    # source[i][0] offset = (i * DIM + 0) * 4 = i * 128 * 4
-    # i * 128 = i << 7
-    slli x23, x28, 7                     # x23 = i * 128
-    slli x23, x23, 2                     # x23 = i * 128 * 4
+    # source[i][0] offset = (i * DIM + 0) * 4 = i * DIM * 4
+    # i * DIM = i << DIM_SHIFT
+    slli x23, x28, DIM_SHIFT             # x23 = i * DIM
+    slli x23, x23, 2                     # x23 = i * DIM * 4
     add x24, x10, x23                    # x24 = &source[i][0]
     lw x26, 0(x24)                       # x26 = source[i][0]
     
@@ -144,6 +148,3 @@ verify_done:
     
     # Exit
     ebreak
-
-.data
-result: .word 0
@@ -4,24 +4,27 @@
 # Measures: Sequential memory bandwidth, load-store forwarding
 #
 # PARAMETRIC CONFIGURATION:
-# To change array size, modify BOTH sections below:
+# To change array size, modify ARRAY_SIZE below.
+# .data lives in D_mem (512 words), so result + 2 arrays must fit:
 #
-# 4K elements  (16KB):   ARRAY_SIZE=4096,  lui x12/x22=1
-# 16K elements (64KB):   ARRAY_SIZE=16384, lui x12/x22=4
-# 64K elements (256KB):  ARRAY_SIZE=65536, lui x12/x22=16
+# 64 elements  (256B each):   ARRAY_SIZE=64
+# 128 elements (512B each):   ARRAY_SIZE=128
+# 255 elements (1020B each):  ARRAY_SIZE=255  ← DEFAULT (largest that fits)
 #
 # Expected result: All elements copied correctly (result=1)
 # ============================================================
 
-.eqv ARRAY_SIZE, 16384
+.eqv ARRAY_SIZE, 255
 
 .data
 .align 2
+result: .word 0              # First, so it stays inside D_mem
+
 source_array:
-    .fill 16384, 4, 0      # Must match ARRAY_SIZE
+    .fill ARRAY_SIZE, 4, 0
 
 destination_array:
-    .fill 16384, 4, 0      # Must match ARRAY_SIZE
+    .fill ARRAY_SIZE, 4, 0
 
 .text
 .globl _start
@@ -37,7 +40,7 @@ _start:
     addi x10, x10, %lo(source_array)   # x10 = source base address
     
     addi x11, x0, 0                     # x11 = counter (0..N-1)
-    lui x12, 4                         # ⚠️ SIZE-DEPENDENT: 1=4K, 4=16K, 16=64K
+    addi x12, x0, ARRAY_SIZE            # x12 = N
     
 init_loop:
     slli x13, x11, 2                    # x13 = offset = counter * 4
@@ -57,7 +60,7 @@ init_loop:
 benchmark_start:
     
     addi x20, x0, 0                     # x20 = index = 0
-    lui x22, 4                         # ⚠️ SIZE-DEPENDENT: 1=4K, 4=16K, 16=64K
+    addi x22, x0, ARRAY_SIZE            # x22 = N
     
 copy_loop:
     slli x23, x20, 2                    # x23 = offset = index * 4
@@ -76,7 +79,7 @@ copy_loop:
     
     # Verification: Check if destination matches source
     addi x27, x0, 0                     # x27 = verify_index = 0
-    lui x28, 4                         # ⚠️ SIZE-DEPENDENT: 1=4K, 4=16K, 16=64K
+    addi x28, x0, ARRAY_SIZE            # x28 = N
     addi x29, x0, 1                     # x29 = result = 1 (success)
     
 verify_loop:
@@ -105,6 +108,3 @@ verify_done:
     
     # Exit
     ebreak
-
-.data
-result: .word 0
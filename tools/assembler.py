@@ -1,47 +1,312 @@
+import os
 import sys
 import re
+import json
+import struct
 
 # Minimal RISC-V Assembler for the Visualization Demo
-# Supports: lui, addi, add, sub, slli, sw, lw, li (pseudo), bne, blt, j, jal, ret, xor, andi, srli, ebreak
+# Supports: RV32I base instructions (see INSTRUCTIONS)
+# Supports: Pseudo-instructions: li, la, mv, nop, not, neg, seqz/snez/sltz/sgtz, beqz/bnez,
+#           blez/bgez/bltz/bgtz, bgt/ble/bgtu/bleu, j, jr, ret, call, tail, jal/jalr with one operand
 # Supports: .eqv CONST VAL
+# Supports: .data with .word/.half/.byte/.space/.fill/.align (written as a separate D_mem image)
 # Supports: %hi(VAL), %lo(VAL)
-# Supports: Arithmetic expressions in immediates (via eval)
+# Supports: Constant expressions in immediates (+ - * / // % << >> & | ^ ~ **, comparisons,
+#           parentheses, .eqv constants and labels)
+# Supports: .macro/.endm, .rept/.endr, .if/.else/.endif (expanded before pass 1)
 
-def parse_reg(r):
-    r = r.lower().replace(',', '')
+# Register names (x0..x31 and ABI aliases)
+REGISTERS = {f'x{i}': i for i in range(32)}
+REGISTERS.update({
+    'zero': 0, 'ra': 1, 'sp': 2, 'gp': 3, 'tp': 4,
+    't0': 5, 't1': 6, 't2': 7, 
+    's0': 8, 'fp': 8, 's1': 9, 
+    'a0': 10, 'a1': 11, 'a2': 12, 'a3': 13, 'a4': 14, 'a5': 15, 'a6': 16, 'a7': 17,
+    's2': 18, 's3': 19, 's4': 20, 's5': 21, 's6': 22, 's7': 23, 's8': 24, 's9': 25, 's10': 26, 's11': 27,
+    't3': 28, 't4': 29, 't5': 30, 't6': 31
+})
+
+# Operand patterns (compiled once)
+HI_RE = re.compile(r'%hi\((.*)\)')
+LO_RE = re.compile(r'%lo\((.*)\)')
+MEM_RE = re.compile(r'(.+)\((.+)\)')   # offset(base)
+
+# --- Constant expressions ---
+TOKEN_RE = re.compile(r"""\s*(?:
+    (?P<num>0[xX][0-9a-fA-F_]+|0[bB][01_]+|0[oO][0-7_]+|[0-9][0-9_]*) |
+    (?P<name>[A-Za-z_.$][\w.$]*) |
+    (?P<op>\*\*|//|<<|>>|==|!=|<=|>=|[-+*/%&|^~()<>])
+)""", re.VERBOSE)
+
+BINARY_OPS = {
+    '==': lambda a, b: int(a == b),   # Comparisons are 1/0 (for .if)
+    '!=': lambda a, b: int(a != b),
+    '<': lambda a, b: int(a < b),
+    '<=': lambda a, b: int(a <= b),
+    '>': lambda a, b: int(a > b),
+    '>=': lambda a, b: int(a >= b),
+    '|': lambda a, b: a | b,
+    '^': lambda a, b: a ^ b,
+    '&': lambda a, b: a & b,
+    '<<': lambda a, b: a << b,
+    '>>': lambda a, b: a >> b,
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: int(a / b),   # eval() semantics: true division, truncated
+    '//': lambda a, b: a // b,
+    '%': lambda a, b: a % b,
+    '**': lambda a, b: int(a ** b),
+}
+
+UNARY_OPS = {
+    '-': lambda a: -a,
+    '+': lambda a: a,
+    '~': lambda a: ~a,
+}
+
+# Binary operators from lowest to highest precedence (Python's order)
+PRECEDENCE = [('==', '!=', '<', '<=', '>', '>='), ('|',), ('^',), ('&',), ('<<', '>>'), ('+', '-'), ('*', '/', '//', '%')]
+
+def tokenize(text):
+    """Split an expression into (kind, value) tokens."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if not m:
+            raise ValueError(f"Unexpected character {text[pos:].strip()[:1]!r} in expression '{text}'")
+        pos = m.end()
+        kind = m.lastgroup
+        value = m.group(kind)
+        tokens.append((kind, int(value, 0) if kind == 'num' else value))
+    return tokens
+
+class ExprParser:
+    """Recursive-descent parser producing a nested-tuple expression tree."""
+
+    def __init__(self, text):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.pos = 0
+
+    def parse(self):
+        node = self.binary(0)
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Unexpected '{self.tokens[self.pos][1]}' in expression '{self.text}'")
+        return node
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None)
+
+    def binary(self, level):
+        if level == len(PRECEDENCE):
+            return self.unary()
+        node = self.binary(level + 1)
+        while True:
+            kind, value = self.peek()
+            if kind != 'op' or value not in PRECEDENCE[level]:
+                return node
+            self.pos += 1
+            node = ('bin', value, node, self.binary(level + 1))
+
+    def unary(self):
+        kind, value = self.peek()
+        if kind == 'op' and value in UNARY_OPS:
+            self.pos += 1
+            return ('un', value, self.unary())
+        return self.power()
+
+    def power(self):
+        node = self.atom()
+        kind, value = self.peek()
+        if kind == 'op' and value == '**':
+            self.pos += 1
+            node = ('bin', '**', node, self.unary())   # right-associative
+        return node
+
+    def atom(self):
+        kind, value = self.peek()
+        self.pos += 1
+        if kind == 'num':
+            return ('num', value)
+        if kind == 'name':
+            return ('sym', value)
+        if kind == 'op' and value == '(':
+            node = self.binary(0)
+            if self.peek() != ('op', ')'):
+                raise ValueError(f"Missing ')' in expression '{self.text}'")
+            self.pos += 1
+            return node
+        raise ValueError(f"Incomplete expression '{self.text}'")
+
+_expr_cache = {}
+
+def compile_expr(text):
+    """Parse an expression once; the tree is shared by every program."""
+    node = _expr_cache.get(text)
+    if node is None:
+        node = _expr_cache[text] = ExprParser(text).parse()
+    return node
+
+def eval_node(node, lookup):
+    kind = node[0]
+    if kind == 'num':
+        return node[1]
+    if kind == 'sym':
+        return lookup(node[1])
+    if kind == 'un':
+        return UNARY_OPS[node[1]](eval_node(node[2], lookup))
+    return BINARY_OPS[node[1]](eval_node(node[2], lookup), eval_node(node[3], lookup))
+
+class SymbolTable:
+    """.eqv constants and labels of one program; expression values are memoized."""
+
+    relocatable = False
+
+    def __init__(self):
+        self.constants = {}   # name -> expression text
+        self.labels = {}      # name -> address (.text: PC, .data: D_mem address)
+        self.data_labels = set()
+        self.globals = set()  # .globl names
+        self._values = {}     # expression text -> value
+        self._resolving = set()
+
+    def define(self, name, text):
+        self.constants[name] = text.strip()
+        self._values.clear()
+
+    def set_label(self, name, address):
+        if self.labels.get(name) != address:
+            self.labels[name] = address
+            self._values.clear()
+
+    def lookup(self, name):
+        if name in self.constants:
+            if name in self._resolving:
+                raise ValueError(f"Recursive definition of '{name}'")
+            self._resolving.add(name)
+            try:
+                return self.evaluate(self.constants[name])
+            finally:
+                self._resolving.discard(name)
+        if name in self.labels:
+            return self.labels[name]
+        raise ValueError(f"Undefined symbol '{name}'")
+
+    def evaluate(self, text):
+        value = self._values.get(text)
+        if value is None:
+            value = self._values[text] = eval_node(compile_expr(text), self.lookup)
+        return value
+
+    def pc_offset(self, label, pc):
+        """Offset from pc to a label, None if it is not defined."""
+        address = self.labels.get(label)
+        return None if address is None else address - pc
+
+    def relocation(self, text):
+        """Label addresses are final in a linked program; see ObjectSymbols."""
+        return None
+
+NO_SYMBOLS = SymbolTable()
+
+# Base shift used to tell which section (or external symbol) an expression
+# is relative to
+RELOC_SHIFT = 1 << 24
+
+class ObjectSymbols(SymbolTable):
+    """
+    Symbols of a relocatable object (--object): labels hold offsets into the
+    object's own .text/.data, undefined names are external and evaluate to 0.
+    Pass 2 records a relocation for every field that depends on them.
+    """
+
+    relocatable = True
+
+    def __init__(self):
+        super().__init__()
+        self.relocs = []      # (section, offset, type, target, addend), see linker.py
+        self.data_size = 0
+
+    def lookup(self, name):
+        if name in self.constants or name in self.labels:
+            return super().lookup(name)
+        return 0   # External, resolved by the linker
+
+    def pc_offset(self, label, pc):
+        offset = super().pc_offset(label, pc)
+        return 0 if offset is None else offset
+
+    def section(self, name):
+        return 'data' if name in self.data_labels else 'text'
+
+    def _shifted(self, name, target, externs):
+        # Value of a symbol with the base of `target` moved by RELOC_SHIFT
+        if name in self.constants:
+            return eval_node(compile_expr(self.constants[name]),
+                             lambda n: self._shifted(n, target, externs))
+        if name in self.labels:
+            return self.labels[name] + (RELOC_SHIFT if self.section(name) == target else 0)
+        externs.add(name)
+        return RELOC_SHIFT if target == 'extern' else 0
+
+    def relocation(self, text):
+        """
+        (target, addend) if the expression is an address: target is 'text' or
+        'data' for a local label, otherwise the external symbol name.
+        None for a constant (including differences of labels).
+        """
+        value = self.evaluate(text)
+        node = compile_expr(text)
+        externs = set()
+        moved = []
+        for target in ('text', 'data', 'extern'):
+            delta = eval_node(node, lambda n: self._shifted(n, target, externs)) - value
+            if delta:
+                moved.append((target, delta))
+        if not moved and not externs:
+            return None
+        if len(moved) != 1 or moved[0][1] != RELOC_SHIFT or \
+           (externs and (moved[0][0] != 'extern' or len(externs) != 1)):
+            raise ValueError(f"'{text}' is not relocatable (use symbol + constant)")
+        target = moved[0][0]
+        return (next(iter(externs)) if target == 'extern' else target), value
+
+def parse_reg(r, symbols=NO_SYMBOLS):
+    r = r.replace(',', '')
+    alias = symbols.constants.get(r)
+    if alias is not None and alias != r:   # .eqv alias for a register
+        return parse_reg(alias, symbols)
+    r = r.lower()
+    reg = REGISTERS.get(r)
+    if reg is not None:
+        return reg
     if r.startswith('x'): 
         try:
             return int(r[1:])
         except:
             return 0
-    
-    abi_map = {
-        'zero': 0, 'ra': 1, 'sp': 2, 'gp': 3, 'tp': 4,
-        't0': 5, 't1': 6, 't2': 7, 
-        's0': 8, 'fp': 8, 's1': 9, 
-        'a0': 10, 'a1': 11, 'a2': 12, 'a3': 13, 'a4': 14, 'a5': 15, 'a6': 16, 'a7': 17,
-        's2': 18, 's3': 19, 's4': 20, 's5': 21, 's6': 22, 's7': 23, 's8': 24, 's9': 25, 's10': 26, 's11': 27,
-        't3': 28, 't4': 29, 't5': 30, 't6': 31
-    }
-    return abi_map.get(r, 0)
+    return 0
 
-def parse_imm(s):
+def parse_imm(s, symbols=NO_SYMBOLS):
     s = s.strip()
     # Handle %hi(...)
-    hi_match = re.match(r'%hi\((.*)\)', s)
+    hi_match = HI_RE.match(s)
     if hi_match:
         try:
-            val = int(eval(hi_match.group(1)))
+            val = symbols.evaluate(hi_match.group(1))
             return (val >> 12) & 0xFFFFF
         except Exception as e:
             print(f"Error evaluating %hi: {s} -> {e}")
             return 0
             
     # Handle %lo(...)
-    lo_match = re.match(r'%lo\((.*)\)', s)
+    lo_match = LO_RE.match(s)
     if lo_match:
         try:
-            val = int(eval(lo_match.group(1)))
+            val = symbols.evaluate(lo_match.group(1))
             # Sign extend 12-bit
             # But usually we just want the bits for the field
             return val & 0xFFF
@@ -51,8 +316,7 @@ def parse_imm(s):
     
     # Handle normal expressions
     try:
-        # Hex strings need to be handled by eval? eval("0x10") works.
-        return int(eval(s))
+        return symbols.evaluate(s)
     except Exception as e:
         print(f"Error evaluating immediate: {s} -> {e}")
         return 0
@@ -60,459 +324,1254 @@ def parse_imm(s):
 def to_hex(val, bits):
     return val & ((1 << bits) - 1)
 
-def assemble(input_file, output_file):
-    lines = []
-    with open(input_file, 'r') as f:
-        lines = f.readlines()
+# --- Encoders ---
+# Each encoder takes (base, ops, pc, symbols) and returns the machine word.
+# `base` already holds opcode | funct3 | funct7 (see ENCODING below).
 
-    labels = {}
-    constants = {}
-    clean_lines = []
+def b_offset(offset):
+    """Scatter a branch offset into the B-type immediate bits."""
+    return (((offset >> 12) & 1) << 31) | (((offset >> 5) & 0x3F) << 25) | \
+           (((offset >> 1) & 0xF) << 8) | (((offset >> 11) & 1) << 7)
+
+def j_offset(offset):
+    """Scatter a jump offset into the J-type immediate bits."""
+    return (((offset >> 20) & 1) << 31) | (((offset >> 1) & 0x3FF) << 21) | \
+           (((offset >> 11) & 1) << 20) | (((offset >> 12) & 0xFF) << 12)
+
+def encode_r(base, ops, pc, symbols):
+    # op rd, rs1, rs2
+    return base | (parse_reg(ops[2], symbols) << 20) | (parse_reg(ops[1], symbols) << 15) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_i(base, ops, pc, symbols):
+    # op rd, rs1, imm
+    return base | (to_hex(parse_imm(ops[2], symbols), 12) << 20) | (parse_reg(ops[1], symbols) << 15) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_shift(base, ops, pc, symbols):
+    # op rd, rs1, shamt (funct7 in base)
+    return base | (parse_imm(ops[2], symbols) << 20) | (parse_reg(ops[1], symbols) << 15) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_load(base, ops, pc, symbols):
+    # op rd, imm(rs1)
+    match = MEM_RE.match(ops[1])
+    if not match:
+        return 0
+    imm = parse_imm(match.group(1), symbols)
+    return base | (to_hex(imm, 12) << 20) | (parse_reg(match.group(2), symbols) << 15) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_store(base, ops, pc, symbols):
+    # op rs2, imm(rs1)
+    match = MEM_RE.match(ops[1])
+    if not match:
+        return 0
+    imm = parse_imm(match.group(1), symbols)
+    return base | (((imm >> 5) & 0x7F) << 25) | (parse_reg(ops[0], symbols) << 20) | \
+           (parse_reg(match.group(2), symbols) << 15) | ((imm & 0x1F) << 7)
+
+def encode_branch(base, ops, pc, symbols):
+    # op rs1, rs2, label
+    label = ops[2]
+    offset = symbols.pc_offset(label, pc)
+    if offset is None:
+        print(f"Error: Label '{label}' not found at PC={pc}")
+        return 0
+    return base | b_offset(offset) | (parse_reg(ops[1], symbols) << 20) | (parse_reg(ops[0], symbols) << 15)
+
+def encode_branch_zero(base, ops, pc, symbols):
+    # op rs1, label (compare against x0)
+    return encode_branch(base, [ops[0], 'x0', ops[1]], pc, symbols)
+
+def encode_jal(base, ops, pc, symbols):
+    # jal rd, label
+    label = ops[1]
+    offset = symbols.pc_offset(label, pc)
+    if offset is None:
+        print(f"Error: Label '{label}' not found at PC={pc}")
+        return 0
+    return base | j_offset(offset) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_j(base, ops, pc, symbols):
+    # j label -> jal x0, label
+    return encode_jal(base, ['x0', ops[0]], pc, symbols)
+
+def encode_jalr(base, ops, pc, symbols):
+    # jalr rd, imm(rs1) | jalr rd, rs1 | jalr rd, rs1, imm
+    if len(ops) == 2:
+        match = MEM_RE.match(ops[1])
+        if match:
+            imm = parse_imm(match.group(1), symbols)
+            rs1 = parse_reg(match.group(2), symbols)
+        else:
+            rs1 = parse_reg(ops[1], symbols)
+            imm = 0
+    else:
+        rs1 = parse_reg(ops[1], symbols)
+        imm = parse_imm(ops[2], symbols)
+    return base | (to_hex(imm, 12) << 20) | (rs1 << 15) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_u(base, ops, pc, symbols):
+    # op rd, imm20
+    return base | (to_hex(parse_imm(ops[1], symbols), 20) << 12) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_csr(base, ops, pc, symbols):
+    # op rd, csr, rs1
+    return base | (parse_imm(ops[1], symbols) << 20) | (parse_reg(ops[2], symbols) << 15) | (parse_reg(ops[0], symbols) << 7)
+
+def encode_fixed(base, ops, pc, symbols):
+    return base
+
+def encode_word(base, ops, pc, symbols):
+    return parse_imm(ops[0], symbols) & 0xFFFFFFFF
+
+FORMATS = {
+    'R': encode_r,
+    'I': encode_i,
+    'SHIFT': encode_shift,
+    'LOAD': encode_load,
+    'S': encode_store,
+    'B': encode_branch,
+    'BZ': encode_branch_zero,
+    'U': encode_u,
+    'J': encode_jal,
+    'J0': encode_j,
+    'JALR': encode_jalr,
+    'CSR': encode_csr,
+    'FIXED': encode_fixed,
+    'WORD': encode_word,
+}
+
+# Format descriptors: mnemonic -> (format, opcode, funct3, funct7, min operands)
+# FIXED entries carry the complete instruction word as the opcode.
+INSTRUCTIONS = {
+    # R-Type
+    'add':  ('R', 0x33, 0, 0x00, 3),
+    'sub':  ('R', 0x33, 0, 0x20, 3),
+    'sll':  ('R', 0x33, 1, 0x00, 3),
+    'slt':  ('R', 0x33, 2, 0x00, 3),
+    'sltu': ('R', 0x33, 3, 0x00, 3),
+    'xor':  ('R', 0x33, 4, 0x00, 3),
+    'srl':  ('R', 0x33, 5, 0x00, 3),
+    'sra':  ('R', 0x33, 5, 0x20, 3),
+    'or':   ('R', 0x33, 6, 0x00, 3),
+    'and':  ('R', 0x33, 7, 0x00, 3),
+    # I-Type ALU
+    'addi':  ('I', 0x13, 0, 0, 3),
+    'slti':  ('I', 0x13, 2, 0, 3),
+    'sltiu': ('I', 0x13, 3, 0, 3),
+    'xori':  ('I', 0x13, 4, 0, 3),
+    'ori':   ('I', 0x13, 6, 0, 3),
+    'andi':  ('I', 0x13, 7, 0, 3),
+    'slli':  ('SHIFT', 0x13, 1, 0x00, 3),
+    'srli':  ('SHIFT', 0x13, 5, 0x00, 3),
+    'srai':  ('SHIFT', 0x13, 5, 0x20, 3),
+    # Loads / Stores
+    'lb':  ('LOAD', 0x03, 0, 0, 2),
+    'lh':  ('LOAD', 0x03, 1, 0, 2),
+    'lw':  ('LOAD', 0x03, 2, 0, 2),
+    'lbu': ('LOAD', 0x03, 4, 0, 2),
+    'lhu': ('LOAD', 0x03, 5, 0, 2),
+    'sb':  ('S', 0x23, 0, 0, 2),
+    'sh':  ('S', 0x23, 1, 0, 2),
+    'sw':  ('S', 0x23, 2, 0, 2),
+    # Branches
+    'beq':  ('B', 0x63, 0, 0, 3),
+    'bne':  ('B', 0x63, 1, 0, 3),
+    'blt':  ('B', 0x63, 4, 0, 3),
+    'bge':  ('B', 0x63, 5, 0, 3),
+    'bltu': ('B', 0x63, 6, 0, 3),
+    'bgeu': ('B', 0x63, 7, 0, 3),
+    'bnez': ('BZ', 0x63, 1, 0, 2),
+    # Jumps
+    'jal':  ('J', 0x6F, 0, 0, 2),
+    'j':    ('J0', 0x6F, 0, 0, 1),
+    'jalr': ('JALR', 0x67, 0, 0, 2),
+    'ret':  ('FIXED', 0x00008067, 0, 0, 0),
+    # Upper immediates
+    'lui':   ('U', 0x37, 0, 0, 2),
+    'auipc': ('U', 0x17, 0, 0, 2),
+    # System
+    'fence':  ('FIXED', 0x0FF0000F, 0, 0, 0),   # Simplified FENCE (pred=succ=PIPO)
+    'ecall':  ('FIXED', 0x00000073, 0, 0, 0),
+    'ebreak': ('FIXED', 0x00100073, 0, 0, 0),
+    'csrrw':  ('CSR', 0x73, 1, 0, 3),
+    'csrrs':  ('CSR', 0x73, 2, 0, 3),
+    # Data
+    '.word': ('WORD', 0, 0, 0, 1),
+}
+
+# --- Relocations (--object) ---
+# Types applied by linker.py: BRANCH/JAL (PC-relative), HI20 (%hi in lui/auipc),
+# LO12_I/LO12_S (I-type/S-type immediate) and ABS32 (.word).
+
+def reloc_field(fmt, ops):
+    """The field of an instruction that can hold an address: (type, operand) or None."""
+    if fmt == 'B':
+        return 'BRANCH', ops[2]
+    if fmt == 'BZ':
+        return 'BRANCH', ops[1]
+    if fmt == 'J':
+        return 'JAL', ops[1]
+    if fmt == 'J0':
+        return 'JAL', ops[0]
+    if fmt == 'U':
+        return 'HI20', ops[1]
+    if fmt == 'I':
+        return 'LO12_I', ops[2]
+    if fmt in ('LOAD', 'S') or (fmt == 'JALR' and len(ops) == 2):
+        match = MEM_RE.match(ops[1])
+        if match:
+            return ('LO12_S' if fmt == 'S' else 'LO12_I'), match.group(1)
+        return None
+    if fmt == 'JALR':
+        return 'LO12_I', ops[2]
+    if fmt == 'WORD':
+        return 'ABS32', ops[0]
+    if fmt == 'SHIFT':
+        return None, ops[2]
+    if fmt == 'CSR':
+        return None, ops[1]
+    return None
+
+def record_relocation(symbols, pc, op, ops):
+    """Add the relocation (if any) of one instruction to an ObjectSymbols table."""
+    field = reloc_field(INSTRUCTIONS[op][0], ops)
+    if field is None:
+        return
+    kind, expr = field
+    if kind in ('BRANCH', 'JAL'):
+        if expr in symbols.labels:
+            return   # PC-relative inside this object's .text
+        target = (expr, 0)
+    else:
+        hi = HI_RE.match(expr)
+        lo = LO_RE.match(expr)
+        value = (hi or lo).group(1) if hi or lo else expr
+        try:
+            symbols.evaluate(value)
+        except Exception:
+            return   # Already reported by the encoder
+        target = symbols.relocation(value)
+        if target is None:
+            return
+        if kind is None or (kind == 'HI20') != bool(hi):
+            raise ValueError(f"'{expr}' is an address; use %hi() in lui and %lo() or a plain "
+                             f"expression in I/S-type immediates")
+    symbols.relocs.append(('text', pc, kind, target[0], target[1]))
+
+# mnemonic -> (encoder, base word, min operands), built once at import
+ENCODING = {
+    op: (FORMATS[fmt], opcode | (funct3 << 12) | (funct7 << 25), count)
+    for op, (fmt, opcode, funct3, funct7, count) in INSTRUCTIONS.items()
+}
+
+# --- Macros, repetition and conditional assembly ---
+# Expanded on the source text before pass 1:
+#   .macro NAME [ARG[=DEFAULT], ...] ... .endm    invoked as NAME val, ...
+#   .rept COUNT[, VAR] ... .endr                   \VAR is the iteration 0..COUNT-1
+#   .if EXPR / .ifeq / .ifne / .ifgt / .ifge / .iflt / .ifle / .ifdef NAME /
+#   .ifndef NAME ... [.else ...] .endif
+# Inside a body \ARG is replaced by its value, \@ by a number unique to each
+# expansion (for local labels) and \() by nothing (to join text: r\i\()_end).
+# COUNT and conditions may use .eqv constants defined above them (not labels).
+CONDITIONALS = {
+    '.if':   lambda v: v != 0,
+    '.ifne': lambda v: v != 0,
+    '.ifeq': lambda v: v == 0,
+    '.ifgt': lambda v: v > 0,
+    '.ifge': lambda v: v >= 0,
+    '.iflt': lambda v: v < 0,
+    '.ifle': lambda v: v <= 0,
+}
+BLOCK_END = {'.macro': '.endm', '.rept': '.endr', '.if': '.endif'}
+BLOCK_START = {op: '.if' if op in CONDITIONALS or op in ('.ifdef', '.ifndef') else op
+               for op in ('.macro', '.rept', '.ifdef', '.ifndef', *CONDITIONALS)}
+MACRO_ARG_RE = re.compile(r'\\(\w+|@)')
+MACRO_DEPTH = 100   # Nested expansions before a macro counts as recursive
+PREPROCESS_RE = re.compile(r'^\s*\.(?:macro|rept|if)', re.MULTILINE)
+
+def split_args(text):
+    """Split macro arguments on commas outside parentheses."""
+    args, depth, start = [], 0, 0
+    for i, c in enumerate(text):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        elif c == ',' and depth == 0:
+            args.append(text[start:i].strip())
+            start = i + 1
+    args.append(text[start:].strip())
+    return args if text.strip() else []
+
+def substitute(line, values):
+    """Replace \\ARG and \\@ in a body line; unknown names are left as is."""
+    return MACRO_ARG_RE.sub(lambda m: values.get(m.group(1), m.group(0)), line)
+
+class Preprocessor:
+    """
+    Expands macros, .rept and conditionals into plain source lines. Lines
+    are (line number, text) pairs; an expanded macro keeps the line number
+    of its invocation.
+    """
+
+    def __init__(self):
+        self.macros = {}      # name -> (params [(name, default)], body lines)
+        self.symbols = SymbolTable()   # .eqv constants seen so far
+        self.expansions = 0   # \@ counter
+        self.number = 0       # Source line being expanded (for errors)
+
+    def block(self, lines, i, kind):
+        """
+        Body of the block opened at lines[i] (nested blocks included).
+        Returns (body, else body or None, index after the closing line).
+        """
+        body, other, depth = [], None, 0
+        for j in range(i + 1, len(lines)):
+            op = lines[j][1].split(None, 1)[0]
+            if BLOCK_START.get(op) == kind:
+                depth += 1
+            elif op == BLOCK_END[kind]:
+                if depth == 0:
+                    return body, other, j + 1
+                depth -= 1
+            elif op == '.else' and kind == '.if' and depth == 0:
+                if other is not None:
+                    raise ValueError(f"Second .else in '{lines[i][1]}'")
+                other = []
+                continue
+            (body if other is None else other).append(lines[j])
+        raise ValueError(f"Missing {BLOCK_END[kind]} for '{lines[i][1]}'")
+
+    def condition(self, op, arg):
+        if op in ('.ifdef', '.ifndef'):
+            defined = arg in self.symbols.constants or arg in self.macros
+            return defined == (op == '.ifdef')
+        return CONDITIONALS[op](self.symbols.evaluate(arg))
+
+    def expand(self, lines, out, depth=0, site=None):
+        """Append the expansion of comment-free lines to out."""
+        if depth > MACRO_DEPTH:
+            raise ValueError("Macro expansion too deep (recursive macro?)")
+        i = 0
+        while i < len(lines):
+            number, line = lines[i]
+            self.number = site or number
+            op, _, rest = line.partition(' ')
+            rest = rest.strip()
+
+            if op == '.macro':
+                body, _, i = self.block(lines, i, '.macro')
+                name, _, params = rest.partition(' ')
+                name = name.rstrip(',')
+                if not name:
+                    raise ValueError(".macro without a name")
+                self.macros[name] = ([(p.partition('=')[0].strip(), p.partition('=')[2].strip())
+                                      for p in split_args(params)], body)
+                continue
+            if op == '.rept':
+                body, _, i = self.block(lines, i, '.rept')
+                count, var = (split_args(rest) + [''])[:2]
+                for k in range(self.symbols.evaluate(count)):
+                    self.expand([(n, substitute(l, {var: str(k)})) for n, l in body], out, depth + 1, site)
+                continue
+            if BLOCK_START.get(op) == '.if':
+                taken, other, i = self.block(lines, i, '.if')
+                chosen = taken if self.condition(op, rest) else other
+                self.expand(chosen or [], out, depth, site)
+                continue
+            if op in ('.endm', '.endr', '.endif', '.else'):
+                raise ValueError(f"{op} without a matching block")
+
+            label = ''
+            if ':' in op and op.split(':')[1:] == ['']:   # "label: NAME args"
+                label = op
+                op, _, rest = rest.partition(' ')
+                rest = rest.strip()
+            if op in self.macros:
+                if label:
+                    out.append((self.number, label))
+                params, body = self.macros[op]
+                args = split_args(rest)
+                if len(args) > len(params):
+                    raise ValueError(f"Macro '{op}' takes {len(params)} arguments, got {len(args)}")
+                values = {name: (args[k] if k < len(args) and args[k] else default)
+                          for k, (name, default) in enumerate(params)}
+                self.expansions += 1
+                values['@'] = str(self.expansions)
+                self.expand([(n, substitute(l, values)) for n, l in body], out, depth + 1, self.number)
+            else:
+                if op == '.eqv':
+                    parts = line.split()
+                    if len(parts) >= 3:
+                        self.symbols.define(parts[1].replace(',', ''), " ".join(parts[2:]))
+                out.append((self.number, line.replace('\\()', '')))
+            i += 1
+
+def preprocess(lines):
+    """
+    Expand .macro/.rept/.if in source lines. Returns (lines, source line
+    number of each); sources without these directives are returned unchanged.
+    """
+    if not PREPROCESS_RE.search('\n'.join(lines)):
+        return lines, range(1, len(lines) + 1)
+    numbered = []
+    for number, line in enumerate(lines, 1):
+        line = line.split('//')[0].split('#')[0].strip()
+        if line:
+            numbered.append((number, line.replace('\t', ' ')))
+    out = []
+    preprocessor = Preprocessor()
+    try:
+        preprocessor.expand(numbered, out)
+    except Exception as e:
+        print(f"Error expanding macros at line {preprocessor.number}: {e}")
+        raise
+    return [line for _, line in out], [number for number, _ in out]
+
+# --- Pseudo-instructions ---
+# (mnemonic, operand count) -> real instruction; {0}, {1}, ... are the operands.
+# Rewritten in pass 1, so every later pass only sees real instructions.
+PSEUDO_INSTRUCTIONS = {
+    ('nop', 0):   'addi x0, x0, 0',
+    ('mv', 2):    'addi {0}, {1}, 0',
+    ('not', 2):   'xori {0}, {1}, -1',
+    ('neg', 2):   'sub {0}, x0, {1}',
+    ('seqz', 2):  'sltiu {0}, {1}, 1',
+    ('snez', 2):  'sltu {0}, x0, {1}',
+    ('sltz', 2):  'slt {0}, {1}, x0',
+    ('sgtz', 2):  'slt {0}, x0, {1}',
+    ('beqz', 2):  'beq {0}, x0, {1}',
+    ('blez', 2):  'bge x0, {0}, {1}',
+    ('bgez', 2):  'bge {0}, x0, {1}',
+    ('bltz', 2):  'blt {0}, x0, {1}',
+    ('bgtz', 2):  'blt x0, {0}, {1}',
+    ('bgt', 3):   'blt {1}, {0}, {2}',
+    ('ble', 3):   'bge {1}, {0}, {2}',
+    ('bgtu', 3):  'bltu {1}, {0}, {2}',
+    ('bleu', 3):  'bgeu {1}, {0}, {2}',
+    ('jal', 1):   'jal ra, {0}',
+    ('jalr', 1):  'jalr ra, {0}',
+    ('jr', 1):    'jalr x0, {0}',
+    ('call', 1):  'jal ra, {0}',   # I_mem is 8 KiB, always within jal range
+    ('tail', 1):  'jal x0, {0}',
+}
+PSEUDO_OPS = {op for op, _ in PSEUDO_INSTRUCTIONS}
+
+# li rd, VALUE / la rd, SYMBOL: 1 or 2 instructions depending on the value
+LOAD_CONSTANT_OPS = ('li', 'la')
+
+def expand_pseudo(line):
+    """Rewrite a fixed-length pseudo-instruction; other lines are returned as is."""
+    parts = line.replace(',', ' ').split()
+    template = PSEUDO_INSTRUCTIONS.get((parts[0], len(parts) - 1))
+    return template.format(*parts[1:]) if template else line
+
+def li_sequence(rd, value, size=1):
+    """
+    Shortest sequence loading a 32-bit value: addi (12-bit), lui (low bits
+    zero) or lui + addi, the upper part rounded to absorb the sign of the
+    low 12 bits. size=2 forces the lui + addi form.
+    """
+    value = ((value + 0x80000000) & 0xFFFFFFFF) - 0x80000000   # Signed 32-bit
+    if size == 1 and -2048 <= value < 2048:
+        return [f"addi {rd}, x0, {value}"]
+    hi = (value + 0x800) >> 12
+    lo = value - (hi << 12)
+    if size == 1 and lo == 0:
+        return [f"lui {rd}, 0x{hi & 0xFFFFF:x}"]
+    return [f"lui {rd}, 0x{hi & 0xFFFFF:x}", f"addi {rd}, {rd}, {lo}"]
+
+def expand_constants(clean_lines, text_labels, symbols, load_lines):
+    """
+    Expand the li/la at indices load_lines and move the .text labels to
+    match. A value can depend on labels whose address depends on other
+    expansions, so sizes are relaxed until stable; they only ever grow,
+    which guarantees termination. Returns (clean_lines, text_labels, loads);
+    loads lists the (expression, value) pairs that were baked in.
+    """
+    loads = []
+    for i in load_lines:
+        rd, _, expr = clean_lines[i][1].split(None, 1)[1].partition(',')
+        loads.append((i, rd.strip(), expr.strip()))
+    if not loads:
+        return clean_lines, text_labels, []
+
+    # In an object, addresses are only known after linking: always lui + addi
+    relocated = {i for i, _, expr in loads if symbols.relocation(expr)}
+
+    label_index = {name: pc // 4 for pc, names in text_labels.items() for name in names}
+    sizes = [1] * len(clean_lines)
+    for i in relocated:
+        sizes[i] = 2
+    while True:
+        starts = [0]
+        for size in sizes:
+            starts.append(starts[-1] + size)
+        for name, index in label_index.items():
+            symbols.set_label(name, starts[index] * 4)
+        changed = False
+        for i, rd, expr in loads:
+            if i in relocated:
+                continue
+            try:
+                size = len(li_sequence(rd, symbols.evaluate(expr)))
+            except Exception:
+                size = 2   # Reported when the value is emitted
+            if size > sizes[i]:
+                sizes[i] = size
+                changed = True
+        if not changed:
+            break
+
+    values = {i: parse_imm(expr, symbols) for i, _, expr in loads}
+    expanded = {i: li_sequence(rd, values[i], sizes[i]) for i, rd, _ in loads}
+    for i, rd, expr in loads:
+        if i in relocated:
+            expr = expr.replace(' ', '')   # Operands are split on whitespace
+            expanded[i] = [f"lui {rd}, %hi(({expr})+0x800)", f"addi {rd}, {rd}, %lo({expr})"]
+    new_lines = []
+    for i, (_, line, source) in enumerate(clean_lines):
+        for real in expanded.get(i, (line,)):
+            new_lines.append((len(new_lines) * 4, real, source))
+    new_labels = {}
+    for name, index in label_index.items():
+        new_labels.setdefault(starts[index] * 4, []).append(name)
+    return new_lines, new_labels, [(expr, values[i]) for i, _, expr in loads]
+
+# Data section layout (.data is loaded into D_mem, which is mapped at address 0)
+DATA_BASE = 0x00000000
+DMEM_BYTES = 2048   # D_mem.v: 512 words
+
+# Data directive -> element size in bytes
+DATA_SIZES = {'.word': 4, '.half': 2, '.byte': 1}
+
+def data_directive(directive, args, offset, symbols):
+    """
+    Lay out one .data directive at `offset`.
+    Returns (item, new offset); item is (offset, element size, value exprs, repeat)
+    or None for pure padding.
+    """
+    if directive in DATA_SIZES:
+        size = DATA_SIZES[directive]
+        return (offset, size, args, 1), offset + size * len(args)
+    if directive == '.space':
+        # .space N[, FILL]
+        count = symbols.evaluate(args[0])
+        return (offset, 1, args[1:2] or ['0'], count), offset + count
+    if directive == '.fill':
+        # .fill REPEAT[, SIZE[, VALUE]]
+        count = symbols.evaluate(args[0])
+        size = symbols.evaluate(args[1]) if len(args) > 1 else 1
+        if size not in (1, 2, 4):
+            raise ValueError(f".fill size must be 1, 2 or 4 (got {size})")
+        return (offset, size, args[2:3] or ['0'], count), offset + size * count
+    if directive == '.align':
+        # .align N -> 2^N byte boundary
+        align = 1 << symbols.evaluate(args[0])
+        return None, (offset + align - 1) // align * align
+    raise ValueError(f"Unsupported directive in .data: {directive}")
+
+def build_data_image(items, size, symbols):
+    """Fill the .data image. Returns little-endian words, trailing zero words dropped."""
+    image = bytearray(size + (-size % 4))
+    for offset, elem_size, exprs, repeat in items:
+        mask = (1 << (8 * elem_size)) - 1
+        chunk = b''.join((parse_imm(e, symbols) & mask).to_bytes(elem_size, 'little') for e in exprs)
+        image[offset:offset + len(chunk) * repeat] = chunk * repeat
+        if symbols.relocatable:
+            for i, e in enumerate(exprs):
+                target = symbols.relocation(e)
+                if target is None:
+                    continue
+                if elem_size != 4:
+                    raise ValueError(f"Address '{e}' in .data needs .word")
+                for r in range(repeat):
+                    symbols.relocs.append(('data', offset + (r * len(exprs) + i) * 4, 'ABS32', *target))
+    words = [int.from_bytes(image[i:i + 4], 'little') for i in range(0, len(image), 4)]
+    while words and words[-1] == 0:
+        words.pop()   # D_mem starts out zeroed
+    return words
+
+# --- Load-use scheduling (--schedule) ---
+# The core stalls one cycle when the instruction right after a load reads the
+# loaded register (Forwarding_Unit stall_FU). Within each basic block, the
+# scheduler reorders independent instructions to put something else in that
+# slot. Control flow, system and PC-relative instructions never move.
+
+def sched_info(line, symbols):
+    """
+    Classify an instruction for scheduling.
+    Returns (kind, defs, uses); kind is 'alu', 'load', 'store' (movable),
+    'end' (control flow, ends a block) or 'fixed' (stays in place).
+    """
+    parts = line.replace(',', ' ').split()
+    op, ops = parts[0], parts[1:]
+    desc = INSTRUCTIONS.get(op)
+    if desc is None or len(ops) < desc[4]:
+        return 'fixed', frozenset(), frozenset()
+    fmt = desc[0]
+    reg = lambda o: parse_reg(o, symbols)
+    mem = MEM_RE.match(ops[1]) if fmt in ('LOAD', 'S') else None
+    
+    if fmt == 'R':
+        kind, defs, uses = 'alu', {reg(ops[0])}, {reg(ops[1]), reg(ops[2])}
+    elif fmt in ('I', 'SHIFT'):
+        kind, defs, uses = 'alu', {reg(ops[0])}, {reg(ops[1])}
+    elif fmt == 'U' and op == 'lui':
+        kind, defs, uses = 'alu', {reg(ops[0])}, set()
+    elif fmt == 'LOAD' and mem:
+        kind, defs, uses = 'load', {reg(ops[0])}, {reg(mem.group(2))}
+    elif fmt == 'S' and mem:
+        kind, defs, uses = 'store', set(), {reg(ops[0]), reg(mem.group(2))}
+    elif fmt == 'B':
+        kind, defs, uses = 'end', set(), {reg(ops[0]), reg(ops[1])}
+    elif fmt == 'BZ':
+        kind, defs, uses = 'end', set(), {reg(ops[0])}
+    elif fmt == 'JALR':
+        base = MEM_RE.match(ops[1])
+        kind, defs, uses = 'end', set(), {reg(base.group(2) if base else ops[1])}
+    elif op == 'ret':
+        kind, defs, uses = 'end', set(), {1}
+    elif fmt in ('J', 'J0') or op in ('ecall', 'ebreak'):
+        kind, defs, uses = 'end', set(), set()
+    elif fmt == 'CSR':
+        kind, defs, uses = 'fixed', {reg(ops[0])}, {reg(ops[2])}
+    else:
+        kind, defs, uses = 'fixed', set(), set()   # auipc, fence, .word
+    return kind, frozenset(defs) - {0}, frozenset(uses) - {0}
+
+def load_use(a, b):
+    """True if b right after a stalls the pipeline."""
+    return a is not None and b is not None and a[0] == 'load' and bool(a[1] & b[2])
+
+def count_load_use(infos):
+    return sum(load_use(a, b) for a, b in zip(infos, infos[1:]))
+
+def schedule_segment(seg, prev, nxt):
+    """
+    List-schedule one run of movable instructions (indices into `seg`, a list
+    of infos) between `prev` and `nxt`. Returns the new order, or None if it
+    does not remove any load-use hazard.
+    """
+    n = len(seg)
+    succs = [[] for _ in range(n)]
+    preds = [0] * n
+    for i in range(n):
+        ki, di, ui = seg[i]
+        for j in range(i + 1, n):
+            kj, dj, uj = seg[j]
+            if (di & uj) or (ui & dj) or (di & dj) or \
+               ('store' in (ki, kj) and ki != 'alu' and kj != 'alu'):
+                succs[i].append(j)
+                preds[j] += 1
+    
+    order = []
+    ready = [i for i in range(n) if preds[i] == 0]
+    last = prev
+    while ready:
+        # No stall first, then loads as early as possible, then source order
+        pick = min(ready, key=lambda i: (load_use(last, seg[i]), seg[i][0] != 'load', i))
+        ready.remove(pick)
+        order.append(pick)
+        last = seg[pick]
+        for j in succs[pick]:
+            preds[j] -= 1
+            if preds[j] == 0:
+                ready.append(j)
     
-    # Pass 1: Find Labels, Constants, and Clean
+    before = count_load_use([prev] + seg + [nxt])
+    after = count_load_use([prev] + [seg[i] for i in order] + [nxt])
+    return order if after < before else None
+
+def schedule_load_use(clean_lines, block_starts, symbols):
+    """
+    Reorder instructions inside basic blocks to avoid load-use stalls.
+    Labels keep their addresses (blocks only permute their own slots).
+    Returns (new clean_lines, hazards before, hazards after).
+    """
+    infos = [sched_info(line, symbols) for _, line, _ in clean_lines]
+    before = count_load_use(infos)
+    lines = [(line, source) for _, line, source in clean_lines]
+    
+    start = 0
+    for i in range(len(clean_lines) + 1):
+        # A segment ends at a label, a control-flow/fixed instruction or the end
+        boundary = i == len(clean_lines) or clean_lines[i][0] in block_starts or infos[i][0] in ('end', 'fixed')
+        if not boundary:
+            continue
+        if i - start >= 2:
+            prev = infos[start - 1] if start > 0 else None
+            nxt = infos[i] if i < len(infos) else None
+            order = schedule_segment(infos[start:i], prev, nxt)
+            if order:
+                seg_lines = lines[start:i]
+                seg_infos = infos[start:i]
+                lines[start:i] = [seg_lines[k] for k in order]
+                infos[start:i] = [seg_infos[k] for k in order]
+        start = i + 1 if i < len(clean_lines) and infos[i][0] in ('end', 'fixed') else i
+    
+    scheduled = [(pc, line, source) for (pc, _, _), (line, source) in zip(clean_lines, lines)]
+    return scheduled, before, count_load_use(infos)
+
+# --- Profile-guided branch layout (--profile) ---
+# There is no branch predictor: every taken branch or jump flushes the two
+# younger instructions (PC_sel_Unit). Given per-branch taken/not-taken counts
+# (retire_trace.py --profile), basic blocks are chained so the most frequent
+# successor of each block falls through. Branch conditions are inverted, and
+# jumps added or removed, to keep the original control flow.
+
+INVERTED_BRANCH = {'beq': 'bne', 'bne': 'beq', 'blt': 'bge', 'bge': 'blt',
+                   'bltu': 'bgeu', 'bgeu': 'bltu'}
+
+def load_profile(path):
+    """Read a branch profile: {pc: (taken, not_taken)}."""
+    with open(path) as f:
+        branches = json.load(f)['branches']
+    return {int(pc, 0): (counts[0], counts[1]) for pc, counts in branches.items()}
+
+class Block:
+    """A basic block for layout: labels, instruction lines and how it ends."""
+
+    def __init__(self, index, pc):
+        self.index = index
+        self.pc = pc            # Original PC of the first instruction
+        self.labels = []
+        self.lines = []
+        self.sources = []       # Source line of each instruction
+        self.end = None         # 'cond', 'jump', 'free' (no fall-through) or None (falls through)
+        self.target = None      # Branch/jump target label
+        self.term_pc = None     # Original PC of the branch/jump
+
+def split_blocks(clean_lines, text_labels, symbols):
+    """Split .text into basic blocks (labels start one, control flow ends one)."""
+    blocks = []
+    block = None
+    for pc, line, source in clean_lines:
+        if block is None or pc in text_labels or block.end is not None:
+            block = Block(len(blocks), pc)
+            blocks.append(block)
+        block.labels.extend(text_labels.get(pc, []))
+        block.lines.append(line)
+        block.sources.append(source)
+
+        parts = line.replace(',', ' ').split()
+        op, ops = parts[0], parts[1:]
+        fmt = INSTRUCTIONS.get(op, (None,))[0]
+        if fmt == 'B' and len(ops) >= 3:
+            block.end, block.target = 'cond', ops[2]
+        elif fmt == 'BZ' and len(ops) >= 2:
+            block.end, block.target = 'cond', ops[1]
+        elif fmt == 'J0' and ops:
+            block.end, block.target = 'jump', ops[0]
+        elif fmt == 'J' and len(ops) >= 2 and parse_reg(ops[0], symbols) == 0:
+            block.end, block.target = 'jump', ops[1]
+        elif op == 'ret' or (fmt == 'JALR' and ops and parse_reg(ops[0], symbols) == 0):
+            block.end = 'free'
+        # Calls (jal/jalr with a link register), ecall and ebreak keep their
+        # fall-through block
+        if block.end:
+            block.term_pc = pc
+    # Labels that point past the last instruction
+    end_labels = text_labels.get(clean_lines[-1][0] + 4 if clean_lines else 0, [])
+    return blocks, end_labels
+
+def layout_blocks(blocks, profile, label_block):
+    """
+    Chain blocks along their hottest edges (Pettis-Hansen style).
+    Returns the block order; the entry block stays first.
+    """
+    chain_of = {b.index: [b.index] for b in blocks}
+
+    def merge(a, b):
+        ca, cb = chain_of[a], chain_of[b]
+        if ca is cb or ca[-1] != a or cb[0] != b or cb[0] == 0:
+            return
+        ca.extend(cb)
+        for i in cb:
+            chain_of[i] = ca
+
+    # Fall-through that must be kept
+    for b in blocks[:-1]:
+        if b.end is None:
+            merge(b.index, b.index + 1)
+
+    # Hottest transitions first
+    edges = []
+    for b in blocks:
+        taken, not_taken = profile.get(b.term_pc, (0, 0))
+        target = label_block.get(b.target)
+        if b.end in ('cond', 'jump') and target is not None and taken:
+            edges.append((taken, b.index, target))
+        if b.end == 'cond' and b.index + 1 < len(blocks) and not_taken:
+            edges.append((not_taken, b.index, b.index + 1))
+    for _, a, b in sorted(edges, key=lambda e: (-e[0], e[1])):
+        merge(a, b)
+
+    # Keep the source order wherever the profile has no opinion
+    for b in blocks[:-1]:
+        merge(b.index, b.index + 1)
+
+    chains = []
+    for b in blocks:
+        chain = chain_of[b.index]
+        if chain[0] == b.index:
+            chains.append(chain)
+    return [blocks[i] for chain in chains for i in chain]
+
+def branch_layout(clean_lines, text_labels, symbols, profile, loads=()):
+    """
+    Reorder basic blocks by profile. Returns (clean_lines, text_labels,
+    taken transfers before, after); the input is returned unchanged if the
+    program cannot be laid out safely. loads are the (expression, value)
+    pairs already expanded from li/la, which must not change.
+    """
+    blocks, end_labels = split_blocks(clean_lines, text_labels, symbols)
+    label_block = {name: b.index for b in blocks for name in b.labels}
+
+    # Only direct branches/jumps to known .text labels can be re-targeted
+    for b in blocks:
+        if b.end in ('cond', 'jump') and b.target not in label_block:
+            print(f"Branch layout skipped: target '{b.target}' at PC={b.term_pc} is not a .text label")
+            return clean_lines, text_labels, 0, 0
+    branch_pcs = {b.term_pc for b in blocks if b.end in ('cond', 'jump')}
+    unknown = [pc for pc in profile if pc not in branch_pcs]
+    if unknown:
+        print(f"Branch layout warning: {len(unknown)} profile entries are not branches in this program (stale profile?)")
+
+    order = layout_blocks(blocks, profile, label_block)
+    position = {b.index: i for i, b in enumerate(order)}
+    before = after = 0
+
+    def label_of(b):
+        if not b.labels:
+            b.labels.append(f".Lpgo{b.index}")
+            label_block[b.labels[0]] = b.index
+        return b.labels[0]
+
+    for i, b in enumerate(order):
+        taken, not_taken = profile.get(b.term_pc, (0, 0))
+        nxt = order[i + 1].index if i + 1 < len(order) else None
+        fall = b.index + 1 if b.index + 1 < len(blocks) else None
+        target = label_block.get(b.target)
+
+        if b.end == 'cond':
+            before += taken
+            if nxt == fall:
+                after += taken
+            elif nxt == target and fall is not None:
+                # Hot path is the target: invert so it falls through
+                parts = b.lines[-1].replace(',', ' ').split()
+                op, ops = parts[0], parts[1:]
+                if op == 'bnez':
+                    op, ops = 'bne', [ops[0], 'x0', ops[1]]
+                b.lines[-1] = f"{INVERTED_BRANCH[op]} {ops[0]}, {ops[1]}, {label_of(blocks[fall])}"
+                after += not_taken
+            else:
+                after += taken
+                if fall is not None:
+                    b.lines.append(f"j {label_of(blocks[fall])}")
+                    b.sources.append(b.sources[-1])
+                    after += not_taken
+        elif b.end == 'jump':
+            before += taken
+            if nxt == target:
+                b.lines.pop()   # Target now follows directly
+                b.sources.pop()
+            else:
+                after += taken
+        elif b.end is None and fall is not None and nxt != fall:
+            raise AssertionError("fall-through block was separated")
+
+    new_lines = []
+    new_labels = {}
+    pc = 0
+    for b in order:
+        if b.labels:
+            new_labels.setdefault(pc, []).extend(b.labels)
+        for line, source in zip(b.lines, b.sources):
+            new_lines.append((pc, line, source))
+            pc += 4
+    if end_labels:
+        new_labels.setdefault(pc, []).extend(end_labels)
+
+    # B-type offsets reach +-4 KiB; keep the original layout if any would not fit
+    addr = {name: pc for pc, names in new_labels.items() for name in names}
+    for pc, line, _ in new_lines:
+        parts = line.replace(',', ' ').split()
+        fmt = INSTRUCTIONS.get(parts[0], (None,))[0]
+        if fmt in ('B', 'BZ') and not -4096 <= addr[parts[-1]] - pc < 4096:
+            print(f"Branch layout skipped: branch at PC={pc} would be out of range")
+            return clean_lines, text_labels, 0, 0
+
+    # li/la of a .text address was expanded with the old address
+    moved = SymbolTable()
+    moved.constants = symbols.constants
+    moved.labels = {**symbols.labels, **addr}
+    for expr, value in loads:
+        try:
+            if moved.evaluate(expr) != value:
+                raise ValueError
+        except Exception:
+            print(f"Branch layout skipped: 'li/la {expr}' depends on a .text address that would move")
+            return clean_lines, text_labels, 0, 0
+
+    return new_lines, new_labels, before, after
+
+def assemble_lines(lines, schedule=False, profile=None, symbols=None, listing=None):
+    """
+    Assemble source lines. Returns (text words, .data image words).
+    schedule=True reorders instructions to avoid load-use stalls; profile
+    ({pc: (taken, not_taken)}, see load_profile) enables branch layout.
+    An ObjectSymbols table assembles a relocatable object (assemble_object).
+    A listing list receives (pc, word, source line number, instruction) for
+    every word (see write_map).
+    """
+    symbols = symbols if symbols is not None else SymbolTable()
+    lines, numbers = preprocess(lines)
+    clean_lines = []   # (PC, instruction, source line number)
+    text_labels = {}   # PC -> .text labels defined there (basic block boundaries)
+    load_lines = []    # Indices of li/la in clean_lines
+    data_items = []
+    data_size = 0
+    
+    # Pass 1: Find Labels, Constants, Data Layout, and Clean
     pc = 0
-    for line in lines:
+    section = '.text'
+    for index, line in enumerate(lines):
         # Remove both // and # comments
         line = line.split('//')[0].split('#')[0].strip()
         if not line: continue
         
         # Handle .eqv constants
         # Format: .eqv NAME VALUE
+        # Constants are resolved by token when operands are evaluated
         if line.startswith('.eqv'):
             parts = line.split()
             if len(parts) >= 3:
                 name = parts[1].replace(',', '')
                 val = " ".join(parts[2:]) # Take rest of line as value
-                constants[name] = val
+                symbols.define(name, val)
             continue
 
-        # Substitute constants (naive string replace)
-        for name, val in constants.items():
-            # word boundary check would be better, but simple replace suffices for now
-            if name in line:
-                 line = line.replace(name, val)
-
-        if line.startswith('.'): continue # Ignore other directives
+        # Section switches: .text / .data / .section .text|.data
+        parts = line.split()
+        if parts[0] in ('.globl', '.global'):
+            symbols.globals.update(n for n in line[len(parts[0]):].replace(',', ' ').split())
+            continue
+        if parts[0] == '.section' and len(parts) > 1:
+            parts = parts[1:]
+        if parts[0] in ('.text', '.data'):
+            section = parts[0]
+            continue
         
         if ':' in line:
             label, rest = line.split(':')
-            labels[label.strip()] = pc
+            if section == '.text':
+                symbols.labels[label.strip()] = pc
+                text_labels.setdefault(pc, []).append(label.strip())
+            else:
+                symbols.labels[label.strip()] = DATA_BASE + data_size
+                symbols.data_labels.add(label.strip())
             line = rest.strip()
+            if not line: continue
+            parts = line.split()
         
-        if line:
-            clean_lines.append((pc, line))
-            pc += 4  # 4 bytes per instruction
+        if section == '.data':
+            directive, _, rest = line.replace('\t', ' ').partition(' ')
+            args = [a.strip() for a in rest.split(',') if a.strip()]
+            try:
+                if not directive.startswith('.'):
+                    raise ValueError(f"Instruction in .data section: {directive}")
+                if directive in ('.type', '.size'):
+                    continue
+                item, data_size = data_directive(directive, args, data_size, symbols)
+            except Exception as e:
+                print(f"Error in .data at offset {data_size}: {line}")
+                print(f"  Exception: {e}")
+                raise
+            if item:
+                data_items.append(item)
+            continue
+        
+        if line.startswith('.') and not line.startswith('.word'):
+            continue # Ignore other directives in .text
+        
+        op = parts[0]
+        if op in PSEUDO_OPS:
+            line = expand_pseudo(line)
+        elif op in LOAD_CONSTANT_OPS and op != line:
+            load_lines.append(len(clean_lines))
+        clean_lines.append((pc, line, numbers[index]))
+        pc += 4  # 4 bytes per instruction
+
+    if data_size > DMEM_BYTES:
+        # Nothing past D_mem is loaded, and stores there are dropped
+        raise ValueError(f".data is {data_size} bytes; D_mem holds {DMEM_BYTES}")
+    symbols.data_size = data_size
+
+    # li/la expand to 1 or 2 instructions; labels after them move
+    clean_lines, text_labels, loads = expand_constants(clean_lines, text_labels, symbols, load_lines)
 
-    # Pass 2: Assemble
-    hex_output = []
+    if profile is not None and symbols.relocatable:
+        raise ValueError("Branch layout needs the linked program (no --profile with --object)")
+    if profile is not None:
+        clean_lines, text_labels, before, after = branch_layout(clean_lines, text_labels, symbols, profile, loads)
+        for pc, names in text_labels.items():
+            for name in names:
+                symbols.set_label(name, pc)
+        print(f"Branch layout: {before} -> {after} taken branches/jumps (profile)")
+
+    if schedule:
+        clean_lines, before, after = schedule_load_use(clean_lines, set(text_labels), symbols)
+        print(f"Scheduled: {before - after} of {before} load-use hazards eliminated")
+
+    # Pass 2: Assemble (one table lookup per line)
+    words = []
     
-    for pc, line in clean_lines:
+    for pc, line, source in clean_lines:
         parts = line.replace(',', ' ').split()
         if not parts: continue
         op = parts[0]
-        mach_code = 0
         
         try:
-            # Define expected operand counts for better error messages
-            operand_counts = {
-                'add': 3, 'sub': 3, 'and': 3, 'or': 3, 'xor': 3,
-                'sll': 3, 'srl': 3, 'sra': 3, 'slt': 3, 'sltu': 3,
-                'addi': 3, 'slti': 3, 'sltiu': 3, 'xori': 3, 'ori': 3, 'andi': 3,
-                'slli': 3, 'srli': 3, 'srai': 3,
-                'lw': 2, 'lh': 2, 'lb': 2, 'lhu': 2, 'lbu': 2,
-                'sw': 2, 'sh': 2, 'sb': 2,
-                'beq': 3, 'bne': 3, 'blt': 3, 'bge': 3, 'bltu': 3, 'bgeu': 3, 'bnez': 2,
-                'jal': 2, 'jalr': 2,  # Can be 2 or 3
-                'lui': 2, 'auipc': 2,
-            }
-            
-            # Check operand count if we know what to expect
-            if op in operand_counts:
-                expected = operand_counts[op]
-                actual = len(parts) - 1  # Subtract opcode
-                if actual < expected:
-                    print(f"ERROR: Missing operands for '{op}' at PC={pc}")
-                    print(f"       Expected {expected} operands, found {actual}")
-                    print(f"       Line: {line}")
-                    raise ValueError(f"Incomplete instruction: {op}")
-            
-            if op == 'li': 
-                pass 
-                
-            if op == 'addi': 
-                # addi rd, rs1, imm
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (0 << 12) | (rd << 7) | 0x13
-                
-            elif op == 'add':
-                # add rd, rs1, rs2
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (0 << 12) | (rd << 7) | 0x33
-
-            elif op == 'sw':
-                # sw rs2, imm(rs1) OR sw rs2, offset(rs1)
-                rs2 = parse_reg(parts[1])
-                offset_str = parts[2]
-                
-                # Regex for offset(base)
-                match = re.match(r'(.+)\((.+)\)', offset_str)
-
-                if match:
-                    imm = parse_imm(match.group(1))
-                    rs1 = parse_reg(match.group(2))
-                    imm11_5 = (imm >> 5) & 0x7F
-                    imm4_0 = imm & 0x1F
-                    mach_code = (imm11_5 << 25) | (rs2 << 20) | (rs1 << 15) | (2 << 12) | (imm4_0 << 7) | 0x23
-
-            elif op == 'lw':
-                rd = parse_reg(parts[1])
-                offset_str = parts[2]
-                match = re.match(r'(.+)\((.+)\)', offset_str)
-                if match:
-                    imm = parse_imm(match.group(1))
-                    rs1 = parse_reg(match.group(2))
-                    mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (2 << 12) | (rd << 7) | 0x03
-
-            elif op == 'slli':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                shamt = parse_imm(parts[3])
-                mach_code = (0 << 25) | (shamt << 20) | (rs1 << 15) | (1 << 12) | (rd << 7) | 0x13
-            
-            elif op == 'srli':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                shamt = parse_imm(parts[3])
-                mach_code = (0 << 25) | (shamt << 20) | (rs1 << 15) | (5 << 12) | (rd << 7) | 0x13
-            
-            elif op == 'sub':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0x20 << 25) | (rs2 << 20) | (rs1 << 15) | (0 << 12) | (rd << 7) | 0x33
-
-            elif op == 'beq':
-                # beq rs1, rs2, label
-                rs1 = parse_reg(parts[1])
-                rs2 = parse_reg(parts[2])
-                label = parts[3]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (0 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-                else:
-                    print(f"Error: Label '{label}' not found for beq at PC={pc}")
-
-            elif op == 'bne':
-                # bne rs1, rs2, label
-                rs1 = parse_reg(parts[1])
-                rs2 = parse_reg(parts[2])
-                label = parts[3]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (1 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-                else:
-                    print(f"Error: Label '{label}' not found for bne at PC={pc}")
-
-            elif op == 'bnez':
-                # bnez rs1, label -> bne rs1, x0, label
-                rs1 = parse_reg(parts[1])
-                label = parts[2]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (0 << 20) | (rs1 << 15) | (1 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-                else:
-                    print(f"Warning: Label {label} not found")
-
-            elif op == 'blt':
-                rs1 = parse_reg(parts[1])
-                rs2 = parse_reg(parts[2])
-                label = parts[3]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (4 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-
-            elif op == 'bge':
-                rs1 = parse_reg(parts[1])
-                rs2 = parse_reg(parts[2])
-                label = parts[3]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (5 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-            
-            elif op == 'bltu':
-                rs1 = parse_reg(parts[1])
-                rs2 = parse_reg(parts[2])
-                label = parts[3]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (6 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-            
-            elif op == 'bgeu':
-                rs1 = parse_reg(parts[1])
-                rs2 = parse_reg(parts[2])
-                label = parts[3]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm12 = (offset >> 12) & 1
-                    imm10_5 = (offset >> 5) & 0x3F
-                    imm4_1 = (offset >> 1) & 0xF
-                    imm11 = (offset >> 11) & 1
-                    mach_code = (imm12 << 31) | (imm10_5 << 25) | (rs2 << 20) | (rs1 << 15) | (7 << 12) | (imm4_1 << 8) | (imm11 << 7) | 0x63
-
-            elif op == 'j':
-                label = parts[1]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm20 = (offset >> 20) & 1
-                    imm10_1 = (offset >> 1) & 0x3FF
-                    imm11 = (offset >> 11) & 1
-                    imm19_12 = (offset >> 12) & 0xFF
-                    mach_code = (imm20 << 31) | (imm10_1 << 21) | (imm11 << 20) | (imm19_12 << 12) | (0 << 7) | 0x6F
-
-            elif op == 'jal':
-                rd = parse_reg(parts[1])
-                label = parts[2]
-                if label in labels:
-                    target = labels[label]
-                    offset = target - pc
-                    imm20 = (offset >> 20) & 1
-                    imm10_1 = (offset >> 1) & 0x3FF
-                    imm11 = (offset >> 11) & 1
-                    imm19_12 = (offset >> 12) & 0xFF
-                    mach_code = (imm20 << 31) | (imm10_1 << 21) | (imm11 << 20) | (imm19_12 << 12) | (rd << 7) | 0x6F
-                
-            elif op == 'ret':
-                mach_code = 0x00008067
-                
-            elif op == 'xor':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (4 << 12) | (rd << 7) | 0x33
-
-            elif op == 'andi':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (7 << 12) | (rd << 7) | 0x13
-
-            elif op == 'ori':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (6 << 12) | (rd << 7) | 0x13
-
-            elif op == 'or':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (6 << 12) | (rd << 7) | 0x33
-            
-            elif op == 'lui':
-                rd = parse_reg(parts[1])
-                imm_val = parse_imm(parts[2])
-                mach_code = (to_hex(imm_val, 20) << 12) | (rd << 7) | 0x37
-
-            elif op == 'jalr':
-                rd = parse_reg(parts[1])
-                # Support both: jalr rd, imm(rs1) and jalr rd, rs1, imm
-                if len(parts) == 3:
-                    # Format: jalr rd, offset(rs1)
-                    match = re.match(r'(.+)\((.+)\)', parts[2])
-                    if match:
-                        imm = parse_imm(match.group(1))
-                        rs1 = parse_reg(match.group(2))
-                    else:
-                        # jalr rd, rs1 (implicit imm=0)
-                        rs1 = parse_reg(parts[2])
-                        imm = 0
-                else:
-                    # Format: jalr rd, rs1, imm
-                    rs1 = parse_reg(parts[2])
-                    imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (0 << 12) | (rd << 7) | 0x67
-
-            elif op == 'auipc':
-                rd = parse_reg(parts[1])
-                imm_val = parse_imm(parts[2])
-                mach_code = (to_hex(imm_val, 20) << 12) | (rd << 7) | 0x17
-            
-            elif op == 'fence':
-                # Simplified FENCE (pred=succ=PIPO)
-                mach_code = 0x0FF0000F
-            
-            elif op == 'ecall':
-                mach_code = 0x00000073
-
-            elif op == 'ebreak':
-                mach_code = 0x00100073
-
-            elif op == 'csrrw':
-                rd = parse_reg(parts[1])
-                csr = parse_imm(parts[2])
-                rs1 = parse_reg(parts[3])
-                mach_code = (csr << 20) | (rs1 << 15) | (1 << 12) | (rd << 7) | 0x73
-
-            elif op == 'csrrs':
-                rd = parse_reg(parts[1])
-                csr = parse_imm(parts[2])
-                rs1 = parse_reg(parts[3])
-                mach_code = (csr << 20) | (rs1 << 15) | (2 << 12) | (rd << 7) | 0x73
-            
-            # --- LOGIC & SHIFTS (R-Type) ---
-            elif op == 'and':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (7 << 12) | (rd << 7) | 0x33
-
-            elif op == 'sll':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (1 << 12) | (rd << 7) | 0x33
-
-            elif op == 'srl':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (5 << 12) | (rd << 7) | 0x33
-
-            elif op == 'sra':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0x20 << 25) | (rs2 << 20) | (rs1 << 15) | (5 << 12) | (rd << 7) | 0x33
-            
-            # --- COMPARE (R-Type) ---
-            elif op == 'slt':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (2 << 12) | (rd << 7) | 0x33
-
-            elif op == 'sltu':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                rs2 = parse_reg(parts[3])
-                mach_code = (0 << 25) | (rs2 << 20) | (rs1 << 15) | (3 << 12) | (rd << 7) | 0x33
-
-            # --- LOGIC & SHIFTS (I-Type) ---
-            elif op == 'xori':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (4 << 12) | (rd << 7) | 0x13
-            
-            elif op == 'slti':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (2 << 12) | (rd << 7) | 0x13
-
-            elif op == 'sltiu':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                imm = parse_imm(parts[3])
-                mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (3 << 12) | (rd << 7) | 0x13
-            
-            elif op == 'srai':
-                rd = parse_reg(parts[1])
-                rs1 = parse_reg(parts[2])
-                shamt = parse_imm(parts[3])
-                mach_code = (0x20 << 25) | (shamt << 20) | (rs1 << 15) | (5 << 12) | (rd << 7) | 0x13
-
-            # --- LOADS (I-Type) ---
-            elif op in ['lb', 'lh', 'lbu', 'lhu']:
-                rd = parse_reg(parts[1])
-                match = re.match(r'(.+)\((.+)\)', parts[2])
-                if match:
-                    imm = parse_imm(match.group(1))
-                    rs1 = parse_reg(match.group(2))
-                    # funct3 mapping
-                    f3 = 0
-                    if op == 'lh': f3 = 1
-                    if op == 'lbu': f3 = 4
-                    if op == 'lhu': f3 = 5
-                    if op == 'lb': f3 = 0
-                    mach_code = (to_hex(imm, 12) << 20) | (rs1 << 15) | (f3 << 12) | (rd << 7) | 0x03
-
-            # --- STORES (S-Type) ---
-            elif op in ['sb', 'sh']:
-                rs2 = parse_reg(parts[1])
-                match = re.match(r'(.+)\((.+)\)', parts[2])
-                if match:
-                    imm = parse_imm(match.group(1))
-                    rs1 = parse_reg(match.group(2))
-                    f3 = 0
-                    if op == 'sh': f3 = 1
-                    if op == 'sb': f3 = 0
-                    imm11_5 = (imm >> 5) & 0x7F
-                    imm4_0 = imm & 0x1F
-                    mach_code = (imm11_5 << 25) | (rs2 << 20) | (rs1 << 15) | (f3 << 12) | (imm4_0 << 7) | 0x23
-
-            
-            elif op == '.word':
-                val = parse_imm(parts[1])
-                mach_code = val & 0xFFFFFFFF
-            
-            else:
+            entry = ENCODING.get(op)
+            if entry is None:
                 # Unrecognized instruction!
                 print(f"ERROR: Unrecognized instruction '{op}' at PC={pc}: {line}")
                 print(f"       This instruction is not supported by the assembler.")
                 raise ValueError(f"Unsupported instruction: {op}")
+            
+            encode, base, expected = entry
+            ops = parts[1:]
+            if len(ops) < expected:
+                print(f"ERROR: Missing operands for '{op}' at PC={pc}")
+                print(f"       Expected {expected} operands, found {len(ops)}")
+                print(f"       Line: {line}")
+                raise ValueError(f"Incomplete instruction: {op}")
+            
+            mach_code = encode(base, ops, pc, symbols)
+            if symbols.relocatable:
+                record_relocation(symbols, pc, op, ops)
 
         except Exception as e:
             print(f"Error assembling line at PC={pc}: {line}")
             print(f"  Exception: {e}")
             raise  # Re-raise to stop assembly
             
-        hex_output.append(f"{mach_code:08x}")
+        words.append(mach_code)
+        if listing is not None:
+            listing.append((pc, mach_code, source, line))
+
+    return words, build_data_image(data_items, data_size, symbols)
 
+def write_hex(words, output_file):
     with open(output_file, 'w') as f:
-        for h in hex_output:
-            f.write(h + '\n')
-    print(f"Assembled {len(hex_output)} instructions to {output_file}")
+        f.write(''.join(f"{w:08x}\n" for w in words))
+
+def write_binary(words, output_file):
+    """Raw little-endian image, which the simulator mmaps and copies as-is."""
+    with open(output_file, 'wb') as f:
+        f.write(struct.pack(f'<{len(words)}I', *words))
+
+def data_image_path(hex_path):
+    """Where the .data image of a program lives: prog.hex -> prog.data.hex"""
+    return os.path.splitext(hex_path)[0] + '.data.hex'
+
+def binary_path(hex_path):
+    """Where the binary image of a hex image lives: prog.hex -> prog.bin, prog.data.hex -> prog.data.bin"""
+    return os.path.splitext(hex_path)[0] + '.bin'
+
+def write_images(words, data, output_file, data_file):
+    """
+    Write the I_mem image (output_file + its .bin) and, if there is a
+    .data section, the D_mem image (data_file + its .bin). Images left
+    over from an earlier build without .data are removed.
+    """
+    write_hex(words, output_file)
+    write_binary(words, binary_path(output_file))
+    if data:
+        write_hex(data, data_file)
+        write_binary(data, binary_path(data_file))
+        print(f"Wrote {len(data)} data words to {data_file}")
+    else:
+        for path in (data_file, binary_path(data_file)):
+            if os.path.exists(path):
+                os.remove(path)   # Stale image from an earlier build
+
+def map_path(hex_path):
+    """Where the map of a program lives: prog.hex -> prog.map.json"""
+    return os.path.splitext(hex_path)[0] + '.map.json'
+
+def listing_path(hex_path):
+    """Where the listing of a program lives: prog.hex -> prog.lst"""
+    return os.path.splitext(hex_path)[0] + '.lst'
+
+# --- Program map and listing (--map) ---
+# The map is JSON: source files, section sizes, labels and the source line of
+# every .text word. riscv_disasm.SourceMap reads it for the disassembler, the
+# VCD analyzer and the retire trace / performance reports.
+MAP_VERSION = 1
+
+def program_map(files, lines, labels, text_size, data_size):
+    """
+    Map of a program. lines holds [file index, line number] for each .text
+    word; labels are (address, name, section) tuples.
+    """
+    return {
+        'version': MAP_VERSION,
+        'files': files,
+        'sections': {'text': [0, text_size], 'data': [DATA_BASE, data_size]},   # [address, bytes]
+        'symbols': sorted([address, name, section] for address, name, section in labels),
+        'lines': lines,
+    }
+
+def symbol_list(symbols):
+    """(address, name, section) of every label in a symbol table."""
+    return [(address, name, 'data' if name in symbols.data_labels else 'text')
+            for name, address in symbols.labels.items()]
+
+def write_map(prog_map, path):
+    with open(path, 'w') as f:
+        json.dump(prog_map, f, separators=(',', ':'))
+
+def write_listing(listing, prog_map, path):
+    """
+    Listing from assemble_lines(listing=...): PC, word, source line and
+    instruction for every word, labels in place, then the symbol table.
+    """
+    labels = {}
+    for address, name, section in prog_map['symbols']:
+        if section == 'text':
+            labels.setdefault(address, []).append(name)
+    text_size = prog_map['sections']['text'][1]
+    data_size = prog_map['sections']['data'][1]
+    out = [f"; {', '.join(prog_map['files'])}: .text {text_size} bytes, .data {data_size} bytes",
+           f"; {'PC':<8}  {'Word':<8}  {'Line':>5}  Instruction"]
+    for pc, word, source, line in listing:
+        out.extend(f"{'':<30}{name}:" for name in labels.get(pc, ()))
+        out.append(f"  {pc:08x}  {word:08x}  {source:>5}    {line}")
+    out.append(";")
+    out.append("; Symbols")
+    out.extend(f"; {address:08x}  {section:<4}  {name}" for address, name, section in prog_map['symbols'])
+    with open(path, 'w') as f:
+        f.write('\n'.join(out) + '\n')
+
+def assemble(input_file, output_file, data_file=None, schedule=False, profile=None,
+             map_file=None, listing_file=None):
+    """
+    Assemble input_file into output_file (I_mem image, plus the binary
+    image binary_path(output_file)). A non-empty .data section is written to
+    data_file (default: data_image_path(output_file)) and its .bin, which
+    the simulator loads into D_mem with +DATAFILE=.
+    profile is a branch profile file (retire_trace.py --profile) for layout.
+    map_file / listing_file receive the program map and listing (--map).
+    """
+    with open(input_file, 'r') as f:
+        lines = f.readlines()
+
+    symbols = SymbolTable()
+    listing = [] if map_file or listing_file else None
+    words, data = assemble_lines(lines, schedule, load_profile(profile) if profile else None,
+                                 symbols, listing)
+    print(f"Assembled {len(words)} instructions to {output_file}")
+    write_images(words, data, output_file, data_file or data_image_path(output_file))
+
+    if listing is not None:
+        prog_map = program_map([os.path.basename(input_file)], [[0, source] for _, _, source, _ in listing],
+                               symbol_list(symbols), 4 * len(words), symbols.data_size)
+        if map_file:
+            write_map(prog_map, map_file)
+            print(f"Wrote map to {map_file}")
+        if listing_file:
+            write_listing(listing, prog_map, listing_file)
+            print(f"Wrote listing to {listing_file}")
+    return len(words)
+
+def assemble_many(jobs, schedule=False, maps=False):
+    """
+    Assemble a batch of (input_file, output_file) pairs in one process,
+    reusing the encoder tables. Returns {output_file: instruction count};
+    stops at the first program that fails to assemble. maps=True also
+    writes each program's map and listing next to its hex file.
+    """
+    counts = {}
+    for input_file, output_file in jobs:
+        counts[output_file] = assemble(input_file, output_file, schedule=schedule,
+                                       map_file=map_path(output_file) if maps else None,
+                                       listing_file=listing_path(output_file) if maps else None)
+    return counts
+
+# --- Relocatable objects (--object, linked by linker.py) ---
+OBJECT_VERSION = 2
+
+def assemble_object(lines, source='', schedule=False):
+    """
+    Assemble into a relocatable object: a JSON-serializable dict with .text
+    and .data at offset 0, the labels (global if declared .globl), the
+    relocations the linker applies and the source line of each .text word.
+    """
+    symbols = ObjectSymbols()
+    listing = []
+    words, data = assemble_lines(lines, schedule, symbols=symbols, listing=listing)
+    return {
+        'version': OBJECT_VERSION,
+        'source': source,
+        'text': words,
+        'data': data,
+        'data_size': symbols.data_size,
+        'symbols': {name: [symbols.section(name), address, name in symbols.globals]
+                    for name, address in symbols.labels.items()},
+        'relocs': [list(r) for r in symbols.relocs],
+        'lines': [source_line for _, _, source_line, _ in listing],
+    }
+
+def write_object(obj, path):
+    with open(path, 'w') as f:
+        json.dump(obj, f, separators=(',', ':'))
+
+def read_object(path):
+    with open(path) as f:
+        obj = json.load(f)
+    if obj.get('version') != OBJECT_VERSION:
+        raise ValueError(f"{path}: unsupported object version {obj.get('version')}")
+    return obj
+
+def assemble_object_file(input_file, output_file, schedule=False):
+    """Assemble input_file into a relocatable object file (.rvo). Returns the object."""
+    with open(input_file, 'r') as f:
+        lines = f.readlines()
+
+    obj = assemble_object(lines, os.path.basename(input_file), schedule)
+    write_object(obj, output_file)
+    print(f"Assembled {len(obj['text'])} instructions, {obj['data_size']} data bytes, "
+          f"{len(obj['relocs'])} relocations to {output_file}")
+    return obj
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python3 simple_assembler.py input.s output.hex")
+    import argparse
+    parser = argparse.ArgumentParser(description="RV32I assembler")
+    parser.add_argument("files", nargs="+", metavar="input.s output.hex",
+                        help="One or more input/output pairs")
+    parser.add_argument("--schedule", action="store_true",
+                        help="Reorder instructions to avoid load-use stalls")
+    parser.add_argument("--profile", metavar="JSON",
+                        help="Branch profile (retire_trace.py --profile) for block layout; single program only")
+    parser.add_argument("--object", action="store_true",
+                        help="Write relocatable objects (input.s output.rvo pairs) for linker.py")
+    parser.add_argument("--map", action="store_true",
+                        help="Also write output.map.json (PC -> source line, labels, section sizes) and output.lst")
+    args = parser.parse_args()
+    if len(args.files) % 2 or (args.profile and len(args.files) != 2):
+        parser.error("expected input.s output.hex pairs (one pair with --profile)")
+    if args.object:
+        if args.profile or args.map:
+            parser.error("--profile and --map need the linked program (see linker.py --map)")
+        for input_file, output_file in zip(args.files[0::2], args.files[1::2]):
+            assemble_object_file(input_file, output_file, args.schedule)
+    elif args.profile:
+        output_file = args.files[1]
+        assemble(args.files[0], output_file, schedule=args.schedule, profile=args.profile,
+                 map_file=map_path(output_file) if args.map else None,
+                 listing_file=listing_path(output_file) if args.map else None)
     else:
-        assemble(sys.argv[1], sys.argv[2])
+        assemble_many(zip(args.files[0::2], args.files[1::2]), args.schedule, args.map)
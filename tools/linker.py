@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Linker
+Links relocatable objects (assembler.py --object) into one program: I_mem
+and D_mem images in the same format assembler.py writes.
+
+    python3 linker.py -o prog.hex main.s lib/memset.s lib/div.rvo
+
+.s inputs are assembled through an object cache keyed by source hash, so a
+shared routine is assembled once and then only relinked. The first input
+holds the entry point (PC 0); .text and .data of each object follow the
+previous one in command-line order. Only .globl labels are visible to other
+objects.
+"""
+
+import os
+import sys
+import hashlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import assembler
+from assembler import b_offset, j_offset
+
+IMEM_WORDS = 2048
+
+# --- Relocation types (see assembler.record_relocation) ---
+# Each takes (word, value, pc) and returns the patched word.
+
+def reloc_branch(word, value, pc):
+    offset = value - pc
+    if not -4096 <= offset < 4096:
+        raise ValueError(f"branch at PC={pc} out of range ({offset} bytes)")
+    return (word & 0x01FFF07F) | b_offset(offset)
+
+def reloc_jal(word, value, pc):
+    offset = value - pc
+    if not -(1 << 20) <= offset < (1 << 20):
+        raise ValueError(f"jal at PC={pc} out of range ({offset} bytes)")
+    return (word & 0xFFF) | j_offset(offset)
+
+def reloc_hi20(word, value, pc):
+    return (word & 0xFFF) | (((value >> 12) & 0xFFFFF) << 12)
+
+def reloc_lo12_i(word, value, pc):
+    return (word & 0xFFFFF) | ((value & 0xFFF) << 20)
+
+def reloc_lo12_s(word, value, pc):
+    return (word & 0x01FFF07F) | (((value >> 5) & 0x7F) << 25) | ((value & 0x1F) << 7)
+
+def reloc_abs32(word, value, pc):
+    return value & 0xFFFFFFFF
+
+RELOCATIONS = {
+    'BRANCH': reloc_branch,
+    'JAL': reloc_jal,
+    'HI20': reloc_hi20,
+    'LO12_I': reloc_lo12_i,
+    'LO12_S': reloc_lo12_s,
+    'ABS32': reloc_abs32,
+}
+
+def layout(objects):
+    """
+    Place objects in order. Returns ([{'text': base, 'data': base}] per
+    object, .text size, .data size).
+    """
+    bases = []
+    text_size = data_size = 0
+    for obj in objects:
+        bases.append({'text': text_size, 'data': data_size})
+        text_size += 4 * len(obj['text'])
+        data_size += obj['data_size'] + (-obj['data_size'] % 4)   # Word-aligned
+    return bases, text_size, data_size
+
+def link(objects):
+    """
+    Lay out and relocate objects in order. Returns (text words, .data image
+    words) like assembler.assemble_lines; raises ValueError for undefined or
+    duplicate symbols and out-of-range fields.
+    """
+    bases, text_size, data_size = layout(objects)
+    global_symbols = {}   # name -> (address, defining source)
+    for i, obj in enumerate(objects):
+        for name, (section, value, is_global) in obj['symbols'].items():
+            if not is_global:
+                continue
+            if name in global_symbols:
+                raise ValueError(f"Duplicate symbol '{name}' in {global_symbols[name][1]} and {obj['source']}")
+            global_symbols[name] = (bases[i][section] + value, obj['source'])
+
+    text = []
+    image = bytearray(data_size)
+    for i, obj in enumerate(objects):
+        text.extend(obj['text'])
+        chunk = b''.join(w.to_bytes(4, 'little') for w in obj['data'])
+        image[bases[i]['data']:bases[i]['data'] + len(chunk)] = chunk
+
+    for i, obj in enumerate(objects):
+        for section, offset, kind, target, addend in obj['relocs']:
+            if target in ('text', 'data'):
+                value = bases[i][target] + addend
+            elif target in global_symbols:
+                value = global_symbols[target][0] + addend
+            else:
+                raise ValueError(f"Undefined symbol '{target}' (referenced in {obj['source']})")
+            address = bases[i][section] + offset
+            if section == 'text':
+                text[address // 4] = RELOCATIONS[kind](text[address // 4], value, address)
+            else:
+                image[address:address + 4] = (value & 0xFFFFFFFF).to_bytes(4, 'little')
+
+    if len(text) > IMEM_WORDS:
+        print(f"Warning: .text is {len(text)} words; I_mem holds {IMEM_WORDS}")
+    if data_size > assembler.DMEM_BYTES:
+        raise ValueError(f".data is {data_size} bytes; D_mem holds {assembler.DMEM_BYTES}")
+
+    data = [int.from_bytes(image[i:i + 4], 'little') for i in range(0, len(image), 4)]
+    while data and data[-1] == 0:
+        data.pop()   # D_mem starts out zeroed
+    return text, data
+
+def link_map(objects):
+    """Program map (assembler.program_map) of the linked objects, local labels included."""
+    bases, text_size, data_size = layout(objects)
+    lines = [[i, line] for i, obj in enumerate(objects) for line in obj['lines']]
+    labels = [(bases[i][section] + value, name, section)
+              for i, obj in enumerate(objects) for name, (section, value, _) in obj['symbols'].items()]
+    return assembler.program_map([obj['source'] for obj in objects], lines, labels, text_size, data_size)
+
+# --- Object cache ---
+_assembler_version = None
+
+def assembler_version():
+    """Content hash of assembler.py - any assembler change invalidates cached objects."""
+    global _assembler_version
+    if _assembler_version is None:
+        with open(assembler.__file__, 'rb') as f:
+            _assembler_version = hashlib.sha256(f.read()).hexdigest()
+    return _assembler_version
+
+def object_key(source_path, schedule=False):
+    """sha256(assembler version + options + source), shortened."""
+    with open(source_path, 'rb') as f:
+        source = f.read()
+    options = b"schedule;" if schedule else b""
+    return hashlib.sha256(assembler_version().encode() + options + source).hexdigest()[:16]
+
+def link_key(paths, schedule=False):
+    """Cache key of a linked program: linker version + the key of every input."""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        parts = [hashlib.sha256(f.read()).hexdigest()]
+    for path in paths:
+        if path.endswith('.rvo'):
+            with open(path, 'rb') as f:
+                parts.append(hashlib.sha256(f.read()).hexdigest())
+        else:
+            parts.append(object_key(path, schedule))
+    return hashlib.sha256(';'.join(parts).encode()).hexdigest()[:16]
+
+def cached_object(source_path, cache_dir, schedule=False):
+    """
+    Object for a .s file from cache_dir, assembling it on a miss.
+    Returns (object, cache path).
+    """
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    obj_path = os.path.join(cache_dir, f"{stem}_{object_key(source_path, schedule)}.rvo")
+    if os.path.exists(obj_path):
+        return assembler.read_object(obj_path), obj_path
+
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(source_path, 'r') as f:
+        obj = assembler.assemble_object(f.readlines(), os.path.basename(source_path), schedule)
+    tmp_path = f"{obj_path}.{os.getpid()}.tmp"
+    assembler.write_object(obj, tmp_path)
+    os.replace(tmp_path, obj_path)
+    return obj, obj_path
+
+def load_inputs(paths, cache_dir, schedule=False):
+    """Objects for a list of .s (through the cache) and .rvo files."""
+    objects = []
+    for path in paths:
+        if path.endswith('.rvo'):
+            objects.append(assembler.read_object(path))
+        else:
+            objects.append(cached_object(path, cache_dir, schedule)[0])
+    return objects
+
+def link_files(paths, output_file, cache_dir, data_file=None, schedule=False, map_file=None):
+    """
+    Link .s/.rvo inputs into output_file (+ data_file, default
+    assembler.data_image_path(output_file), the binary images of both and
+    the program map if map_file is given). Returns the instruction count.
+    """
+    objects = load_inputs(paths, cache_dir, schedule)
+    text, data = link(objects)
+    print(f"Linked {len(paths)} objects: {len(text)} instructions to {output_file}")
+    assembler.write_images(text, data, output_file, data_file or assembler.data_image_path(output_file))
+
+    if map_file:
+        assembler.write_map(link_map(objects), map_file)
+        print(f"Wrote map to {map_file}")
+    return len(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Link RV32I objects (assembler.py --object) into a program")
+    parser.add_argument("inputs", nargs="+", help=".s or .rvo files; the first one holds the entry point")
+    parser.add_argument("-o", "--output", required=True, help="Output hex file (I_mem image)")
+    parser.add_argument("--cache", default=os.path.join("build", "obj_cache"),
+                        help="Object cache directory for .s inputs (default: build/obj_cache)")
+    parser.add_argument("--schedule", action="store_true",
+                        help="Assemble .s inputs with load-use scheduling")
+    parser.add_argument("--map", action="store_true",
+                        help="Also write the program map (output.map.json)")
+    args = parser.parse_args()
+
+    try:
+        link_files(args.inputs, args.output, args.cache, schedule=args.schedule,
+                   map_file=assembler.map_path(args.output) if args.map else None)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,8 @@ Performance Metrics Report Generator
 
 Parses performance counters and generates clean performance analysis report.
 No branch predictor is assumed - flush events indicate control-flow penalties.
+Given per-PC hot spots (retire trace) and a program map, the most expensive
+instructions are listed by label and source line.
 """
 
 import os
@@ -189,7 +191,23 @@ def print_metrics_table(metrics, test_name="Performance Test"):
     
     print("="*70 + "\n")
 
-def generate_report(sim_output=None, test_name="Performance Test", log_file=None, perf_file=None):
+def print_hotspots(hotspots, cycles, source_map=None):
+    """
+    Print the most expensive instructions.
+    hotspots: [(pc, instr, retired, cycles)] as from RetireTrace.hotspots()
+    """
+    from riscv_disasm import disassemble
+    
+    print("🔹 HOT SPOTS (cycles charged to the retiring instruction)")
+    print("-" * 70)
+    for pc, instr, retired, spot_cycles in hotspots:
+        share = spot_cycles / cycles * 100 if cycles else 0
+        location = source_map.describe(pc) if source_map else ""
+        print(f"  0x{pc:08x} {share:>5.1f}%  {spot_cycles:>10,} cyc  {disassemble(instr):<24} {location}")
+    print("="*70 + "\n")
+
+def generate_report(sim_output=None, test_name="Performance Test", log_file=None, perf_file=None,
+                    hotspots=None, source_map=None):
     """Main entry point for generating performance report"""
     
     # Try file first
@@ -208,6 +226,8 @@ def generate_report(sim_output=None, test_name="Performance Test", log_file=None
     
     # Print to terminal
     print_metrics_table(metrics, test_name)
+    if hotspots:
+        print_hotspots(hotspots, metrics['Clock Cycles'], source_map)
     
     # Save to file if requested
     if log_file:
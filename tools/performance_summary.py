@@ -120,10 +120,10 @@ def generate_summary_table(benchmark_results, use_color=True):
             
             status, metrics = benchmark_results[bench_name]
             
-            if status == 'FAIL' or not metrics:
-                # FAIL row - red name
+            if status != 'PASS' or not metrics:
+                # FAIL/HANG/TIMEOUT row - red name
                 bench_display = f"{Colors.RED}{bench_name:<18}{Colors.RESET}"
-                row = f"{bench_display} | {'FAIL':>7} | {'-':>8} | {'-':>8} | {'-':>7} | {'-':>7} | {'-':>8} | {'-':>7}"
+                row = f"{bench_display} | {status if status != 'PASS' else 'FAIL':>7} | {'-':>8} | {'-':>8} | {'-':>7} | {'-':>7} | {'-':>8} | {'-':>7}"
                 group_output.append(row)
                 continue
             
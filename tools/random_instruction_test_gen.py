@@ -65,7 +65,7 @@ def main(count=100, seed=None, out_file="random_test.hex"):
         # Limit immediates for safety
         imm12 = random.randint(-16, 15) 
         imm20 = random.randint(0, 0xFF)
-        bj_offset = random.choice([4, 8, -4, 0]) # Very local jumps to avoid infinite loops or crashes
+        bj_offset = random.choice([4, 8, -4]) # Very local jumps; offset 0 would branch to itself forever
         
         inst = 0
         
@@ -105,6 +105,10 @@ def main(count=100, seed=None, out_file="random_test.hex"):
             inst = generate_j_type(0x6F, rd, 4) 
         
         instructions.append(inst)
+
+    # End the program; without it the core runs into empty I_mem, which
+    # never retires and is stopped as a HANG by the simulator watchdog
+    instructions.append(0x00100073) # EBREAK
         
     # Write Instruction File
     try:
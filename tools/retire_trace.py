@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+Retire Trace Reader
+Loads the binary retire trace written by sim_headless (+RETIRE_TRACE=<file>)
+and generates execution / pipeline reports without a VCD.
+
+The file is memory-mapped with numpy (zero-copy); see sim/common/RetireTrace.h
+for the layout. With a program map (assembler.py --map) PCs are reported as
+label+offset and source line.
+"""
+
+import sys
+import json
+import struct
+import argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # Only needed to read traces
+    np = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from riscv_disasm import disassemble_many, SourceMap
+
+MAGIC = b'RVRT'
+VERSION = 1
+HEADER = struct.Struct('<4sIII')   # magic, version, record size, reserved
+
+# Record flags (RetireTrace.h)
+RT_RETIRED = 1 << 0
+RT_STALL = 1 << 1
+RT_FLUSH = 1 << 2
+RT_LOAD = 1 << 3
+RT_STORE = 1 << 4
+
+RECORD_FIELDS = [
+    ('cycle_delta', '<u4'),
+    ('pc', '<u4'),
+    ('instr', '<u4'),
+    ('rd_value', '<u4'),
+    ('mem_addr', '<u4'),
+    ('rd', 'u1'),
+    ('flags', 'u1'),
+    ('reserved', '<u2'),
+]
+
+
+class RetireTrace:
+    """Memory-mapped view of a retire trace file."""
+
+    def __init__(self, path, source_map=None):
+        if np is None:
+            raise ImportError("numpy is required to read retire traces (pip install numpy)")
+
+        self.path = str(path)
+        self.source_map = source_map   # SourceMap of the traced program, optional
+        with open(self.path, 'rb') as f:
+            magic, version, record_size, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{self.path}: not a retire trace (bad magic {magic!r})")
+        if version != VERSION:
+            raise ValueError(f"{self.path}: unsupported retire trace version {version}")
+
+        dtype = np.dtype(RECORD_FIELDS)
+        if record_size != dtype.itemsize:
+            raise ValueError(f"{self.path}: record size {record_size}, expected {dtype.itemsize}")
+
+        size = Path(self.path).stat().st_size - HEADER.size
+        count = size // dtype.itemsize
+        if count:
+            self.records = np.memmap(self.path, dtype=dtype, mode='r',
+                                     offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=dtype)
+
+        # Cycles are delta-encoded in the file
+        self.cycles = np.cumsum(self.records['cycle_delta'], dtype=np.uint64)
+        self.flags = self.records['flags']
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def retired(self):
+        """Boolean mask of records with a retired instruction."""
+        return (self.flags & RT_RETIRED) != 0
+
+    def summary(self):
+        """Counts over the whole trace."""
+        return {
+            'records': len(self),
+            'retired': int(np.count_nonzero(self.flags & RT_RETIRED)),
+            'stall_cycles': int(np.count_nonzero(self.flags & RT_STALL)),
+            'flush_cycles': int(np.count_nonzero(self.flags & RT_FLUSH)),
+            'loads': int(np.count_nonzero((self.flags & (RT_RETIRED | RT_LOAD)) == (RT_RETIRED | RT_LOAD))),
+            'stores': int(np.count_nonzero((self.flags & (RT_RETIRED | RT_STORE)) == (RT_RETIRED | RT_STORE))),
+            'last_cycle': int(self.cycles[-1]) if len(self) else 0,
+        }
+
+    def generate_exec_trace(self, output_path):
+        """
+        Generate execution trace (retired instructions, WB stage)
+        Format: Cycle | PC | Hex | Disassembly | Effect
+        """
+        print(f"[Retire Trace] Generating execution trace...")
+
+        lines = []
+        lines.append("=" * 100)
+        lines.append("RV32I Core - Execution Trace (Retired Instructions)")
+        lines.append("=" * 100)
+        lines.append(f"Source: {Path(self.path).name}")
+        lines.append("")
+        header = f"{'Cycle':<8} | {'PC':<10} | {'Hex':<10} | {'Disassembly':<30} | {'Effect':<30}"
+        lines.append(header + (" | Location" if self.source_map else ""))
+        lines.append("-" * 100)
+
+        idx = np.flatnonzero(self.retired)
+        cycles = self.cycles[idx].tolist()
+        recs = self.records[idx]
+        disasm_all = disassemble_many(recs['instr'])
+        for cycle, pc, instr, rd, rd_value, mem_addr, flags, disasm in zip(
+                cycles, recs['pc'].tolist(), recs['instr'].tolist(), recs['rd'].tolist(),
+                recs['rd_value'].tolist(), recs['mem_addr'].tolist(), recs['flags'].tolist(), disasm_all):
+
+            effect = []
+            if rd:
+                effect.append(f"x{rd}=0x{rd_value:08x}")
+            if flags & RT_LOAD:
+                effect.append(f"load [0x{mem_addr:08x}]")
+            elif flags & RT_STORE:
+                effect.append(f"store [0x{mem_addr:08x}]")
+
+            row = f"{cycle:<8} | 0x{pc:08x} | 0x{instr:08x} | {disasm:<30} | {' '.join(effect)}"
+            if self.source_map:
+                row = f"{row:<100} | {self.source_map.describe(pc)}"
+            lines.append(row)
+
+        lines.append("-" * 100)
+        lines.append(f"Total retired: {len(idx)}")
+
+        with open(output_path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        print(f"[Retire Trace] ✓ Execution trace: {output_path}")
+
+    def generate_pipeline_trace(self, output_path):
+        """
+        Generate pipeline event trace (WB PC with stall/flush per cycle)
+        Format: Cycle | WB_PC | Retired Stall Flush | Notes
+        """
+        print(f"[Retire Trace] Generating pipeline trace...")
+
+        lines = []
+        lines.append("=" * 100)
+        lines.append("RV32I Core - Pipeline Trace (Retire View)")
+        lines.append("=" * 100)
+        lines.append(f"Source: {Path(self.path).name}")
+        lines.append("")
+        lines.append(f"{'Cycle':<8} | {'WB_PC':<10} | {'Ret':<3} {'Stall':<5} {'Flush':<5} | {'Notes':<30}")
+        lines.append("-" * 100)
+
+        prev_cycle = None
+        for cycle, pc, flags in zip(self.cycles.tolist(), self.records['pc'].tolist(), self.flags.tolist()):
+            notes = []
+            if prev_cycle is not None and cycle - prev_cycle > 1:
+                notes.append(f"{cycle - prev_cycle - 1} idle cycle(s)")
+            if flags & RT_STALL:
+                notes.append("load-use stall")
+            if flags & RT_FLUSH:
+                notes.append("flush")
+            prev_cycle = cycle
+
+            ret = 'R' if flags & RT_RETIRED else '-'
+            stall = 'S' if flags & RT_STALL else '-'
+            flush = 'F' if flags & RT_FLUSH else '-'
+            lines.append(f"{cycle:<8} | 0x{pc:08x} | {ret:<3} {stall:<5} {flush:<5} | {', '.join(notes)}")
+
+        stats = self.summary()
+        lines.append("-" * 100)
+        lines.append(f"Retired: {stats['retired']} | Stall cycles: {stats['stall_cycles']} | "
+                     f"Flush cycles: {stats['flush_cycles']}")
+
+        with open(output_path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        print(f"[Retire Trace] ✓ Pipeline trace: {output_path}")
+
+    def branch_profile(self):
+        """
+        Per-branch outcome counts: {pc: (taken, not_taken)} for conditional
+        branches and plain jumps (jal x0). Taken = the next retired
+        instruction is not at pc + 4.
+        """
+        idx = np.flatnonzero(self.retired)
+        pcs = self.records['pc'][idx].astype(np.int64)
+        instr = self.records['instr'][idx]
+        opcode = instr & 0x7F
+        rd = (instr >> 7) & 0x1F
+        is_branch = (opcode == 0x63) | ((opcode == 0x6F) & (rd == 0))
+        is_branch[-1:] = False   # Outcome of the last instruction is unknown
+
+        sel = np.flatnonzero(is_branch)
+        taken = pcs[sel + 1] != pcs[sel] + 4
+        branch_pcs, inverse = np.unique(pcs[sel], return_inverse=True)
+        taken_counts = np.bincount(inverse, weights=taken, minlength=len(branch_pcs))
+        total_counts = np.bincount(inverse, minlength=len(branch_pcs))
+        return {int(pc): (int(t), int(n - t))
+                for pc, t, n in zip(branch_pcs, taken_counts, total_counts)}
+
+    def write_profile(self, output_path):
+        """Write branch_profile() as JSON for assembler.py --profile."""
+        profile = self.branch_profile()
+        with open(output_path, 'w') as f:
+            json.dump({
+                'source': Path(self.path).name,
+                'branches': {f"0x{pc:08x}": list(counts) for pc, counts in sorted(profile.items())},
+            }, f, indent=1)
+        taken = sum(t for t, _ in profile.values())
+        print(f"[Retire Trace] ✓ Branch profile: {output_path} ({len(profile)} branches, {taken} taken)")
+
+    def hotspots(self, top=None):
+        """
+        Per-PC cost, most expensive first: [(pc, instr, retired, cycles)].
+        The cycles between two retirements (stalls, flushes) are charged to
+        the instruction retiring after them.
+        """
+        idx = np.flatnonzero(self.retired)
+        if not len(idx):
+            return []
+        gaps = np.diff(self.cycles[idx].astype(np.int64), prepend=0)
+        pcs, first, inverse = np.unique(self.records['pc'][idx], return_index=True, return_inverse=True)
+        instrs = self.records['instr'][idx][first]
+        retired = np.bincount(inverse, minlength=len(pcs))
+        cost = np.bincount(inverse, weights=gaps, minlength=len(pcs))
+        order = np.argsort(-cost, kind='stable')[:top]
+        return [(int(pcs[i]), int(instrs[i]), int(retired[i]), int(cost[i])) for i in order]
+
+    def generate_hotspots(self, output_path, top=50):
+        """
+        Generate hot spot report (cycles per PC)
+        Format: Rank | PC | Retired | Cycles | Share | CPI | Location
+        """
+        print(f"[Retire Trace] Generating hot spot report...")
+
+        spots = self.hotspots(top)
+        total = self.summary()['last_cycle'] or 1
+        disasm_all = disassemble_many([instr for _, instr, _, _ in spots])
+
+        lines = []
+        lines.append("=" * 120)
+        lines.append("RV32I Core - Hot Spots (cycles charged to the retiring instruction)")
+        lines.append("=" * 120)
+        lines.append(f"Source: {Path(self.path).name}")
+        lines.append("")
+        lines.append(f"{'Rank':<4} | {'PC':<10} | {'Retired':>9} | {'Cycles':>9} | {'Share':>6} | {'CPI':>5} | "
+                     f"{'Disassembly':<30} | Location")
+        lines.append("-" * 120)
+        for rank, ((pc, _, retired, cycles), disasm) in enumerate(zip(spots, disasm_all), 1):
+            location = self.source_map.describe(pc) if self.source_map else ""
+            lines.append(f"{rank:<4} | 0x{pc:08x} | {retired:>9} | {cycles:>9} | {cycles / total * 100:>5.1f}% | "
+                         f"{cycles / retired:>5.2f} | {disasm:<30} | {location}")
+        lines.append("-" * 120)
+        lines.append(f"Total cycles: {total}")
+
+        with open(output_path, 'w') as f:
+            f.write('\n'.join(lines))
+
+        print(f"[Retire Trace] ✓ Hot spots: {output_path}")
+
+    def generate(self, output_type, output_path):
+        """Generate a report by name ('exec', 'pipeline' or 'hotspots')."""
+        generators = {
+            'exec': self.generate_exec_trace,
+            'pipeline': self.generate_pipeline_trace,
+            'hotspots': self.generate_hotspots,
+        }
+        if output_type not in generators:
+            raise ValueError(f"Unknown retire trace report: {output_type} (use exec, pipeline or hotspots)")
+        generators[output_type](output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retire trace reader (+RETIRE_TRACE output)")
+    parser.add_argument("trace", help="Retire trace file")
+    parser.add_argument("--exec", dest="exec_out", help="Write execution trace to this file")
+    parser.add_argument("--pipeline", dest="pipeline_out", help="Write pipeline trace to this file")
+    parser.add_argument("--profile", dest="profile_out", help="Write branch profile (JSON, for assembler.py --profile)")
+    parser.add_argument("--hotspots", dest="hotspots_out", help="Write hot spot report (cycles per PC) to this file")
+    parser.add_argument("--map", help="Program map (assembler.py --map) to show labels and source lines")
+    args = parser.parse_args()
+
+    trace = RetireTrace(args.trace, SourceMap(args.map) if args.map else None)
+    stats = trace.summary()
+    print(f"[Retire Trace] {stats['records']} records, {stats['retired']} retired, "
+          f"{stats['stall_cycles']} stall / {stats['flush_cycles']} flush cycles, "
+          f"last cycle {stats['last_cycle']}")
+
+    if args.exec_out:
+        trace.generate_exec_trace(args.exec_out)
+    if args.pipeline_out:
+        trace.generate_pipeline_trace(args.pipeline_out)
+    if args.profile_out:
+        trace.write_profile(args.profile_out)
+    if args.hotspots_out:
+        trace.generate_hotspots(args.hotspots_out)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,73 @@ Simple RISC-V RV32I Disassembler
 Converts 32-bit instruction hex to assembly mnemonic
 """
 
+import os
+import sys
+import json
+from bisect import bisect_right
+
+try:
+    import numpy as np
+except ImportError:  # Bulk disassembly falls back to a per-word memo
+    np = None
+
+
+def _sext(val, bits):
+    """Sign-extend a `bits`-wide field"""
+    if val & (1 << (bits - 1)):
+        return val - (1 << bits)
+    return val
+
+
+def _fields(instr):
+    """Decode the fields of one instruction (immediates already sign-extended)"""
+    opcode = instr & 0x7F
+    rd = (instr >> 7) & 0x1F
+    funct3 = (instr >> 12) & 0x7
+    rs1 = (instr >> 15) & 0x1F
+    rs2 = (instr >> 20) & 0x1F
+    funct7 = (instr >> 25) & 0x7F
+    
+    # I-type immediate
+    imm_i = _sext((instr >> 20) & 0xFFF, 12)
+    
+    # S-type immediate
+    imm_s = _sext(((instr >> 7) & 0x1F) | ((instr >> 25) << 5), 12)
+    
+    # B-type immediate
+    imm_b = _sext((((instr >> 8) & 0xF) << 1) | (((instr >> 25) & 0x3F) << 5) |
+                  (((instr >> 7) & 0x1) << 11) | (((instr >> 31) & 0x1) << 12), 13)
+    
+    # U-type immediate
+    imm_u = instr & 0xFFFFF000
+    
+    # J-type immediate
+    imm_j = _sext((((instr >> 21) & 0x3FF) << 1) | (((instr >> 20) & 0x1) << 11) |
+                  (((instr >> 12) & 0xFF) << 12) | (((instr >> 31) & 0x1) << 20), 21)
+    
+    return opcode, rd, funct3, rs1, rs2, funct7, imm_i, imm_s, imm_b, imm_u, imm_j
+
+
+def _fields_many(words):
+    """Vectorized _fields over a uint32 array: one list per field"""
+    w = words.astype(np.int64)
+    sw = words.view(np.int32).astype(np.int64)  # Arithmetic shifts sign-extend
+    
+    opcode = w & 0x7F
+    rd = (w >> 7) & 0x1F
+    funct3 = (w >> 12) & 0x7
+    rs1 = (w >> 15) & 0x1F
+    rs2 = (w >> 20) & 0x1F
+    funct7 = (w >> 25) & 0x7F
+    imm_i = sw >> 20
+    imm_s = ((sw >> 25) << 5) | ((w >> 7) & 0x1F)
+    imm_b = ((sw >> 31) << 12) | (((w >> 7) & 0x1) << 11) | (((w >> 25) & 0x3F) << 5) | (((w >> 8) & 0xF) << 1)
+    imm_u = w & 0xFFFFF000
+    imm_j = ((sw >> 31) << 20) | (((w >> 12) & 0xFF) << 12) | (((w >> 20) & 0x1) << 11) | (((w >> 21) & 0x3FF) << 1)
+    
+    return [f.tolist() for f in (opcode, rd, funct3, rs1, rs2, funct7, imm_i, imm_s, imm_b, imm_u, imm_j)]
+
+
 def disassemble(instr_hex):
     """
     Disassemble a single 32-bit RISC-V instruction
@@ -19,56 +86,49 @@ def disassemble(instr_hex):
     else:
         instr = instr_hex
     
-    # Handle NOP/invalid
-    if instr == 0:
-        return "nop (illegal)"
-    
-    # Extract fields
-    opcode = instr & 0x7F
-    rd = (instr >> 7) & 0x1F
-    funct3 = (instr >> 12) & 0x7
-    rs1 = (instr >> 15) & 0x1F
-    rs2 = (instr >> 20) & 0x1F
-    funct7 = (instr >> 25) & 0x7F
-
-    # I-type immediate (sign-extended)
-    imm_i = (instr >> 20) & 0xFFF
-    if imm_i & 0x800:  # Sign extend
-        imm_i |= 0xFFFFF000
-    imm_i = imm_i & 0xFFFFFFFF  # Keep as 32-bit
+    return _format(instr, *_fields(instr))
 
-    # S-type immediate
-    imm_s = ((instr >> 7) & 0x1F) | ((instr >> 25) << 5)
-    if imm_s & 0x800:
-        imm_s |= 0xFFFFF000
-    imm_s = imm_s & 0xFFFFFFFF
-
-    # B-type immediate
-    imm_b = (((instr >> 8) & 0xF) << 1) | (((instr >> 25) & 0x3F) << 5) | \
-            (((instr >> 7) & 0x1) << 11) | (((instr >> 31) & 0x1) << 12)
-    if imm_b & 0x1000:
-        imm_b |= 0xFFFFE000
-    imm_b = imm_b & 0xFFFFFFFF
 
-    # U-type immediate
-    imm_u = instr & 0xFFFFF000
+def disassemble_many(words):
+    """
+    Disassemble many instructions at once (exec traces, hex listings)
+    
+    Args:
+        words: NumPy array or iterable of 32-bit instruction values
+    
+    Returns:
+        list of str - one mnemonic per input word, in order
+    
+    Fields are extracted with vectorized bit operations and each distinct
+    word is formatted only once (loops re-execute the same few words).
+    """
+    if np is None:
+        memo = {}
+        out = []
+        for instr in words:
+            text = memo.get(instr)
+            if text is None:
+                text = memo[instr] = disassemble(instr)
+            out.append(text)
+        return out
+    
+    words = np.asarray(words, dtype=np.uint32).ravel()
+    if words.size == 0:
+        return []
+    uniq, inverse = np.unique(words, return_inverse=True)
+    texts = [_format(*f) for f in zip(uniq.tolist(), *_fields_many(uniq))]
+    return np.array(texts, dtype=object)[inverse.ravel()].tolist()
 
-    # J-type immediate
-    imm_j = (((instr >> 21) & 0x3FF) << 1) | (((instr >> 20) & 0x1) << 11) | \
-            (((instr >> 12) & 0xFF) << 12) | (((instr >> 31) & 0x1) << 20)
-    if imm_j & 0x100000:
-        imm_j |= 0xFFE00000
-    imm_j = imm_j & 0xFFFFFFFF
 
+def _format(instr, opcode, rd, funct3, rs1, rs2, funct7, imm_i, imm_s, imm_b, imm_u, imm_j):
+    """Format decoded fields as an assembly string"""
+    # Handle NOP/invalid
+    if instr == 0:
+        return "nop (illegal)"
+    
     # Register names
     reg = lambda r: f"x{r}" if r != 0 else "x0"
     
-    # Convert to signed for display
-    def to_signed(val, bits=32):
-        if val & (1 << (bits - 1)):
-            return val - (1 << bits)
-        return val
-    
     # Decode by opcode
     try:
         # R-type ALU
@@ -96,7 +156,7 @@ def disassemble(instr_hex):
         
         # I-type ALU
         elif opcode == 0b0010011:
-            imm_signed = to_signed(imm_i, 12)
+            imm_signed = imm_i
             if funct3 == 0b000:
                 return f"addi {reg(rd)}, {reg(rs1)}, {imm_signed}"
             elif funct3 == 0b111:
@@ -121,7 +181,7 @@ def disassemble(instr_hex):
         
         # Load
         elif opcode == 0b0000011:
-            imm_signed = to_signed(imm_i, 12)
+            imm_signed = imm_i
             if funct3 == 0b010:
                 return f"lw {reg(rd)}, {imm_signed}({reg(rs1)})"
             elif funct3 == 0b000:
@@ -135,7 +195,7 @@ def disassemble(instr_hex):
         
         # Store
         elif opcode == 0b0100011:
-            imm_signed = to_signed(imm_s, 12)
+            imm_signed = imm_s
             if funct3 == 0b010:
                 return f"sw {reg(rs2)}, {imm_signed}({reg(rs1)})"
             elif funct3 == 0b000:
@@ -145,7 +205,7 @@ def disassemble(instr_hex):
         
         # Branch
         elif opcode == 0b1100011:
-            imm_signed = to_signed(imm_b, 13)
+            imm_signed = imm_b
             if funct3 == 0b000:
                 return f"beq {reg(rs1)}, {reg(rs2)}, {imm_signed}"
             elif funct3 == 0b001:
@@ -161,14 +221,14 @@ def disassemble(instr_hex):
         
         # JAL
         elif opcode == 0b1101111:
-            imm_signed = to_signed(imm_j, 21)
+            imm_signed = imm_j
             if rd == 0:
                 return f"j {imm_signed}"
             return f"jal {reg(rd)}, {imm_signed}"
         
         # JALR
         elif opcode == 0b1100111:
-            imm_signed = to_signed(imm_i, 12)
+            imm_signed = imm_i
             if rd == 0 and rs1 == 1 and imm_i == 0:
                 return "ret"
             return f"jalr {reg(rd)}, {reg(rs1)}, {imm_signed}"
@@ -200,7 +260,101 @@ def disassemble(instr_hex):
         return f"invalid 0x{instr:08x}"
 
 
+class SourceMap:
+    """
+    PC -> label / source line lookups from a program map (prog.map.json,
+    written by assembler.py --map or linker.py --map)
+    """
+    
+    SUFFIX = '.map.json'
+    
+    def __init__(self, path):
+        with open(path, 'r') as f:
+            data = json.load(f)
+        self.path = str(path)
+        self.files = data['files']
+        self.lines = data['lines']       # [file index, line] per .text word
+        self.sections = data['sections'] # name -> [address, bytes]
+        self.labels = {}                 # .text address -> label names
+        for address, name, section in data['symbols']:
+            if section == 'text':
+                self.labels.setdefault(address, []).append(name)
+        self._addresses = sorted(self.labels)
+        self._memo = {}
+    
+    @classmethod
+    def for_program(cls, hex_path):
+        """Map next to a program (prog.hex -> prog.map.json), None if there is none"""
+        path = os.path.splitext(str(hex_path))[0] + cls.SUFFIX
+        return cls(path) if os.path.exists(path) else None
+    
+    def symbol(self, pc):
+        """'label' or 'label+0x8' for the closest label at or before pc (None if none)"""
+        text_address, text_size = self.sections['text']
+        i = bisect_right(self._addresses, pc) - 1
+        if i < 0 or not text_address <= pc < text_address + text_size:
+            return None
+        address = self._addresses[i]
+        name = self.labels[address][0]
+        return name if pc == address else f"{name}+0x{pc - address:x}"
+    
+    def source(self, pc):
+        """'file.s:42' for the instruction at pc (None outside .text)"""
+        index = pc // 4
+        if pc % 4 or not 0 <= index < len(self.lines):
+            return None
+        file_index, line = self.lines[index]
+        return f"{self.files[file_index]}:{line}"
+    
+    def describe(self, pc):
+        """'loop_inner+0x8 (array_sum.s:42)'; '' if nothing is known about pc"""
+        text = self._memo.get(pc)
+        if text is None:
+            symbol, source = self.symbol(pc), self.source(pc)
+            if source is None:
+                text = symbol or ''
+            else:
+                text = f"{symbol} ({source})" if symbol else f"({source})"
+            self._memo[pc] = text
+        return text
+
+
+def disassemble_hex_file(hex_path, source_map=None):
+    """
+    Listing of a hex program (one word per line): 'addr: word  mnemonic' lines.
+    With a source map (default: the one next to the hex file, if any) labels
+    are shown and each line ends with its source location.
+    """
+    words = []
+    with open(hex_path, 'r') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    words.append(int(line, 16))
+                except ValueError:
+                    pass
+    texts = disassemble_many(words)
+    if source_map is None:
+        source_map = SourceMap.for_program(hex_path)
+    if source_map is None:
+        return [f"0x{addr * 4:08x}: {word:08x}  {text}" for addr, (word, text) in enumerate(zip(words, texts))]
+    
+    listing = []
+    for addr, (word, text) in enumerate(zip(words, texts)):
+        pc = addr * 4
+        listing.extend(f"{name}:" for name in source_map.labels.get(pc, ()))
+        source = source_map.source(pc)
+        listing.append(f"0x{pc:08x}: {word:08x}  {text:<30}" + (f"  ; {source}" if source else ""))
+    return listing
+
+
 if __name__ == "__main__":
+    # Hex listing: python3 riscv_disasm.py program.hex
+    if len(sys.argv) > 1:
+        print('\n'.join(disassemble_hex_file(sys.argv[1])))
+        sys.exit(0)
+    
     # Test cases
     test_cases = [
         (0x00100093, "addi x1, x0, 1"),
@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+In-Process SoC Model
+ctypes binding for the verilated SoC library (make pylib -> librv32i_sim.so).
+
+One model is built once and reused: load a program, reset, run, then read
+registers, data memory and performance counters without launching a process
+or going through perf_counters.txt.
+
+    model = SoCModel(lib_path)
+    model.load_program("tests/performance/gcd.hex")
+    model.load_data("tests/performance/gcd.data.hex")   # optional .data image
+    model.reset(perf_enable=True)
+    model.run_until_ebreak()
+    print(model.read_regs()[10], model.read_perf()['cycles'])
+
+Verilator keeps global simulation state, so use one SoCModel per process.
+"""
+
+import os
+import re
+import sys
+import struct
+import ctypes
+import tempfile
+import contextlib
+
+IMEM_WORDS = 2048
+DMEM_WORDS = 512
+NUM_REGS = 32
+
+# Same cycle budget as sim_headless (DEFAULT_MAX_CYCLES = 1M clock cycles, two
+# of which are spent in reset)
+DEFAULT_MAX_CYCLES = 1000000 - 2
+
+# rv32i_hang reasons (sim/common/Watchdog.h)
+HANG_REASONS = {1: 'self-loop', 2: 'no retirement'}
+
+# Counter order returned by rv32i_read_perf (= perf_counters.txt order)
+PERF_COUNTERS = [
+    'cycles', 'instructions', 'stalls', 'bubbles', 'flushes', 'forwards',
+    'raw_hazards', 'cond_branches', 'uncond_branches',
+    'alu_r', 'alu_i', 'load', 'store', 'branch', 'jump', 'system',
+]
+
+_HEX_WORD = re.compile(r'\s*(?:0[xX])?([0-9a-fA-F]+)')
+
+
+def load_hex(hex_path, limit=IMEM_WORDS):
+    """Read a hex image (one word per line) the way sim_headless does."""
+    words = []
+    with open(hex_path, 'r') as f:
+        for line in f:
+            m = _HEX_WORD.match(line)
+            if m:
+                words.append(int(m.group(1), 16) & 0xFFFFFFFF)
+    return words[:limit]
+
+
+def load_image(path, limit=IMEM_WORDS):
+    """Read a memory image: raw little-endian words (.bin) or a hex image."""
+    if not os.fspath(path).endswith('.bin'):
+        return load_hex(path, limit)
+    with open(path, 'rb') as f:
+        data = f.read(4 * limit)
+    return list(struct.unpack(f'<{len(data) // 4}I', data[:len(data) // 4 * 4]))
+
+
+class SoCModel:
+    """Reusable verilated SoC instance loaded from librv32i_sim.so."""
+
+    def __init__(self, lib_path, plusargs=None):
+        self.lib = ctypes.CDLL(os.path.abspath(lib_path))
+        self._declare()
+
+        args = ["soc_model"] + list(plusargs or [])
+        argv = (ctypes.c_char_p * len(args))(*[a.encode() for a in args])
+        self._handle = self.lib.rv32i_create(len(args), argv)
+        if not self._handle:
+            raise RuntimeError(f"Failed to create SoC model from {lib_path}")
+
+    def _declare(self):
+        lib = self.lib
+        u32p = ctypes.POINTER(ctypes.c_uint32)
+        lib.rv32i_create.restype = ctypes.c_void_p
+        lib.rv32i_create.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_char_p)]
+        lib.rv32i_destroy.argtypes = [ctypes.c_void_p]
+        lib.rv32i_load_program.restype = ctypes.c_uint32
+        lib.rv32i_load_program.argtypes = [ctypes.c_void_p, u32p, ctypes.c_uint32]
+        lib.rv32i_load_data.restype = ctypes.c_uint32
+        lib.rv32i_load_data.argtypes = [ctypes.c_void_p, u32p, ctypes.c_uint32]
+        lib.rv32i_reset.argtypes = [ctypes.c_void_p, ctypes.c_int]
+        lib.rv32i_step.restype = ctypes.c_uint64
+        lib.rv32i_step.argtypes = [ctypes.c_void_p, ctypes.c_uint64]
+        lib.rv32i_finished.restype = ctypes.c_int
+        lib.rv32i_finished.argtypes = [ctypes.c_void_p]
+        lib.rv32i_cycles.restype = ctypes.c_uint64
+        lib.rv32i_cycles.argtypes = [ctypes.c_void_p]
+        lib.rv32i_set_watchdog.argtypes = [ctypes.c_void_p, ctypes.c_uint64]
+        lib.rv32i_hang.restype = ctypes.c_int
+        lib.rv32i_hang.argtypes = [ctypes.c_void_p, u32p]
+        lib.rv32i_read_regs.argtypes = [ctypes.c_void_p, u32p]
+        lib.rv32i_read_dmem.restype = ctypes.c_uint32
+        lib.rv32i_read_dmem.argtypes = [ctypes.c_void_p, u32p, ctypes.c_uint32]
+        lib.rv32i_read_perf.restype = ctypes.c_uint32
+        lib.rv32i_read_perf.argtypes = [ctypes.c_void_p, u32p]
+        lib.rv32i_flush.argtypes = []
+
+    # --- Program control ---
+    def load_program(self, program):
+        """Load a list of instruction words or a .hex/.bin file into I_mem."""
+        words = load_image(program) if isinstance(program, (str, os.PathLike)) else list(program)
+        buf = (ctypes.c_uint32 * len(words))(*words)
+        return self.lib.rv32i_load_program(self._handle, buf, len(words))
+
+    def load_data(self, data=None):
+        """
+        Set the .data image (list of words or a .data.hex/.data.bin file) that reset()
+        preloads into D_mem, like +DATAFILE. None clears it.
+        """
+        if data is None:
+            words = []
+        elif isinstance(data, (str, os.PathLike)):
+            words = load_image(data, DMEM_WORDS)
+        else:
+            words = list(data)[:DMEM_WORDS]
+        buf = (ctypes.c_uint32 * len(words))(*words)
+        return self.lib.rv32i_load_data(self._handle, buf, len(words))
+
+    def reset(self, perf_enable=False):
+        """Clear registers, preload D_mem and run the reset sequence."""
+        self.lib.rv32i_reset(self._handle, 1 if perf_enable else 0)
+
+    def step(self, cycles=1):
+        """Run up to `cycles` cycles (stops at ebreak/ecall or a hang). Returns cycles run."""
+        return self.lib.rv32i_step(self._handle, cycles)
+
+    def run_until_ebreak(self, max_cycles=DEFAULT_MAX_CYCLES):
+        """Run until the program finishes or max_cycles elapse. Returns True if finished."""
+        self.step(max_cycles)
+        return self.finished
+
+    @property
+    def finished(self):
+        return bool(self.lib.rv32i_finished(self._handle))
+
+    @property
+    def cycles(self):
+        """Cycles run since the last reset."""
+        return self.lib.rv32i_cycles(self._handle)
+
+    @property
+    def hang(self):
+        """
+        (reason, last retired PC) if the watchdog stopped the run since the
+        last reset - reason is 'self-loop' or 'no retirement' - else None.
+        """
+        pc = ctypes.c_uint32()
+        reason = self.lib.rv32i_hang(self._handle, ctypes.byref(pc))
+        return (HANG_REASONS[reason], pc.value) if reason else None
+
+    def set_watchdog(self, idle_cycles):
+        """Cycles without a retirement before a run counts as hung (0 disables the watchdog)."""
+        self.lib.rv32i_set_watchdog(self._handle, idle_cycles)
+
+    # --- State inspection ---
+    def read_regs(self):
+        """Register file contents x0..x31."""
+        buf = (ctypes.c_uint32 * NUM_REGS)()
+        self.lib.rv32i_read_regs(self._handle, buf)
+        return list(buf)
+
+    def read_dmem(self, words=DMEM_WORDS):
+        """First `words` words of data memory."""
+        buf = (ctypes.c_uint32 * words)()
+        n = self.lib.rv32i_read_dmem(self._handle, buf, words)
+        return list(buf)[:n]
+
+    def read_perf(self):
+        """Performance counters, with the same values save_metrics() writes."""
+        buf = (ctypes.c_uint32 * len(PERF_COUNTERS))()
+        self.lib.rv32i_read_perf(self._handle, buf)
+        metrics = dict(zip(PERF_COUNTERS, buf))
+        # Same adjustment as Performance_Monitor.save_metrics (zero detection overhead)
+        if metrics['cycles'] > 10:
+            metrics['cycles'] -= 10
+        return metrics
+
+    def write_perf_file(self, path):
+        """Write the counters in perf_counters.txt format."""
+        with open(path, 'w') as f:
+            for key, value in self.read_perf().items():
+                f.write(f"{key}={value}\n")
+
+    @contextlib.contextmanager
+    def capture_output(self):
+        """
+        Capture everything the model prints ($display, [CORE] ...) at the file
+        descriptor level. Yields a list that receives the text on exit.
+        """
+        captured = []
+        sys.stdout.flush()
+        sys.stderr.flush()
+        saved = (os.dup(1), os.dup(2))
+        with tempfile.TemporaryFile(mode='w+b') as tmp:
+            os.dup2(tmp.fileno(), 1)
+            os.dup2(tmp.fileno(), 2)
+            try:
+                yield captured
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                self.lib.rv32i_flush()
+                os.dup2(saved[0], 1)
+                os.dup2(saved[1], 2)
+                os.close(saved[0])
+                os.close(saved[1])
+                tmp.seek(0)
+                captured.append(tmp.read().decode(errors='replace'))
+
+    def close(self):
+        if self._handle:
+            self.lib.rv32i_destroy(self._handle)
+            self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
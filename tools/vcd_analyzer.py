@@ -2,15 +2,114 @@
 """
 VCD Analyzer for RV32I Core
 Comprehensive VCD analysis with multiple text-based trace outputs
+(PCs are annotated with label+offset and source line given a program map)
 """
 
 import sys
 import os
-import re
+import json
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
 from pathlib import Path
 
 # Import disassembler
-from riscv_disasm import disassemble
+from riscv_disasm import disassemble_many, SourceMap
+
+# Signals extracted from the VCD (matched as substrings of the variable name)
+REQUIRED_SIGNALS = (
+    'PC_IF', 'PC_ID', 'PC_EX', 'PC_MEM', 'PC_WB',
+    'instr',
+    'opcode_EX', 'opcode_MEM', 'opcode_WB',
+    'flush', 'stall_FU', 'nop_EX',
+    'Z', 'N', 'PC_sel',
+)
+
+# Read size for streaming the VCD text
+VCD_CHUNK_SIZE = 4 << 20
+
+# Parsed-signal cache written next to the VCD (<name>.vcd.sigcache)
+# Layout: magic, version, header length, JSON header, then raw arrays:
+# cycles (int64), and per signal its change times (int64) and values (uint64)
+CACHE_SUFFIX = '.sigcache'
+CACHE_MAGIC = b'RVVC'
+CACHE_VERSION = 1
+CACHE_PREAMBLE = struct.Struct('<4sII')
+
+# Seek index written next to the VCD (<name>.vcd.sigidx, JSON): for the first
+# timestamp of every chunk, its byte offset and the value of each signal just
+# before it, so a cycle window can be decoded without reading from the start
+INDEX_SUFFIX = '.sigidx'
+INDEX_VERSION = 1
+
+
+def _iter_chunks(path, start=0, chunk_size=VCD_CHUNK_SIZE):
+    """
+    Yield (byte offset, text) blocks of whole lines, reading the file in large
+    chunks from byte `start`. Decoded as latin-1 so text offsets equal byte offsets.
+    """
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        tail = b''
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            block = tail + chunk
+            end = block.rfind(b'\n') + 1
+            if end == 0:
+                tail = block
+                continue
+            yield offset, block[:end].decode('latin-1')
+            offset += end
+            tail = block[end:]
+        if tail:
+            yield offset, tail.decode('latin-1')
+
+
+# Fused report sweeps over at least this many cycles are split across processes
+PARALLEL_MIN_CYCLES = 200000
+
+# Analyzer shared with forked sweep workers (set only while a pool is running)
+_SWEEP_ANALYZER = None
+
+
+def _fork_available():
+    import multiprocessing
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _sweep_chunk(task):
+    """Process-pool worker: fused sweep over one cycle chunk"""
+    kinds, lo, hi = task
+    return _SWEEP_ANALYZER._sweep(kinds, lo, hi)
+
+
+class SignalCursor:
+    """
+    Forward-moving sample-and-hold reader over one signal's sorted change list.
+    Cycle sweeps query increasing times, so each lookup is amortized O(1);
+    a query earlier than the previous one falls back to a bisect.
+    """
+    
+    def __init__(self, times, values, start=None):
+        self.times = times
+        self.values = values
+        # Index of the last change at or before the previous query
+        self.idx = -1 if start is None else bisect_right(times, start) - 1
+    
+    def at(self, time):
+        times = self.times
+        idx = self.idx
+        if idx >= 0 and times[idx] > time:
+            idx = bisect_right(times, time) - 1
+        else:
+            n = len(times)
+            while idx + 1 < n and times[idx + 1] <= time:
+                idx += 1
+        self.idx = idx
+        return self.values[idx] if idx >= 0 else None
 
 
 class VCDAnalyzer:
@@ -24,152 +123,472 @@ class VCDAnalyzer:
     4. Final State (register file + memory dumps)
     """
     
-    def __init__(self, vcd_path):
+    def __init__(self, vcd_path, use_cache=True, from_cycle=None, to_cycle=None, source_map=None):
         self.vcd_path = vcd_path
-        self.signals = {}
+        self.source_map = source_map  # SourceMap of the simulated program, optional
+        self.cache_path = str(vcd_path) + CACHE_SUFFIX
+        self.index_path = str(vcd_path) + INDEX_SUFFIX
         self.signal_map = {}  # VCD identifier -> signal name
-        self.timestamps = []
+        self.signal_times = {}   # signal name -> sorted change times
+        self.signal_values = {}  # signal name -> values (parallel to signal_times)
+        self.num_timestamps = 0
         self.cycles = []
-        
-        # Parse VCD on init
-        self._parse_vcd()
+        self.from_cycle = from_cycle
+        self.to_cycle = to_cycle
+        windowed = from_cycle is not None or to_cycle is not None
+        
+        # Parse VCD on init, preferring the sidecar files:
+        #   1. parsed-signal cache (whole trace, loads in milliseconds)
+        #   2. seek index (decode only the requested cycle window)
+        #   3. full parse, which writes both for next time
+        if use_cache and self._load_cache():
+            pass
+        elif use_cache and windowed and self._parse_window():
+            pass
+        else:
+            checkpoints = [] if use_cache else None
+            self._parse_vcd(checkpoints=checkpoints)
+            if use_cache:
+                self._save_cache()
+                self._save_index(checkpoints)
+        
+        if windowed:
+            self._apply_window()
     
-    def _parse_vcd(self):
-        """Parse VCD file and extract all required signals"""
-        print(f"[VCD Analyzer] Parsing {self.vcd_path}...")
-        
-        # Define signals we want to extract
-        required_signals = {
-            'PC_IF', 'PC_ID', 'PC_EX', 'PC_MEM', 'PC_WB',
-            'instr',
-            'opcode_EX', 'opcode_MEM', 'opcode_WB',
-            'flush', 'stall_FU', 'nop_EX',
-            'Z', 'N', 'PC_sel'
+    def _window_times(self):
+        """(first, last) sample times of the requested cycle window"""
+        first = -1 if self.from_cycle is None else self.from_cycle * 10 + 5
+        last = float('inf') if self.to_cycle is None else self.to_cycle * 10 + 5
+        return first, last
+    
+    def _apply_window(self):
+        """Restrict the rendered cycles to --from-cycle/--to-cycle"""
+        lo = 0 if self.from_cycle is None else bisect_left(self.cycles, self.from_cycle)
+        hi = len(self.cycles) if self.to_cycle is None else bisect_right(self.cycles, self.to_cycle)
+        self.cycles = self.cycles[lo:hi]
+        print(f"[VCD Analyzer] Cycle window: {self.from_cycle if self.from_cycle is not None else 'start'}"
+              f"..{self.to_cycle if self.to_cycle is not None else 'end'} ({len(self.cycles)} cycles)")
+    
+    def _vcd_stamp(self):
+        """Identity of the VCD file contents used to validate the cache"""
+        st = os.stat(self.vcd_path)
+        return {'vcd_size': st.st_size, 'vcd_mtime_ns': st.st_mtime_ns}
+    
+    def _load_cache(self):
+        """Load parsed signals from the sidecar cache. Returns False if missing or stale."""
+        try:
+            with open(self.cache_path, 'rb') as f:
+                magic, version, header_len = CACHE_PREAMBLE.unpack(f.read(CACHE_PREAMBLE.size))
+                if magic != CACHE_MAGIC or version != CACHE_VERSION:
+                    return False
+                header = json.loads(f.read(header_len))
+                if (header['stamp'] != self._vcd_stamp()
+                        or header['required_signals'] != list(REQUIRED_SIGNALS)):
+                    return False
+                
+                cycles = array('q')
+                cycles.fromfile(f, header['num_cycles'])
+                signal_times = {}
+                signal_values = {}
+                for sig_name, count in header['signals']:
+                    times = array('q')
+                    times.fromfile(f, count)
+                    values = array('Q')
+                    values.fromfile(f, count)
+                    signal_times[sig_name] = times
+                    signal_values[sig_name] = values
+        except (OSError, EOFError, ValueError, KeyError, struct.error):
+            return False
+        
+        self.signal_map = header['signal_map']
+        self.signal_times = signal_times
+        self.signal_values = signal_values
+        self.num_timestamps = header['num_timestamps']
+        self.cycles = cycles
+        print(f"[VCD Analyzer] Loaded cached signals: {self.cache_path}")
+        print(f"[VCD Analyzer] Cycles: {len(self.cycles)}")
+        return True
+    
+    def _save_cache(self):
+        """Write the parsed signals to the sidecar cache (best effort)"""
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            header = {
+                'stamp': self._vcd_stamp(),
+                'required_signals': list(REQUIRED_SIGNALS),
+                'signal_map': self.signal_map,
+                'num_timestamps': self.num_timestamps,
+                'num_cycles': len(self.cycles),
+                'signals': [[name, len(times)] for name, times in self.signal_times.items()],
+            }
+            header_bytes = json.dumps(header).encode()
+            
+            with open(tmp_path, 'wb') as f:
+                f.write(CACHE_PREAMBLE.pack(CACHE_MAGIC, CACHE_VERSION, len(header_bytes)))
+                f.write(header_bytes)
+                array('q', self.cycles).tofile(f)
+                for name, times in self.signal_times.items():
+                    array('q', times).tofile(f)
+                    array('Q', self.signal_values[name]).tofile(f)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, OverflowError) as e:
+            # Unwritable directory or a value wider than 64 bits: just skip caching
+            print(f"[VCD Analyzer] Warning: signal cache not written ({e})")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _save_index(self, checkpoints):
+        """Write the seek index (best effort)"""
+        index = {
+            'version': INDEX_VERSION,
+            'stamp': self._vcd_stamp(),
+            'required_signals': list(REQUIRED_SIGNALS),
+            'signal_map': self.signal_map,
+            'checkpoints': checkpoints,
+        }
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"[VCD Analyzer] Warning: seek index not written ({e})")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    def _parse_window(self):
+        """Decode only the cycle window using the seek index. Returns False if no valid index."""
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            if (index['version'] != INDEX_VERSION or index['stamp'] != self._vcd_stamp()
+                    or index['required_signals'] != list(REQUIRED_SIGNALS)):
+                return False
+        except (OSError, ValueError, KeyError):
+            return False
+        
+        # Last checkpoint at or before the window start (none: decode from the top)
+        first, _ = self._window_times()
+        checkpoints = index['checkpoints']
+        pos = bisect_right([cp[0] for cp in checkpoints], first) - 1
+        if pos < 0:
+            self._parse_vcd(time_range=self._window_times())
+            return True
+        
+        cp_time, cp_offset, snapshot = checkpoints[pos]
+        print(f"[VCD Analyzer] Seeking to time {cp_time} (byte {cp_offset}) via {self.index_path}")
+        self.signal_map = index['signal_map']
+        for sig in set(self.signal_map.values()):
+            self.signal_times[sig] = []
+            self.signal_values[sig] = []
+        for sig, (t, value) in snapshot.items():
+            self.signal_times[sig].append(t)
+            self.signal_values[sig].append(value)
+        self._parse_vcd(start=cp_offset, time_range=self._window_times())
+        return True
+    
+    def _snapshot(self):
+        """Current (last change time, value) of every signal, for a seek checkpoint"""
+        return {
+            sig: [times[-1], self.signal_values[sig][-1]]
+            for sig, times in self.signal_times.items() if times
         }
+    
+    def _parse_vcd(self, start=0, time_range=None, checkpoints=None):
+        """
+        Parse VCD file and extract all required signals.
+        Streams the file in large chunks in a single pass (header and value
+        changes), so memory depends on the kept signals, not on the VCD size.
         
-        with open(self.vcd_path, 'r') as f:
-            lines = f.readlines()
+        start:       byte offset of a seek checkpoint (signals already seeded from it)
+        time_range:  (first, last) sample times; decoding stops after `last`
+        checkpoints: list that receives seek-index checkpoints (full parse only)
+        """
+        print(f"[VCD Analyzer] Parsing {self.vcd_path}...")
         
-        # Phase 1: Parse variable definitions
-        in_definitions = True
-        for line in lines:
-            line = line.strip()
+        signal_map = self.signal_map
+        times_of = {}   # VCD identifier -> change time list of its signal
+        values_of = {}  # VCD identifier -> value list of its signal
+        cycles = self.cycles
+        first, last = time_range if time_range else (-1, float('inf'))
+        num_timestamps = 0
+        current_time = 0
+        last_time = None
+        
+        # Starting mid-file: the header was already read when the index was built
+        in_definitions = start == 0
+        if not in_definitions:
+            for identifier, sig in signal_map.items():
+                times_of[identifier] = self.signal_times[sig]
+                values_of[identifier] = self.signal_values[sig]
+        
+        done = False
+        for chunk_offset, text in _iter_chunks(self.vcd_path, start):
+            # Seek checkpoint at the first timestamp of every chunk
+            checkpoint_offset = None
+            if checkpoints is not None and not in_definitions:
+                pos = 0 if text.startswith('#') else text.find('\n#') + 1
+                if pos > 0 or text.startswith('#'):
+                    checkpoint_offset = chunk_offset + pos
             
-            if line.startswith('$var'):
-                # Format: $var wire 32 ! PC_IF [31:0] $end
-                parts = line.split()
-                if len(parts) >= 5:
-                    identifier = parts[3]
-                    var_name = parts[4]
-                    
-                    # Check if this is a signal we want
-                    for sig in required_signals:
-                        if sig in var_name:
-                            self.signal_map[identifier] = sig
-                            self.signals[sig] = {}
-                            break
+            for line in text.split('\n'):
+                line = line.strip()
+                if not line:
+                    continue
+                
+                # --- Header: variable definitions ---
+                if in_definitions:
+                    if line.startswith('$var'):
+                        # Format: $var wire 32 ! PC_IF [31:0] $end
+                        parts = line.split()
+                        if len(parts) >= 5:
+                            identifier = parts[3]
+                            var_name = parts[4]
+                            
+                            # Check if this is a signal we want
+                            for sig in REQUIRED_SIGNALS:
+                                if sig in var_name:
+                                    signal_map[identifier] = sig
+                                    self.signal_times[sig] = []
+                                    self.signal_values[sig] = []
+                                    break
+                    elif line.startswith('$enddefinitions'):
+                        in_definitions = False
+                        for identifier, sig in signal_map.items():
+                            times_of[identifier] = self.signal_times[sig]
+                            values_of[identifier] = self.signal_values[sig]
+                        print(f"[VCD Analyzer] Found {len(signal_map)} signals")
+                    continue
+                
+                # --- Value changes ---
+                c = line[0]
+                if c == '#':
+                    # Time stamp (monotonic, so duplicates are always adjacent)
+                    current_time = int(line[1:])
+                    if checkpoint_offset is not None:
+                        checkpoints.append([current_time, checkpoint_offset, self._snapshot()])
+                        checkpoint_offset = None
+                    if current_time > last:
+                        done = True
+                        break
+                    if current_time != last_time:
+                        last_time = current_time
+                        num_timestamps += 1
+                        # Extract cycle numbers (assuming 10 time units per cycle)
+                        if current_time % 10 == 5 and current_time >= first:
+                            cycles.append(current_time // 10)
+                    continue
+                
+                if c == 'b':
+                    # Binary value: b10101010 !
+                    parts = line.split()
+                    if len(parts) < 2:
+                        continue
+                    identifier = parts[1]
+                    if identifier not in times_of:
+                        continue
+                    bits = parts[0][1:]
+                    if not bits or bits.strip('01x'):
+                        continue
+                    # Convert binary to int (replace x with 0)
+                    value = int(bits.replace('x', '0'), 2)
+                elif c == '0' or c == '1':
+                    # Single bit value: 0! or 1!
+                    identifier = line[1:]
+                    if identifier not in times_of:
+                        continue
+                    value = 1 if c == '1' else 0
+                else:
+                    continue
+                
+                # Append, or overwrite a change at the same time (last one wins)
+                times = times_of[identifier]
+                values = values_of[identifier]
+                if times and times[-1] == current_time:
+                    values[-1] = value
+                else:
+                    times.append(current_time)
+                    values.append(value)
             
-            elif line.startswith('$enddefinitions'):
-                in_definitions = False
+            if done:
                 break
         
-        print(f"[VCD Analyzer] Found {len(self.signal_map)} signals")
-        
-        # Phase 2: Parse value changes (after definitions)
-        current_time = 0
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Skip definition section
-            if in_definitions:
-                if line.startswith('$enddefinitions'):
-                    in_definitions = False
-                continue
-            
-            # Parse value changes (after definitions)
-            # Time stamp
-            if line.startswith('#'):
-                current_time = int(line[1:])
-                if current_time not in self.timestamps:
-                    self.timestamps.append(current_time)
-            
-            # Binary value: b10101010 !
-            elif line.startswith('b'):
-                match = re.match(r'b([01x]+)\s+(\S+)', line)
-                if match:
-                    binary_val = match.group(1)
-                    identifier = match.group(2)
-                    
-                    if identifier in self.signal_map:
-                        sig_name = self.signal_map[identifier]
-                        try:
-                            # Convert binary to int (replace x with 0)
-                            val = int(binary_val.replace('x', '0'), 2)
-                            self.signals[sig_name][current_time] = val
-                        except ValueError:
-                            pass
-            
-            # Single bit value: 0! or 1!
-            elif len(line) >= 2 and line[0] in ['0', '1']:
-                value = int(line[0])
-                identifier = line[1:]
-                if identifier in self.signal_map:
-                    sig_name = self.signal_map[identifier]
-                    self.signals[sig_name][current_time] = value
-        
-        # Extract cycle numbers (assuming 10 time units per cycle)
-        self.cycles = [t // 10 for t in self.timestamps if t % 10 == 5]
-        
-        print(f"[VCD Analyzer] Parsed {len(self.timestamps)} timestamps")
+        self.num_timestamps = num_timestamps
+        print(f"[VCD Analyzer] Parsed {num_timestamps} timestamps")
         print(f"[VCD Analyzer] Cycles: {len(self.cycles)}")
     
     def _get_signal(self, sig_name, time):
         """Get signal value at specific time (with sample-and-hold)"""
-        if sig_name not in self.signals:
+        times = self.signal_times.get(sig_name)
+        if not times:
             return None
         
-        # Find most recent value
-        sig_data = self.signals[sig_name]
-        last_val = None
-        
-        for t in sorted(sig_data.keys()):
-            if t > time:
-                break
-            last_val = sig_data[t]
-        
-        return last_val
+        # Most recent change at or before `time`
+        idx = bisect_right(times, time) - 1
+        return self.signal_values[sig_name][idx] if idx >= 0 else None
     
-    def generate_exec_trace(self, output_path):
+    def _cursors(self, sig_names, start=None):
+        """Cursors for a cycle sweep from time `start`: name -> SignalCursor (missing signals read as None)"""
+        return {
+            name: SignalCursor(self.signal_times.get(name, []), self.signal_values.get(name, []), start)
+            for name in sig_names
+        }
+    
+    def _sweep(self, kinds, lo, hi):
+        """
+        Fused cycle sweep over self.cycles[lo:hi] for the per-cycle reports.
+        Returns the body rows per report kind ('events' -> (branch rows, system rows)).
         """
-        Generate execution trace (IF stage)
+        do_exec = 'exec' in kinds
+        do_pipeline = 'pipeline' in kinds
+        do_events = 'events' in kinds
+        
+        exec_samples = []  # (cycle, pc, instr); disassembled in bulk after the sweep
+        pipeline_rows = []
+        branch_rows = []
+        system_rows = []
+        
+        cycles = self.cycles[lo:hi]
+        start = cycles[0] * 10 + 5 if len(cycles) else None
+        sig = self._cursors(['PC_IF', 'PC_ID', 'PC_EX', 'PC_MEM', 'PC_WB', 'instr',
+                             'opcode_EX', 'opcode_WB', 'flush', 'stall_FU', 'PC_sel'], start)
+        c_pc_if, c_pc_id, c_pc_ex = sig['PC_IF'], sig['PC_ID'], sig['PC_EX']
+        c_pc_mem, c_pc_wb, c_instr = sig['PC_MEM'], sig['PC_WB'], sig['instr']
+        c_opc_ex, c_opc_wb = sig['opcode_EX'], sig['opcode_WB']
+        c_flush, c_stall, c_pc_sel = sig['flush'], sig['stall_FU'], sig['PC_sel']
+        
+        for cycle in cycles:
+            time = cycle * 10 + 5  # Posedge at +5
+            
+            # --- Execution trace (IF stage) ---
+            if do_exec:
+                pc = c_pc_if.at(time)
+                instr = c_instr.at(time)
+                
+                if pc is not None and instr is not None:
+                    exec_samples.append((cycle, pc, instr))
+            
+            # --- Pipeline trace ---
+            if do_pipeline:
+                # Get PC values for all stages
+                pc_if = c_pc_if.at(time)
+                pc_id = c_pc_id.at(time)
+                pc_ex = c_pc_ex.at(time)
+                pc_mem = c_pc_mem.at(time)
+                pc_wb = c_pc_wb.at(time)
+                
+                # Get control signals
+                opc_ex = c_opc_ex.at(time)
+                flush = c_flush.at(time)
+                stall = c_stall.at(time)
+                
+                # Format values
+                pc_if_str = f"{pc_if:08x}" if pc_if is not None else "--------"
+                pc_id_str = f"{pc_id:08x}" if pc_id is not None else "--------"
+                pc_ex_str = f"{pc_ex:08x}" if pc_ex is not None else "--------"
+                pc_mem_str = f"{pc_mem:08x}" if pc_mem is not None else "--------"
+                pc_wb_str = f"{pc_wb:08x}" if pc_wb is not None else "--------"
+                
+                opc_str = f"0x{opc_ex:02x}" if opc_ex is not None else "0x--"
+                flush_str = str(flush) if flush is not None else "-"
+                stall_str = str(stall) if stall is not None else "-"
+                
+                # Add notes for important events
+                notes = ""
+                if flush == 1:
+                    notes = "FLUSH!"
+                elif stall == 1:
+                    notes = "STALL"
+                elif opc_ex == 0x73:
+                    notes = "EBREAK in EX"
+                
+                pipeline_rows.append(f"{cycle:<6} | {pc_if_str} {pc_id_str} {pc_ex_str} {pc_mem_str} {pc_wb_str} | {opc_str:<6} {flush_str:<5} {stall_str:<5} | {notes:<20}")
+            
+            # --- Events trace ---
+            if do_events:
+                # Branch events (opcode 0x63 = BRANCH)
+                opc_ex = c_opc_ex.at(time)
+                if opc_ex == 0x63:
+                    pc_ex = c_pc_ex.at(time)
+                    flush = c_flush.at(time)
+                    pc_sel = c_pc_sel.at(time)
+                    
+                    # Determine if taken
+                    taken = "YES" if flush == 1 else "NO"
+                    target = "?" if pc_ex is None else f"0x{pc_ex:08x}"
+                    
+                    pc_str = f"0x{pc_ex:08x}" if pc_ex is not None else "0x--------"
+                    row = f"{cycle:<6} | {pc_str:<10} | {target:<10} | {taken:<5} | {flush:<5}"
+                    if self.source_map and pc_ex is not None:
+                        row = f"{row} | {self.source_map.describe(pc_ex)}"
+                    branch_rows.append(row)
+                
+                # System events (EBREAK/ECALL - opcode 0x73)
+                opc_wb = c_opc_wb.at(time)
+                if opc_wb == 0x73:
+                    pc_wb = c_pc_wb.at(time)
+                    pc_str = f"0x{pc_wb:08x}" if pc_wb is not None else "0x--------"
+                    system_rows.append(f"{cycle:<6} | {'EBREAK/ECALL':<15} | {pc_str:<10} | {'Program termination':<30}")
+        
+        # Disassemble (each distinct instruction word once)
+        disasm = disassemble_many([instr for _, _, instr in exec_samples])
+        exec_rows = [
+            f"{cycle:<8} | 0x{pc:08x} | 0x{instr:08x} | {text:<50}"
+            for (cycle, pc, instr), text in zip(exec_samples, disasm)
+        ]
+        if self.source_map:
+            describe = self.source_map.describe
+            exec_rows = [f"{row} | {describe(pc)}" for row, (_, pc, _) in zip(exec_rows, exec_samples)]
+        
+        return {'exec': exec_rows, 'pipeline': pipeline_rows, 'events': (branch_rows, system_rows)}
+    
+    def _sweep_all(self, kinds, jobs=1):
+        """
+        Run the fused sweep over every cycle. Long traces are split into cycle
+        chunks handled by a process pool (fork) and concatenated in order.
+        """
+        n = len(self.cycles)
+        jobs = max(1, jobs or (os.cpu_count() or 1))
+        if jobs == 1 or n < PARALLEL_MIN_CYCLES or not _fork_available():
+            return self._sweep(kinds, 0, n)
+        
+        import multiprocessing
+        
+        num_chunks = jobs * 4
+        bounds = [(n * i // num_chunks, n * (i + 1) // num_chunks) for i in range(num_chunks)]
+        print(f"[VCD Analyzer] Sweeping {n} cycles in {num_chunks} chunks on {jobs} processes...")
+        
+        global _SWEEP_ANALYZER
+        _SWEEP_ANALYZER = self  # Inherited by the forked workers (no pickling of the signals)
+        try:
+            with multiprocessing.get_context('fork').Pool(jobs) as pool:
+                parts = pool.map(_sweep_chunk, [(kinds, lo, hi) for lo, hi in bounds])
+        finally:
+            _SWEEP_ANALYZER = None
+        
+        merged = {'exec': [], 'pipeline': [], 'events': ([], [])}
+        for part in parts:
+            merged['exec'].extend(part['exec'])
+            merged['pipeline'].extend(part['pipeline'])
+            merged['events'][0].extend(part['events'][0])
+            merged['events'][1].extend(part['events'][1])
+        return merged
+    
+    def _write_exec_trace(self, output_path, rows):
+        """
+        Write execution trace (IF stage)
         Format: Cycle | PC | Hex | Disassembly
         """
-        print(f"[VCD Analyzer] Generating execution trace...")
-        
         lines = []
         lines.append("=" * 100)
         lines.append("RV32I Core - Execution Trace (IF Stage)")
         lines.append("=" * 100)
         lines.append(f"Source: {Path(self.vcd_path).name}")
         lines.append("")
-        lines.append(f"{'Cycle':<8} | {'PC':<10} | {'Hex':<10} | {'Disassembly':<50}")
+        lines.append(f"{'Cycle':<8} | {'PC':<10} | {'Hex':<10} | {'Disassembly':<50}" +
+                     (" | Location" if self.source_map else ""))
         lines.append("-" * 100)
-        
-        for cycle in self.cycles:
-            time = cycle * 10 + 5  # Posedge at +5
-            
-            pc = self._get_signal('PC_IF', time)
-            instr = self._get_signal('instr', time)
-            
-            if pc is None or instr is None:
-                continue
-            
-            # Disassemble
-            disasm = disassemble(instr)
-            
-            lines.append(f"{cycle:<8} | 0x{pc:08x} | 0x{instr:08x} | {disasm:<50}")
-        
+        lines.extend(rows)
         lines.append("-" * 100)
         lines.append(f"Total cycles: {len(self.cycles)}")
         
@@ -179,13 +598,11 @@ class VCDAnalyzer:
         
         print(f"[VCD Analyzer] ✓ Execution trace: {output_path}")
     
-    def generate_pipeline_trace(self, output_path):
+    def _write_pipeline_trace(self, output_path, rows):
         """
-        Generate pipeline trace (hybrid format)
+        Write pipeline trace (hybrid format)
         Format: Cycle | IF_PC ID_PC EX_PC MEM_PC WB_PC | Controls
         """
-        print(f"[VCD Analyzer] Generating pipeline trace...")
-        
         lines = []
         lines.append("=" * 120)
         lines.append("RV32I Core - Pipeline Trace (Hybrid Format)")
@@ -194,44 +611,7 @@ class VCDAnalyzer:
         lines.append("")
         lines.append(f"{'Cycle':<6} | {'IF_PC':<8} {'ID_PC':<8} {'EX_PC':<8} {'MEM_PC':<8} {'WB_PC':<8} | {'EX_op':<6} {'Flush':<5} {'Stall':<5} | {'Notes':<20}")
         lines.append("-" * 120)
-        
-        for cycle in self.cycles:
-            time = cycle * 10 + 5
-            
-            # Get PC values for all stages
-            pc_if = self._get_signal('PC_IF', time)
-            pc_id = self._get_signal('PC_ID', time)
-            pc_ex = self._get_signal('PC_EX', time)
-            pc_mem = self._get_signal('PC_MEM', time)
-            pc_wb = self._get_signal('PC_WB', time)
-            
-            # Get control signals
-            opc_ex = self._get_signal('opcode_EX', time)
-            flush = self._get_signal('flush', time)
-            stall = self._get_signal('stall_FU', time)
-            
-            # Format values
-            pc_if_str = f"{pc_if:08x}" if pc_if is not None else "--------"
-            pc_id_str = f"{pc_id:08x}" if pc_id is not None else "--------"
-            pc_ex_str = f"{pc_ex:08x}" if pc_ex is not None else "--------"
-            pc_mem_str = f"{pc_mem:08x}" if pc_mem is not None else "--------"
-            pc_wb_str = f"{pc_wb:08x}" if pc_wb is not None else "--------"
-            
-            opc_str = f"0x{opc_ex:02x}" if opc_ex is not None else "0x--"
-            flush_str = str(flush) if flush is not None else "-"
-            stall_str = str(stall) if stall is not None else "-"
-            
-            # Add notes for important events
-            notes = ""
-            if flush == 1:
-                notes = "FLUSH!"
-            elif stall == 1:
-                notes = "STALL"
-            elif opc_ex == 0x73:
-                notes = "EBREAK in EX"
-            
-            lines.append(f"{cycle:<6} | {pc_if_str} {pc_id_str} {pc_ex_str} {pc_mem_str} {pc_wb_str} | {opc_str:<6} {flush_str:<5} {stall_str:<5} | {notes:<20}")
-        
+        lines.extend(rows)
         lines.append("-" * 120)
         lines.append(f"Total cycles: {len(self.cycles)}")
         
@@ -240,12 +620,12 @@ class VCDAnalyzer:
         
         print(f"[VCD Analyzer] ✓ Pipeline trace: {output_path}")
     
-    def generate_events(self, output_path, event_filter=None):
+    def _write_events(self, output_path, rows):
         """
-        Generate events trace (branch/hazard/system events)
+        Write events trace (branch/hazard/system events)
         Format: Separate sections for each event type
         """
-        print(f"[VCD Analyzer] Generating events trace...")
+        branch_rows, system_rows = rows
         
         lines = []
         lines.append("=" * 100)
@@ -254,52 +634,14 @@ class VCDAnalyzer:
         lines.append(f"Source: {Path(self.vcd_path).name}")
         lines.append("")
         
-        # Collect events
-        branch_events = []
-        system_events = []
-        
-        for cycle in self.cycles:
-            time = cycle * 10 + 5
-            
-            # Branch events (opcode 0x63 = BRANCH)
-            opc_ex = self._get_signal('opcode_EX', time)
-            if opc_ex == 0x63:
-                pc_ex = self._get_signal('PC_EX', time)
-                flush = self._get_signal('flush', time)
-                pc_sel = self._get_signal('PC_sel', time)
-                
-                # Determine if taken
-                taken = "YES" if flush == 1 else "NO"
-                target = "?" if pc_ex is None else f"0x{pc_ex:08x}"
-                
-                branch_events.append({
-                    'cycle': cycle,
-                    'pc': pc_ex,
-                    'target': target,
-                    'taken': taken,
-                    'flush': flush
-                })
-            
-            # System events (EBREAK/ECALL - opcode 0x73)
-            opc_wb = self._get_signal('opcode_WB', time)
-            if opc_wb == 0x73:
-                pc_wb = self._get_signal('PC_WB', time)
-                system_events.append({
-                    'cycle': cycle,
-                    'event': 'EBREAK/ECALL',
-                    'pc': pc_wb,
-                    'details': 'Program termination'
-                })
-        
         # Write branch events
         lines.append("=== BRANCH EVENTS ===")
-        lines.append(f"{'Cycle':<6} | {'PC':<10} | {'Target':<10} | {'Taken':<5} | {'Flush':<5}")
+        lines.append(f"{'Cycle':<6} | {'PC':<10} | {'Target':<10} | {'Taken':<5} | {'Flush':<5}" +
+                     (" | Location" if self.source_map else ""))
         lines.append("-" * 50)
         
-        if branch_events:
-            for evt in branch_events:
-                pc_str = f"0x{evt['pc']:08x}" if evt['pc'] is not None else "0x--------"
-                lines.append(f"{evt['cycle']:<6} | {pc_str:<10} | {evt['target']:<10} | {evt['taken']:<5} | {evt['flush']:<5}")
+        if branch_rows:
+            lines.extend(branch_rows)
         else:
             lines.append("  (No branch events)")
         
@@ -310,23 +652,33 @@ class VCDAnalyzer:
         lines.append(f"{'Cycle':<6} | {'Event':<15} | {'PC':<10} | {'Details':<30}")
         lines.append("-" * 70)
         
-        if system_events:
-            for evt in system_events:
-                pc_str = f"0x{evt['pc']:08x}" if evt['pc'] is not None else "0x--------"
-                lines.append(f"{evt['cycle']:<6} | {evt['event']:<15} | {pc_str:<10} | {evt['details']:<30}")
+        if system_rows:
+            lines.extend(system_rows)
         else:
             lines.append("  (No system events)")
         
         lines.append("")
         lines.append("=" * 100)
-        lines.append(f"Total branch events: {len(branch_events)}")
-        lines.append(f"Total system events: {len(system_events)}")
+        lines.append(f"Total branch events: {len(branch_rows)}")
+        lines.append(f"Total system events: {len(system_rows)}")
         
         with open(output_path, 'w') as f:
             f.write('\n'.join(lines))
         
         print(f"[VCD Analyzer] ✓ Events trace: {output_path}")
     
+    def generate_exec_trace(self, output_path):
+        """Generate execution trace (IF stage)"""
+        self.generate_reports({'exec': output_path}, jobs=1)
+    
+    def generate_pipeline_trace(self, output_path):
+        """Generate pipeline trace (hybrid format)"""
+        self.generate_reports({'pipeline': output_path}, jobs=1)
+    
+    def generate_events(self, output_path, event_filter=None):
+        """Generate events trace (branch/hazard/system events)"""
+        self.generate_reports({'events': output_path}, jobs=1)
+    
     def generate_final_state(self, output_path):
         """
         Generate final state dump (regfile + memory at last cycle)
@@ -349,7 +701,7 @@ class VCDAnalyzer:
         if self.cycles:
             final_time = self.cycles[-1] * 10 + 5
             
-            for sig_name in sorted(self.signals.keys()):
+            for sig_name in sorted(self.signal_times.keys()):
                 val = self._get_signal(sig_name, final_time)
                 if val is not None:
                     if isinstance(val, int) and val < 256:
@@ -368,28 +720,53 @@ class VCDAnalyzer:
         print(f"[VCD Analyzer] ✓ Final state dump: {output_path}")
 
     
+    def generate_reports(self, outputs, jobs=None):
+        """
+        Generate several reports with one fused pass over the cycles.
+        outputs: {output type: path}; jobs: worker processes for long traces
+        (default: CPU count, 1 = in-process).
+        """
+        writers = {
+            'exec': self._write_exec_trace,
+            'pipeline': self._write_pipeline_trace,
+            'events': self._write_events,
+        }
+        kinds = [k for k in outputs if k in writers]
+        for output_type in outputs:
+            if output_type not in writers and output_type != 'state':
+                print(f"[VCD Analyzer] Warning: Unknown output type '{output_type}'")
+        
+        if kinds:
+            print(f"[VCD Analyzer] Generating {', '.join(kinds)} in one pass...")
+            rows = self._sweep_all(kinds, jobs)
+            for kind in kinds:
+                writers[kind](outputs[kind], rows[kind])
+        
+        if 'state' in outputs:
+            self.generate_final_state(outputs['state'])
+    
     def generate(self, output_type, output_path):
         """Generate specific output type"""
-        if output_type == 'exec':
-            self.generate_exec_trace(output_path)
-        elif output_type == 'pipeline':
-            self.generate_pipeline_trace(output_path)
-        elif output_type == 'events':
-            self.generate_events(output_path)
-        elif output_type == 'state':
-            self.generate_final_state(output_path)
-        else:
-            print(f"[VCD Analyzer] Warning: Unknown output type '{output_type}'")
+        self.generate_reports({output_type: output_path}, jobs=1)
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 3:
-        print("Usage: python3 vcd_analyzer.py <vcd_file> <output_dir>")
-        print("Example: python3 vcd_analyzer.py test.vcd output/")
-        sys.exit(1)
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        description="VCD analysis for the RV32I core",
+        epilog="Example: python3 vcd_analyzer.py test.vcd output/ --from-cycle 800000 --to-cycle 800200")
+    parser.add_argument("vcd_file", help="VCD waveform to analyze")
+    parser.add_argument("output_dir", help="Directory for the generated traces")
+    parser.add_argument("--from-cycle", type=int, default=None, help="First cycle to report (inclusive)")
+    parser.add_argument("--to-cycle", type=int, default=None, help="Last cycle to report (inclusive)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes for long traces (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not write the .sigcache/.sigidx sidecar files")
+    parser.add_argument("--map", help="Program map (assembler.py --map) to show labels and source lines")
+    args = parser.parse_args()
     
-    vcd_file = sys.argv[1]
-    output_dir = sys.argv[2]
+    vcd_file = args.vcd_file
+    output_dir = args.output_dir
     
     if not os.path.exists(vcd_file):
         print(f"Error: VCD file not found: {vcd_file}")
@@ -398,17 +775,21 @@ if __name__ == "__main__":
     os.makedirs(output_dir, exist_ok=True)
     
     # Create analyzer
-    analyzer = VCDAnalyzer(vcd_file)
+    analyzer = VCDAnalyzer(vcd_file, use_cache=not args.no_cache,
+                           from_cycle=args.from_cycle, to_cycle=args.to_cycle,
+                           source_map=SourceMap(args.map) if args.map else None)
     
     # Generate all analysis outputs
     print("\n" + "="*60)
     print("Generating analysis outputs...")
     print("="*60)
     
-    analyzer.generate('exec', os.path.join(output_dir, 'exec_trace.txt'))
-    analyzer.generate('pipeline', os.path.join(output_dir, 'pipeline_trace.txt'))
-    analyzer.generate('events', os.path.join(output_dir, 'events.txt'))
-    analyzer.generate('state', os.path.join(output_dir, 'final_state.txt'))
+    analyzer.generate_reports({
+        'exec': os.path.join(output_dir, 'exec_trace.txt'),
+        'pipeline': os.path.join(output_dir, 'pipeline_trace.txt'),
+        'events': os.path.join(output_dir, 'events.txt'),
+        'state': os.path.join(output_dir, 'final_state.txt'),
+    }, jobs=args.jobs)
     
     print("\n✅ All analysis traces generated successfully!")
     print(f"📁 Output directory: {output_dir}")